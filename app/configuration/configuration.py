@@ -3,26 +3,852 @@ import shutil
 import re
 import uuid
 import json
+import time
+import sqlite3
+import atexit
 import logging
 import datetime
+import threading
 import traceback
 
 logger = logging.getLogger("Configuration")
 
+class ConfigurationStore():
+    """
+    A process-wide in-memory cache of a single JSON configuration file.
+
+    Every Configuration* instance pointing at the same file shares one store, so reads are plain
+    dictionary lookups. The file is only re-read when its mtime/size changes behind our back.
+    Saves replace the cached data and are coalesced by a debounced background writer that
+    persists the file through a temporary file and an atomic rename.
+    """
+    WRITE_DELAY = 0.5
+    MAX_WRITE_DELAY = 3.0
+
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._data = None
+        self._signature = None
+        self._dirty = False
+        self._dirty_since = None
+        self._writing = False
+        self._timer = None
+
+    @classmethod
+    def for_path(cls, path):
+        """
+        Returns the shared store for the given configuration file path.
+        """
+        key = os.path.abspath(path)
+        with cls._stores_lock:
+            store = cls._stores.get(key)
+            if store is None:
+                store = cls(path)
+                cls._stores[key] = store
+            return store
+
+    @classmethod
+    def flush_all(cls):
+        """
+        Synchronously writes every pending change to disk. Called on application shutdown.
+        """
+        with cls._stores_lock:
+            stores = list(cls._stores.values())
+        for store in stores:
+            store.flush()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def load(self, default_factory=dict):
+        """
+        Returns the cached configuration data, reloading it if the file was changed externally.
+
+        The returned dictionary is shared: changes made to it must be committed with save().
+        """
+        with self.lock:
+            if self._data is not None and (self._dirty or self._writing):
+                return self._data
+
+            signature = self._file_signature()
+            if self._data is not None and signature == self._signature:
+                return self._data
+
+            self._signature = signature
+            self._data = default_factory() if signature is None else self._read()
+            return self._data
+
+    def _read(self):
+        with open(self.path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def _serialize(self, data):
+        return json.dumps(data, ensure_ascii=False, indent=4)
+
+    def save(self, data):
+        """
+        Replaces the cached configuration data and schedules a background write.
+        """
+        with self.lock:
+            self._data = data
+            if not self._dirty:
+                self._dirty = True
+                self._dirty_since = time.monotonic()
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._timer is not None:
+            if time.monotonic() - self._dirty_since >= self.MAX_WRITE_DELAY:
+                return
+            self._timer.cancel()
+
+        self._timer = threading.Timer(self.WRITE_DELAY, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """
+        Writes the cached data to disk if it has unsaved changes.
+        """
+        with self._write_lock:
+            with self.lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+                if not self._dirty:
+                    return
+
+                try:
+                    payload = self._serialize(self._data)
+                except RuntimeError:
+                    # The data was mutated by another thread while being serialized, try again later.
+                    self._schedule_flush()
+                    return
+
+                self._dirty = False
+                self._dirty_since = None
+                self._writing = True
+
+            try:
+                self._atomic_write(payload)
+            except Exception as e:
+                logger.error(f"Failed to write configuration file {self.path}: {e}")
+                with self.lock:
+                    if not self._dirty:
+                        self._dirty = True
+                        self._dirty_since = time.monotonic()
+                    self._schedule_flush()
+            finally:
+                with self.lock:
+                    self._signature = self._file_signature()
+                    self._writing = False
+
+    def _atomic_write(self, payload):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+
+        with open(temp_path, 'w', encoding="utf-8") as file:
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+
+        for attempt in range(5):
+            try:
+                os.replace(temp_path, self.path)
+                return
+            except PermissionError:
+                # The target can be briefly locked on Windows (antivirus, indexer).
+                if attempt == 4:
+                    raise
+                time.sleep(0.05)
+
+class ChatMessageStore():
+    """
+    SQLite storage for chat messages, one row per message, indexed by chat and sequence number.
+
+    Writes are queued in memory and committed in a single transaction by a background timer,
+    so appending, editing or deleting a message costs O(1) regardless of the chat length.
+    """
+    WRITE_DELAY = 0.5
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self._pending = {}
+        self._fingerprints = {}
+        self._signatures = {}
+        self._chat_ids = None
+        self._timer = None
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                chat_id TEXT NOT NULL,
+                message_id TEXT NOT NULL,
+                sequence_number INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (chat_id, message_id)
+            )
+        """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_sequence ON messages (chat_id, sequence_number)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def _dump(message):
+        return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+    @staticmethod
+    def _signature(message):
+        """
+        Cheap content hash of a message that skips JSON encoding (string hashes are cached), or
+        None when the message holds values it can't cover.
+        """
+        try:
+            return hash(tuple(
+                (key, tuple(tuple(item.items()) if isinstance(item, dict) else item for item in value)
+                      if isinstance(value, list) else value)
+                for key, value in message.items()
+            ))
+        except TypeError:
+            return None
+
+    def _ensure_known(self, chat_id):
+        fingerprints = self._fingerprints.get(chat_id)
+        if fingerprints is None:
+            rows = self._connection.execute(
+                "SELECT message_id, payload FROM messages WHERE chat_id = ?", (chat_id,)
+            ).fetchall()
+            fingerprints = {message_id: hash(payload) for message_id, payload in rows}
+            self._fingerprints[chat_id] = fingerprints
+        return fingerprints
+
+    def upsert(self, chat_id, message):
+        """
+        Queues an insert or update of a single message.
+        """
+        payload = self._dump(message)
+        with self.lock:
+            self._ensure_known(chat_id)[message["message_id"]] = hash(payload)
+            self._signatures.setdefault(chat_id, {})[message["message_id"]] = self._signature(message)
+            self._pending[(chat_id, message["message_id"])] = (message.get("sequence_number", 0), payload)
+            self._schedule_flush()
+
+    def delete(self, chat_id, message_id):
+        """
+        Queues the removal of a single message.
+        """
+        with self.lock:
+            self._ensure_known(chat_id).pop(message_id, None)
+            self._signatures.get(chat_id, {}).pop(message_id, None)
+            self._pending[(chat_id, message_id)] = None
+            self._schedule_flush()
+
+    def sync_chat(self, chat_id, chat_content):
+        """
+        Queues writes for every message of the chat that differs from what is stored.
+
+        Only messages whose signature changed since the last sync are serialized and compared.
+        """
+        with self.lock:
+            fingerprints = self._ensure_known(chat_id)
+            signatures = self._signatures.setdefault(chat_id, {})
+            for message_id, message in chat_content.items():
+                signature = self._signature(message)
+                if signature is not None and signatures.get(message_id) == signature and message_id in fingerprints:
+                    continue
+                signatures[message_id] = signature
+
+                payload = self._dump(message)
+                fingerprint = hash(payload)
+                if fingerprints.get(message_id) != fingerprint:
+                    fingerprints[message_id] = fingerprint
+                    self._pending[(chat_id, message_id)] = (message.get("sequence_number", 0), payload)
+
+            for message_id in [m for m in fingerprints if m not in chat_content]:
+                del fingerprints[message_id]
+                signatures.pop(message_id, None)
+                self._pending[(chat_id, message_id)] = None
+
+            if self._pending:
+                self._schedule_flush()
+
+    def _stored_chat_ids(self):
+        if self._chat_ids is None:
+            self._chat_ids = {
+                chat_id for (chat_id,) in self._connection.execute("SELECT DISTINCT chat_id FROM messages")
+            }
+        return self._chat_ids
+
+    def prune_chats(self, live_chat_ids):
+        """
+        Removes all messages of stored chats that are no longer referenced by the configuration.
+        """
+        with self.lock:
+            stored_chat_ids = self._stored_chat_ids()
+            for chat_id in [c for c in stored_chat_ids | set(self._fingerprints) if c not in live_chat_ids]:
+                for message_id in self._ensure_known(chat_id):
+                    self._pending[(chat_id, message_id)] = None
+                del self._fingerprints[chat_id]
+                self._signatures.pop(chat_id, None)
+                stored_chat_ids.discard(chat_id)
+            if self._pending:
+                self._schedule_flush()
+
+    def load_chat(self, chat_id):
+        """
+        Loads all messages of a chat as a chat_content dictionary ordered by sequence number.
+        """
+        with self.lock:
+            self.flush()
+            rows = self._connection.execute(
+                "SELECT message_id, payload FROM messages WHERE chat_id = ? ORDER BY sequence_number",
+                (chat_id,)
+            ).fetchall()
+            self._fingerprints[chat_id] = {message_id: hash(payload) for message_id, payload in rows}
+            return {message_id: json.loads(payload) for message_id, payload in rows}
+
+    def load_tail(self, chat_id, limit, before_sequence=None):
+        """
+        Loads at most `limit` messages of a chat preceding `before_sequence` (or the end of the chat),
+        ordered by sequence number.
+        """
+        with self.lock:
+            self.flush()
+            if before_sequence is None:
+                rows = self._connection.execute(
+                    "SELECT payload FROM messages WHERE chat_id = ? ORDER BY sequence_number DESC LIMIT ?",
+                    (chat_id, limit)
+                ).fetchall()
+            else:
+                rows = self._connection.execute(
+                    "SELECT payload FROM messages WHERE chat_id = ? AND sequence_number < ? "
+                    "ORDER BY sequence_number DESC LIMIT ?",
+                    (chat_id, before_sequence, limit)
+                ).fetchall()
+            return [json.loads(payload) for (payload,) in reversed(rows)]
+
+    def _schedule_flush(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.WRITE_DELAY, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """
+        Commits every queued message write in a single transaction.
+
+        Returns:
+            bool: False if the writes could not be committed (they stay queued for a retry).
+        """
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            if not self._pending:
+                return True
+
+            pending, self._pending = self._pending, {}
+            upserts = [
+                (chat_id, message_id, entry[0], entry[1])
+                for (chat_id, message_id), entry in pending.items() if entry is not None
+            ]
+            deletes = [key for key, entry in pending.items() if entry is None]
+
+            try:
+                with self._connection:
+                    if deletes:
+                        self._connection.executemany(
+                            "DELETE FROM messages WHERE chat_id = ? AND message_id = ?", deletes
+                        )
+                    if upserts:
+                        self._connection.executemany(
+                            "INSERT OR REPLACE INTO messages (chat_id, message_id, sequence_number, payload) "
+                            "VALUES (?, ?, ?, ?)", upserts
+                        )
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write chat messages to {self.db_path}: {e}")
+                pending.update(self._pending)
+                self._pending = pending
+                self._schedule_flush()
+                return False
+            return True
+
+class ChatIndex():
+    """
+    Derived ordering and chat_history bookkeeping of a single chat.
+
+    Keeps the message ids in sequence order and the chat_history turn every message belongs to,
+    so an append only replays the tail turn, an edit only the affected turn, and a delete only
+    renumbers the messages after it. The index is never persisted and is rebuilt from
+    `chat_content` whenever it no longer matches the chat.
+    """
+    def __init__(self, chat_data):
+        self.chat_data = chat_data
+
+    @staticmethod
+    def current_text(message):
+        current_variant_id = message.get("current_variant_id", "default")
+        return next(
+            (variant["text"] for variant in message.get("variants", []) if variant["variant_id"] == current_variant_id),
+            ""
+        )
+
+    def is_current(self, chat_data):
+        """
+        Cheap check that the chat was not restructured behind the index's back.
+        """
+        if self.chat_data is not chat_data:
+            return False
+        if chat_data.get("chat_content") is not self.content or chat_data.get("chat_history") is not self.history:
+            return False
+        if len(self.order) != len(self.content):
+            return False
+        if not self.order:
+            return True
+        last = self.content.get(self.order[-1])
+        return last is not None and last.get("sequence_number") == len(self.order)
+
+    def rebuild(self):
+        """
+        Rebuilds the order and the chat_history from scratch, renumbering messages if needed.
+
+        Returns:
+            list: Messages whose sequence_number changed.
+        """
+        self.content = self.chat_data.setdefault("chat_content", {})
+        self.history = []
+        self.chat_data["chat_history"] = self.history
+
+        ordered = sorted(self.content.items(), key=lambda x: x[1].get("sequence_number", float('inf')))
+        self.order = [message_id for message_id, _ in ordered]
+        self.positions = {message_id: idx for idx, message_id in enumerate(self.order)}
+        self.turn_of = []
+        self.turn_starts = []
+
+        changed = self._renumber_from(0)
+        self._replay_from(0)
+        return changed
+
+    def _renumber_from(self, position):
+        changed = []
+        for idx in range(position, len(self.order)):
+            message_id = self.order[idx]
+            self.positions[message_id] = idx
+            message = self.content[message_id]
+            if message.get("sequence_number") != idx + 1:
+                message["sequence_number"] = idx + 1
+                changed.append(message)
+        return changed
+
+    def _replay_from(self, turn):
+        """
+        Re-runs the turn builder from the start of `turn` to the end of the chat.
+        """
+        start = self.turn_starts[turn] if turn < len(self.turn_starts) else len(self.turn_of)
+        del self.history[turn:]
+        del self.turn_starts[turn:]
+        del self.turn_of[start:]
+
+        user_turn = {"user": "", "character": ""}
+        for position in range(start, len(self.order)):
+            message = self.content[self.order[position]]
+            current_text = self.current_text(message)
+
+            if message["is_user"]:
+                if user_turn["user"] or user_turn["character"]:
+                    self.history.append(user_turn)
+                    user_turn = {"user": current_text, "character": ""}
+                else:
+                    user_turn["user"] = current_text
+            else:
+                if user_turn["user"] or not user_turn["character"]:
+                    user_turn["character"] = current_text
+                else:
+                    user_turn["character"] += "\n" + current_text
+
+            if not self.turn_of or self.turn_of[-1] != len(self.history):
+                self.turn_starts.append(position)
+            self.turn_of.append(len(self.history))
+
+        if user_turn["user"] or user_turn["character"]:
+            self.history.append(user_turn)
+
+    def _replay_turn(self, turn):
+        """
+        Recomputes a single turn in place. Falls back to replaying the rest of the chat when the
+        change moves turn boundaries (a turn becoming empty or splitting in two).
+        """
+        if turn >= len(self.history) or turn + 1 >= len(self.turn_starts):
+            self._replay_from(turn)
+            return
+
+        user_turn = {"user": "", "character": ""}
+        for position in range(self.turn_starts[turn], self.turn_starts[turn + 1]):
+            message = self.content[self.order[position]]
+            current_text = self.current_text(message)
+
+            if message["is_user"]:
+                if user_turn["user"] or user_turn["character"]:
+                    self._replay_from(turn)
+                    return
+                user_turn["user"] = current_text
+            else:
+                if user_turn["user"] or not user_turn["character"]:
+                    user_turn["character"] = current_text
+                else:
+                    user_turn["character"] += "\n" + current_text
+
+        if not (user_turn["user"] or user_turn["character"]):
+            self._replay_from(turn)
+            return
+
+        self.history[turn] = user_turn
+
+    def append(self, message_id):
+        """
+        Registers a message that was added at the end of the chat.
+        """
+        self.positions[message_id] = len(self.order)
+        self.order.append(message_id)
+        self._replay_from(self.turn_of[-1] if self.turn_of else 0)
+
+    def update(self, message_id):
+        """
+        Refreshes the turn of a message whose current text changed.
+        """
+        self._replay_turn(self.turn_of[self.positions[message_id]])
+
+    def remove(self, message_ids):
+        """
+        Unregisters deleted messages, renumbering only the messages after the first removed one.
+
+        Returns:
+            list: Messages whose sequence_number changed.
+        """
+        removed = [self.positions.pop(message_id) for message_id in message_ids if message_id in self.positions]
+        if not removed:
+            return []
+
+        first = min(removed)
+        removed = set(removed)
+        self.order[first:] = [
+            message_id for idx, message_id in enumerate(self.order[first:], start=first) if idx not in removed
+        ]
+
+        # Removing the first message of a turn can merge what follows into the previous turn.
+        turn = self.turn_of[first - 1] if first > 0 else 0
+        del self.turn_of[first:]
+        changed = self._renumber_from(first)
+        self._replay_from(turn)
+        return changed
+
+class StoredChat(dict):
+    """
+    Chat metadata whose `chat_content` and `chat_history` are read from the chat message store
+    the first time either of them (or the chat as a whole) is accessed.
+
+    Copies are plain dictionaries that carry the loaded messages.
+    """
+    LAZY_KEYS = ("chat_content", "chat_history")
+
+    def __init__(self, chat_data, store, storage_id):
+        super().__init__(chat_data)
+        self._store = store
+        self._storage_id = storage_id
+        self._loading = False
+
+    def _ensure_loaded(self):
+        store = self._store
+        if store is None:
+            return
+        with store.lock:
+            # Another thread finished loading meanwhile, or the store is reading the chat right now.
+            if self._store is None or self._loading:
+                return
+            self._loading = True
+            try:
+                store._load_stored_chat(self, self._storage_id)
+                self._store = None
+            finally:
+                self._loading = False
+
+    def __getitem__(self, key):
+        if key in self.LAZY_KEYS:
+            self._ensure_loaded()
+        return super().__getitem__(key)
+
+    def __setitem__(self, key, value):
+        if key in self.LAZY_KEYS:
+            self._ensure_loaded()
+        super().__setitem__(key, value)
+
+    def __contains__(self, key):
+        if key in self.LAZY_KEYS:
+            self._ensure_loaded()
+        return super().__contains__(key)
+
+    def get(self, key, default=None):
+        if key in self.LAZY_KEYS:
+            self._ensure_loaded()
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        if key in self.LAZY_KEYS:
+            self._ensure_loaded()
+        return super().setdefault(key, default)
+
+    def pop(self, key, *args):
+        if key in self.LAZY_KEYS:
+            self._ensure_loaded()
+        return super().pop(key, *args)
+
+    def keys(self):
+        self._ensure_loaded()
+        return super().keys()
+
+    def values(self):
+        self._ensure_loaded()
+        return super().values()
+
+    def items(self):
+        self._ensure_loaded()
+        return super().items()
+
+    def __iter__(self):
+        self._ensure_loaded()
+        return super().__iter__()
+
+    def __len__(self):
+        self._ensure_loaded()
+        return super().__len__()
+
+    def __bool__(self):
+        # Truth tests only look at the metadata, which is never empty.
+        return super().__len__() > 0
+
+    def copy(self):
+        return dict(self.items())
+
+    def __reduce_ex__(self, protocol):
+        return dict, (dict(self.items()),)
+
+class CharactersConfigurationStore(ConfigurationStore):
+    """
+    Configuration store for the characters file that keeps chat messages out of the JSON.
+
+    The JSON file only holds character and chat metadata. Every chat gets a `storage_id` and its
+    `chat_content` lives in the ChatMessageStore. Chats are loaded as StoredChat dictionaries, so
+    a chat's messages and the derived `chat_history` are only read when the chat is first used.
+    Chats still carrying their `chat_content` inside the JSON (the old layout) are migrated on
+    first load.
+    """
+    def __init__(self, path):
+        super().__init__(path)
+        self.messages = ChatMessageStore(os.path.join(os.path.dirname(path) or ".", "chats.sqlite3"))
+        self.chat_indexes = {}
+
+    def chat_index(self, chat_data, rebuild=False):
+        """
+        Returns the up-to-date ChatIndex of a chat, rebuilding it when it drifted.
+
+        Returns:
+            tuple: (ChatIndex, list of messages whose sequence_number had to be repaired).
+        """
+        key = chat_data.get("storage_id") or id(chat_data)
+        index = self.chat_indexes.get(key)
+        if index is None or rebuild or not index.is_current(chat_data):
+            index = ChatIndex(chat_data)
+            changed = index.rebuild()
+            self.chat_indexes[key] = index
+            return index, changed
+        return index, []
+
+    @staticmethod
+    def iter_chats(data):
+        for character_data in data.get("character_list", {}).values():
+            chats = character_data.get("chats") if isinstance(character_data, dict) else None
+            if isinstance(chats, dict):
+                for chat_data in chats.values():
+                    if isinstance(chat_data, dict):
+                        yield chat_data
+
+    @staticmethod
+    def build_chat_history(chat_content):
+        """
+        Builds the user/character turn list from the chat content.
+        """
+        chat_history = []
+        user_turn = {"user": "", "character": ""}
+
+        for msg_id, msg_data in sorted(chat_content.items(), key=lambda x: x[1].get("sequence_number", 0)):
+            current_variant_id = msg_data.get("current_variant_id", "default")
+            current_text = next(
+                (variant["text"] for variant in msg_data.get("variants", []) if variant["variant_id"] == current_variant_id),
+                ""
+            )
+
+            if msg_data["is_user"]:
+                if user_turn["user"] or user_turn["character"]:
+                    chat_history.append(user_turn)
+                    user_turn = {"user": current_text, "character": ""}
+                else:
+                    user_turn["user"] = current_text
+            else:
+                if user_turn["user"] or not user_turn["character"]:
+                    user_turn["character"] = current_text
+                else:
+                    user_turn["character"] += "\n" + current_text
+
+        if user_turn["user"] or user_turn["character"]:
+            chat_history.append(user_turn)
+
+        return chat_history
+
+    def _assign_storage_ids(self, data):
+        seen = set()
+        for chat_data in self.iter_chats(data):
+            storage_id = chat_data.get("storage_id")
+            if not storage_id or storage_id in seen:
+                # New chat, or a chat dictionary copied from another one. This is the only time its
+                # messages are written in bulk; later changes go through upsert and delete.
+                storage_id = uuid.uuid4().hex
+                chat_data["storage_id"] = storage_id
+                self.messages.sync_chat(storage_id, chat_data.get("chat_content", {}))
+            seen.add(storage_id)
+
+    def _load_stored_chat(self, chat_data, storage_id):
+        """
+        Attaches the messages and the chat_history of a StoredChat.
+        """
+        chat_data["chat_content"] = self.messages.load_chat(storage_id)
+        _, repaired = self.chat_index(chat_data)
+        for message in repaired:
+            self.messages.upsert(chat_data.get("storage_id", storage_id), message)
+
+    def _read(self):
+        data = super()._read()
+        migrated = False
+
+        self.messages.flush()
+        self.chat_indexes.clear()
+        for character_data in data.get("character_list", {}).values():
+            chats = character_data.get("chats") if isinstance(character_data, dict) else None
+            if not isinstance(chats, dict):
+                continue
+
+            for chat_id, chat_data in chats.items():
+                if not isinstance(chat_data, dict):
+                    continue
+
+                storage_id = chat_data.get("storage_id")
+                if "chat_content" in chat_data:
+                    if not storage_id:
+                        storage_id = uuid.uuid4().hex
+                        chat_data["storage_id"] = storage_id
+                    self.messages.sync_chat(storage_id, chat_data["chat_content"])
+                    migrated = True
+                elif storage_id:
+                    chats[chat_id] = StoredChat(chat_data, self, storage_id)
+                    continue
+                else:
+                    chat_data["chat_content"] = {}
+
+                _, repaired = self.chat_index(chat_data)
+                for message in repaired:
+                    self.messages.upsert(chat_data["storage_id"], message)
+
+        if migrated:
+            logger.info("Moving chat messages from the characters configuration into the chat message store.")
+            backup_path = f"{self.path}.pre-migration.bak"
+            try:
+                if not os.path.exists(backup_path):
+                    shutil.copy2(self.path, backup_path)
+            except OSError as e:
+                # Without a backup the messages stay in the JSON as well; the migration is retried next load.
+                logger.error(f"Failed to back up {self.path} before migrating chat messages: {e}")
+            else:
+                self.save(data)
+
+        return data
+
+    def save(self, data):
+        with self.lock:
+            self._assign_storage_ids(data)
+            super().save(data)
+
+    def _serialize(self, data):
+        live_chat_ids = set()
+        character_list = {}
+
+        for name, character_data in data.get("character_list", {}).items():
+            chats = character_data.get("chats") if isinstance(character_data, dict) else None
+            if isinstance(chats, dict):
+                stored_chats = {}
+                for chat_id, chat_data in chats.items():
+                    storage_id = chat_data.get("storage_id") if isinstance(chat_data, dict) else None
+                    if not storage_id:
+                        stored_chats[chat_id] = chat_data
+                        continue
+
+                    # Messages are already in the message store; reading them through items() would
+                    # also load chats that were never opened.
+                    live_chat_ids.add(storage_id)
+                    stored_chats[chat_id] = {
+                        key: value for key, value in dict.items(chat_data)
+                        if key not in ("chat_content", "chat_history")
+                    }
+                character_data = {**character_data, "chats": stored_chats}
+            character_list[name] = character_data
+
+        self.messages.prune_chats(live_chat_ids)
+        return json.dumps({**data, "character_list": character_list}, ensure_ascii=False, indent=4)
+
+    def _atomic_write(self, payload):
+        # Messages must be on disk before the JSON that no longer contains them replaces the old file.
+        if not self.messages.flush():
+            raise RuntimeError("chat messages could not be committed, keeping the previous file")
+        super()._atomic_write(payload)
+
+    def flush(self):
+        super().flush()
+        self.messages.flush()
+
+atexit.register(ConfigurationStore.flush_all)
+
 class ConfigurationSettings():
     """
     A class that manages a JSON configuration file containing application settings and user data.
     """
     def __init__(self):
         self.settings_path = "app/configuration/settings.json"
+        self.store = ConfigurationStore.for_path(self.settings_path)
 
     def load_configuration(self):
         """
-        Loads and returns the configuration data from the JSON file.
+        Returns the cached configuration data of the JSON file.
         """
-        if not os.path.exists(self.settings_path):
-            
-            return {
+        return self.store.load(self._default_configuration)
+
+    @staticmethod
+    def _default_configuration():
+        return {
                 "main_settings": {
                     "conversation_method": "0",
                     "stt_method": "0",
@@ -43,7 +869,20 @@ class ConfigurationSettings():
                     "reasoning_mode": True,
                     "reasoning_effort": "medium",
                     "soul_memory_reasoning_effort": "none",
-                    "soul_stage_reasoning_effort": "none"
+                    "soul_stage_reasoning_effort": "none",
+                    "embedding_backend": "torch",
+                    "soul_stage_pipelining": False,
+                    "local_parallel_slots": 1,
+                    "local_prompt_cache": False,
+                    "local_slot_save": False,
+                    "stream_flush_interval_ms": 33,
+                    "stream_dispatcher_stats": False,
+                    "tts_streaming": True,
+                    "tts_lookahead": 2,
+                    "tts_phrase_cache": True,
+                    "tts_phrase_cache_mb": 256,
+                    "model_ram_budget_mb": 0,
+                    "model_vram_budget_mb": 0
                 },
                 "user_data": {
                     "default_persona": "None",
@@ -52,15 +891,12 @@ class ConfigurationSettings():
                     "current_character_image": "None"
                 }
             }
-        with open(self.settings_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
 
     def save_configuration_edit(self, data):
         """
         Saves provided configuration data to the JSON file.
         """
-        with open(self.settings_path, 'w', encoding="utf-8") as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
+        self.store.save(data)
 
     def update_main_setting(self, setting, value):
         """
@@ -183,22 +1019,19 @@ class ConfigurationAPI():
     """
     def __init__(self):
         self.api_tokens_path = "app/configuration/api.json"
+        self.store = ConfigurationStore.for_path(self.api_tokens_path)
 
     def load_configuration(self):
         """
-        Loads the current API token configuration from the JSON file.
+        Returns the cached API token configuration of the JSON file.
         """
-        if not os.path.exists(self.api_tokens_path):
-            return {}
-        with open(self.api_tokens_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
+        return self.store.load()
 
     def save_configuration_edit(self, data):
         """
-        Saves provided configuration data directly to the JSON file.
+        Saves provided configuration data to the JSON file.
         """
-        with open(self.api_tokens_path, 'w', encoding="utf-8") as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
+        self.store.save(data)
     
     def save_api_token(self, variable, variable_value):
         """
@@ -227,23 +1060,20 @@ class ConfigurationCharacters():
     """
     def __init__(self):
         self.characters_path = "app/configuration/characters.json"
+        self.store = CharactersConfigurationStore.for_path(self.characters_path)
         self.configuration_data = self.load_configuration()
 
     def load_configuration(self):
         """
-        Loads the characters configuration data from the JSON file.
+        Returns the cached characters configuration data of the JSON file.
         """
-        if not os.path.exists(self.characters_path):
-            return {}
-        with open(self.characters_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
+        return self.store.load()
 
     def save_configuration_edit(self, data):
         """
-        Saves the provided character configuration data directly to the JSON file.
+        Saves the provided character configuration data to the JSON file.
         """
-        with open(self.characters_path, 'w', encoding="utf-8") as file:
-            json.dump(data, file, ensure_ascii=False, indent=4)
+        self.store.save(data)
 
     def save_character_card(self, character_name, character_title, character_avatar, 
                             character_description, character_personality, first_message, 
@@ -390,310 +1220,371 @@ class ConfigurationCharacters():
 
         self.save_configuration_edit(configuration_data)
     
-    def update_chat_history(self, character_name):
+    def _commit_chat_messages(self, configuration_data, chat_data, changed=(), deleted=()):
         """
-        Updates the chat history for a specific character based on their chat content.
+        Persists changed and deleted messages of a chat through the chat message store.
         """
-        configuration_data = self.load_configuration()
-        character_data = configuration_data['character_list'].get(character_name)
+        storage_id = chat_data.get("storage_id")
+        if not storage_id:
+            self.save_configuration_edit(configuration_data)
+            return
+
+        for message_id in deleted:
+            self.store.messages.delete(storage_id, message_id)
+        for message in changed:
+            self.store.messages.upsert(storage_id, message)
 
+    def _get_current_chat(self, configuration_data, character_name):
+        character_data = configuration_data.get('character_list', {}).get(character_name)
         if not character_data or "chats" not in character_data:
-            return
+            return None
 
         current_chat_id = character_data.get("current_chat", None)
         if not current_chat_id or current_chat_id not in character_data["chats"]:
-            return
-        
-        chat_data = character_data["chats"][current_chat_id]
-        chat_content = chat_data.get("chat_content", {})
-        
-        chat_history = []
-        user_turn = {"user": "", "character": ""}
+            return None
 
-        for msg_id, msg_data in sorted(chat_content.items(), key=lambda x: x[1].get("sequence_number", 0)):
-            current_variant_id = msg_data.get("current_variant_id", "default")
-            current_text = next(
-                (variant["text"] for variant in msg_data.get("variants", []) if variant["variant_id"] == current_variant_id),
-                ""
-            )
+        return character_data["chats"][current_chat_id]
 
-            if msg_data["is_user"]:
-                if user_turn["user"] or user_turn["character"]:
-                    chat_history.append(user_turn)
-                    user_turn = {"user": current_text, "character": ""}
-                else:
-                    user_turn["user"] = current_text
-            else:
-                if user_turn["user"] or not user_turn["character"]:
-                    user_turn["character"] = current_text
-                else:
-                    user_turn["character"] += "\n" + current_text
+    def update_chat_history(self, character_name):
+        """
+        Rebuilds the chat history and sequence numbers of a character's current chat from its chat content.
+        """
+        with self.store.lock:
+            configuration_data = self.load_configuration()
+            chat_data = self._get_current_chat(configuration_data, character_name)
+            if not chat_data:
+                return
 
-        if user_turn["user"] or user_turn["character"]:
-            chat_history.append(user_turn)
+            _, changed = self.store.chat_index(chat_data, rebuild=True)
+            self._commit_chat_messages(configuration_data, chat_data, changed=changed)
 
-        chat_data["chat_history"] = chat_history
-        character_data["chats"][current_chat_id] = chat_data
-        configuration_data['character_list'][character_name] = character_data
-        
-        self.save_configuration_edit(configuration_data)
-
-    def add_message_to_config(self, character_name, author_name, is_user, text, message_id):
+    def check_chat_consistency(self, character_name, repair=True):
         """
-        Adds a new message to the chat content of a specific character in the configuration.
-        """
-        configuration_data = self.load_configuration()
-        character_data = configuration_data['character_list'].get(character_name)
+        Verifies the derived data of a character's current chat against its chat content.
 
-        if not character_data or "chats" not in character_data:
-            return
+        Args:
+            character_name (str): Name of the character whose current chat is checked.
+            repair (bool): Rebuild sequence numbers and chat history when problems are found.
 
-        current_chat_id = character_data.get("current_chat", None)
-        if not current_chat_id or current_chat_id not in character_data["chats"]:
-            return
+        Returns:
+            list: Descriptions of the problems found, empty if the chat is consistent.
+        """
+        with self.store.lock:
+            configuration_data = self.load_configuration()
+            chat_data = self._get_current_chat(configuration_data, character_name)
+            if not chat_data:
+                return []
 
-        chat_data = character_data["chats"][current_chat_id]
+            chat_content = chat_data.get("chat_content", {})
+            issues = []
+            mismatched = []
 
-        chat_content = chat_data.get("chat_content", {})
+            for message_id, message in chat_content.items():
+                if message.get("message_id") != message_id:
+                    issues.append(f"Message {message_id} is stored with message_id {message.get('message_id')}")
+                    mismatched.append(message)
 
-        sequence_number = len(chat_content) + 1
+            sequence_numbers = sorted(
+                message.get("sequence_number") for message in chat_content.values()
+                if isinstance(message.get("sequence_number"), int)
+            )
+            if sequence_numbers != list(range(1, len(chat_content) + 1)):
+                issues.append("Sequence numbers are not contiguous")
 
-        existing_entry = chat_content.get(message_id, {})
+            if chat_data.get("chat_history") != CharactersConfigurationStore.build_chat_history(chat_content):
+                issues.append("Chat history does not match chat content")
 
-        new_message = {
-            "message_id": message_id,
-            "sequence_number": sequence_number,
-            "author_name": author_name,
-            "is_user": is_user,
-            "current_variant_id": "default",
-            "variants": [
-                {
-                    "variant_id": "default",
-                    "text": text,
-                    "created_at": datetime.datetime.now().isoformat()
-                }
-            ]
-        }
+            if issues:
+                logger.warning(f"Chat of '{character_name}' is inconsistent: {'; '.join(issues)}")
 
-        for extra_key in ("image", "image_status", "image_prompt", "tts_audio", "attachments"):
-            if extra_key in existing_entry:
-                new_message[extra_key] = existing_entry[extra_key]
-        
-        chat_content[message_id] = new_message
-        chat_data["chat_content"] = chat_content
+            if issues and repair:
+                for message_id, message in chat_content.items():
+                    if message in mismatched:
+                        message["message_id"] = message_id
+                _, changed = self.store.chat_index(chat_data, rebuild=True)
+                self._commit_chat_messages(configuration_data, chat_data, changed=mismatched + changed)
 
-        character_data["chats"][current_chat_id] = chat_data
-        configuration_data['character_list'][character_name] = character_data
+            return issues
 
-        self.save_configuration_edit(configuration_data)
+    def add_message_to_config(self, character_name, author_name, is_user, text, message_id):
+        """
+        Adds a new message to the chat content of a specific character in the configuration.
+        """
+        with self.store.lock:
+            configuration_data = self.load_configuration()
+            chat_data = self._get_current_chat(configuration_data, character_name)
+            if not chat_data:
+                return
+
+            chat_content = chat_data.setdefault("chat_content", {})
+            index, changed = self.store.chat_index(chat_data)
+
+            existing_entry = chat_content.get(message_id, {})
+            if existing_entry:
+                # Re-adding an existing message moves it to the end of the chat.
+                changed += index.remove([message_id])
+
+            sequence_number = len(index.order) + 1
+
+            new_message = {
+                "message_id": message_id,
+                "sequence_number": sequence_number,
+                "author_name": author_name,
+                "is_user": is_user,
+                "current_variant_id": "default",
+                "variants": [
+                    {
+                        "variant_id": "default",
+                        "text": text,
+                        "created_at": datetime.datetime.now().isoformat()
+                    }
+                ]
+            }
 
-        self.renumber_sequence_numbers(character_name)
-        self.update_chat_history(character_name)
+            for extra_key in ("image", "image_status", "image_prompt", "tts_audio", "attachments"):
+                if extra_key in existing_entry:
+                    new_message[extra_key] = existing_entry[extra_key]
+            
+            chat_content[message_id] = new_message
+            index.append(message_id)
+
+            self._commit_chat_messages(configuration_data, chat_data, changed=changed + [new_message])
 
     def regenerate_message_in_config(self, character_name, message_id, text):
         """
         Regenerates a message by adding a new variant to the same message_id.
         """
-        configuration_data = self.load_configuration()
-        character_data = configuration_data['character_list'].get(character_name)
+        with self.store.lock:
+            configuration_data = self.load_configuration()
+            character_data = configuration_data['character_list'].get(character_name)
 
-        if not character_data or "chats" not in character_data:
-            logger.error(f"Character '{character_name}' not found or has no chats.")
-            return
+            if not character_data or "chats" not in character_data:
+                logger.error(f"Character '{character_name}' not found or has no chats.")
+                return
 
-        current_chat_id = character_data.get("current_chat")
-        if not current_chat_id or current_chat_id not in character_data["chats"]:
-            logger.error(f"Current chat for '{character_name}' is invalid or missing.")
-            return
+            current_chat_id = character_data.get("current_chat")
+            if not current_chat_id or current_chat_id not in character_data["chats"]:
+                logger.error(f"Current chat for '{character_name}' is invalid or missing.")
+                return
 
-        chat_data = character_data["chats"][current_chat_id]
-        chat_content = chat_data.get("chat_content", {})
+            chat_data = character_data["chats"][current_chat_id]
+            chat_content = chat_data.get("chat_content", {})
 
-        msg = chat_content.get(message_id)
-        if not msg:
-            logger.error(f"Message with ID {message_id} not found.")
-            return
+            msg = chat_content.get(message_id)
+            if not msg:
+                logger.error(f"Message with ID {message_id} not found.")
+                return
 
-        variant_ids = [v["variant_id"] for v in msg.get("variants", [])]
-        regen_count = sum(1 for vid in variant_ids if vid.startswith("regen_"))
-        new_variant_id = f"regen_{regen_count}"
+            variant_ids = [v["variant_id"] for v in msg.get("variants", [])]
+            regen_count = sum(1 for vid in variant_ids if vid.startswith("regen_"))
+            new_variant_id = f"regen_{regen_count}"
 
-        msg["variants"].append({
-            "variant_id": new_variant_id,
-            "text": text
-        })
-
-        msg["current_variant_id"] = new_variant_id
+            msg["variants"].append({
+                "variant_id": new_variant_id,
+                "text": text
+            })
 
-        chat_content[message_id] = msg
-        chat_data["chat_content"] = chat_content
-        character_data["chats"][current_chat_id] = chat_data
-        configuration_data['character_list'][character_name] = character_data
+            msg["current_variant_id"] = new_variant_id
 
-        self.save_configuration_edit(configuration_data)
+            index, changed = self.store.chat_index(chat_data)
+            index.update(message_id)
 
-        self.renumber_sequence_numbers(character_name)
-        self.update_chat_history(character_name)
+            self._commit_chat_messages(configuration_data, chat_data, changed=changed + [msg])
 
     def edit_chat_message(self, message_id, character_name, edited_text):
         """
         Edits the text of an existing chat message (only the current variant) inside the currently selected chat of a character.
         """
         try:
-            configuration_data = self.load_configuration()
-            character_list = configuration_data.get("character_list", {})
-
-            if character_name not in character_list:
-                logger.error(f"Character {character_name} not found")
-                return False
-
-            char_data = character_list[character_name]
-
-            current_chat_id = char_data.get("current_chat")
-            if not current_chat_id or current_chat_id not in char_data["chats"]:
-                logger.error(f"Current chat for {character_name} is invalid or missing.")
-                return False
-
-            chat_data = char_data["chats"][current_chat_id]
-            chat_content = chat_data.get("chat_content", {})
-
-            if message_id not in chat_content:
-                logger.error(f"Message {message_id} not found")
-                return False
-
-            target = chat_content[message_id]
-            current_variant_id = target.get("current_variant_id", "default")
-            variants = target.get("variants", [])
-
-            updated = False
+            with self.store.lock:
+                configuration_data = self.load_configuration()
+                character_list = configuration_data.get("character_list", {})
+
+                if character_name not in character_list:
+                    logger.error(f"Character {character_name} not found")
+                    return False
+
+                char_data = character_list[character_name]
+
+                current_chat_id = char_data.get("current_chat")
+                if not current_chat_id or current_chat_id not in char_data["chats"]:
+                    logger.error(f"Current chat for {character_name} is invalid or missing.")
+                    return False
+
+                chat_data = char_data["chats"][current_chat_id]
+                chat_content = chat_data.get("chat_content", {})
+
+                if message_id not in chat_content:
+                    logger.error(f"Message {message_id} not found")
+                    return False
+
+                target = chat_content[message_id]
+                current_variant_id = target.get("current_variant_id", "default")
+                variants = target.get("variants", [])
+
+                updated = False
+
+                for variant in variants:
+                    if variant["variant_id"] == current_variant_id:
+                        variant["text"] = edited_text
+                        updated = True
+                        break
+
+                if not updated and variants:
+                    logger.warning(f"Current variant {current_variant_id} not found in variants. Creating new default variant.")
+                    variants.append({
+                        "variant_id": "default",
+                        "text": edited_text
+                    })
+                    target["variants"] = variants
+                    target["current_variant_id"] = "default"
+                    updated = True
 
-            for variant in variants:
-                if variant["variant_id"] == current_variant_id:
-                    variant["text"] = edited_text
+                if not variants:
+                    target["variants"] = [{
+                        "variant_id": "default",
+                        "text": edited_text
+                    }]
+                    target["current_variant_id"] = "default"
                     updated = True
-                    break
-
-            if not updated and variants:
-                logger.warning(f"Current variant {current_variant_id} not found in variants. Creating new default variant.")
-                variants.append({
-                    "variant_id": "default",
-                    "text": edited_text
-                })
-                target["variants"] = variants
-                target["current_variant_id"] = "default"
-                updated = True
-
-            if not variants:
-                target["variants"] = [{
-                    "variant_id": "default",
-                    "text": edited_text
-                }]
-                target["current_variant_id"] = "default"
-                updated = True
-
-            if not updated:
-                logger.warning(f"Failed to update message {message_id}")
-                return False
 
-            chat_content[message_id] = target
-            chat_data["chat_content"] = chat_content
-            char_data["chats"][current_chat_id] = chat_data
-            configuration_data["character_list"][character_name] = char_data
+                if not updated:
+                    logger.warning(f"Failed to update message {message_id}")
+                    return False
 
-            self.save_configuration_edit(configuration_data)
+                index, changed = self.store.chat_index(chat_data)
+                index.update(message_id)
 
-            self.renumber_sequence_numbers(character_name)
-            self.update_chat_history(character_name)
+                self._commit_chat_messages(configuration_data, chat_data, changed=changed + [target])
 
-            return True
+                return True
 
         except Exception as e:
             logger.error(f"Edit message error: {e}")
             traceback.print_exc()
             return False
+
+    def save_chat_message(self, character_name, chat_id, message_id):
+        """
+        Persists changes made in place to the attributes of a message (attachments, audio, images,
+        the selected variant) of one of a character's chats.
+        """
+        with self.store.lock:
+            configuration_data = self.load_configuration()
+            character_data = configuration_data.get("character_list", {}).get(character_name, {})
+            chat_data = character_data.get("chats", {}).get(chat_id)
+            if not chat_data:
+                return
+
+            message = chat_data.get("chat_content", {}).get(message_id)
+            if message is not None:
+                self._commit_chat_messages(configuration_data, chat_data, changed=[message])
     
     def delete_chat_message(self, message_id, character_name):
         """
         Deletes a message from the currently selected chat of a character.
         """
+        return self.delete_chat_messages(character_name, [message_id])
+    
+    def delete_chat_messages(self, character_name, message_ids):
+        """
+        Deletes multiple messages from the currently selected chat of a character.
+        """
         try:
-            configuration_data = self.load_configuration()
-            character_list = configuration_data.get("character_list", {})
+            with self.store.lock:
+                configuration_data = self.load_configuration()
+                character_list = configuration_data.get("character_list", {})
 
-            if character_name not in character_list:
-                logger.error(f"Character {character_name} not found")
-                return False
+                if character_name not in character_list:
+                    logger.error(f"Character {character_name} not found")
+                    return False
 
-            char_data = character_list[character_name]
+                char_data = character_list[character_name]
 
-            current_chat_id = char_data.get("current_chat")
-            if not current_chat_id or current_chat_id not in char_data["chats"]:
-                logger.error(f"Current chat for {character_name} is invalid or missing.")
-                return False
+                current_chat_id = char_data.get("current_chat")
+                if not current_chat_id or current_chat_id not in char_data["chats"]:
+                    logger.error(f"Current chat for {character_name} is invalid or missing.")
+                    return False
 
-            chat_data = char_data["chats"][current_chat_id]
-            chat_content = chat_data.get("chat_content", {})
-            
-            if message_id in chat_content:
-                del chat_content[message_id]
+                chat_data = char_data["chats"][current_chat_id]
+                chat_content = chat_data.get("chat_content", {})
+                index, changed = self.store.chat_index(chat_data)
+
+                deleted = []
+                for message_id in message_ids:
+                    if message_id in chat_content:
+                        del chat_content[message_id]
+                        deleted.append(message_id)
+
+                changed += index.remove(deleted)
+                changed = [message for message in changed if message.get("message_id") not in deleted]
+
+                self._commit_chat_messages(configuration_data, chat_data, changed=changed, deleted=deleted)
                 
-            chat_data["chat_content"] = chat_content
-            char_data["chats"][current_chat_id] = chat_data
-            configuration_data["character_list"][character_name] = char_data
-            
-            self.save_configuration_edit(configuration_data)
-            
-            self.renumber_sequence_numbers(character_name)
-            self.update_chat_history(character_name)
-            
-            return True
+                return True
         
         except Exception as e:
-            logger.error(f"Error deleting message: {e}")
+            logger.error(f"Error deleting messages: {e}")
             traceback.print_exc()
             return False
-    
-    def delete_chat_messages(self, character_name, message_ids):
+
+    def get_chat_messages(self, character_name, limit, before_sequence=None):
         """
-        Deletes multiple messages from the currently selected chat of a character.
+        Returns at most `limit` messages of the character's current chat preceding `before_sequence`
+        (or the latest ones), ordered by sequence number, without materializing the whole chat.
         """
-        try:
-            configuration_data = self.load_configuration()
-            character_list = configuration_data.get("character_list", {})
+        configuration_data = self.load_configuration()
+        character_data = configuration_data.get("character_list", {}).get(character_name)
+        if not character_data:
+            return []
 
-            if character_name not in character_list:
-                logger.error(f"Character {character_name} not found")
-                return False
+        chat_data = character_data.get("chats", {}).get(character_data.get("current_chat"))
+        if not chat_data:
+            return []
 
-            char_data = character_list[character_name]
+        storage_id = chat_data.get("storage_id")
+        if storage_id:
+            return self.store.messages.load_tail(storage_id, limit, before_sequence)
 
-            current_chat_id = char_data.get("current_chat")
-            if not current_chat_id or current_chat_id not in char_data["chats"]:
-                logger.error(f"Current chat for {character_name} is invalid or missing.")
-                return False
+        messages = sorted(chat_data.get("chat_content", {}).values(), key=lambda m: m.get("sequence_number", 0))
+        if before_sequence is not None:
+            messages = [m for m in messages if m.get("sequence_number", 0) < before_sequence]
+        return messages[-limit:] if limit else []
 
-            chat_data = char_data["chats"][current_chat_id]
-            chat_content = chat_data.get("chat_content", {})
+    def get_chat_page(self, character_name, limit, before_message_id=None, offset=0):
+        """
+        Returns one page of the character's current chat, read through the chat's ordered index.
 
-            for message_id in message_ids:
-                if message_id in chat_content:
-                    del chat_content[message_id]
+        The page ends right before `before_message_id` (the cursor returned with the previous page)
+        or, without a cursor, `offset` messages before the end of the chat. Only the messages of the
+        page are touched, so the cost does not depend on the length of the chat. Message ids are
+        used as cursors because sequence numbers shift when earlier messages are deleted.
 
-            chat_data["chat_content"] = chat_content
-            char_data["chats"][current_chat_id] = chat_data
-            configuration_data["character_list"][character_name] = char_data
+        Returns:
+            tuple: (messages ordered by sequence number, cursor of the older page or None).
+        """
+        with self.store.lock:
+            configuration_data = self.load_configuration()
+            chat_data = self._get_current_chat(configuration_data, character_name)
+            if not chat_data:
+                return [], None
+
+            index, changed = self.store.chat_index(chat_data)
+            if changed:
+                self._commit_chat_messages(configuration_data, chat_data, changed=changed)
+
+            if before_message_id is not None:
+                end = index.positions.get(before_message_id)
+                if end is None:
+                    # The cursor message was deleted; the client has to reload from the end.
+                    return [], None
+            else:
+                end = max(len(index.order) - max(offset, 0), 0)
 
-            self.save_configuration_edit(configuration_data)
-            
-            self.renumber_sequence_numbers(character_name)
-            self.update_chat_history(character_name)
-            
-            return True
-        
-        except Exception as e:
-            logger.error(f"Error deleting messages: {e}")
-            traceback.print_exc()
-            return False
+            start = max(end - max(limit, 0), 0)
+            page_ids = index.order[start:end]
+            page = [index.content[message_id] for message_id in page_ids]
+            return page, (page_ids[0] if page_ids and start > 0 else None)
     
     def create_new_chat(self, character_name, conversation_method, new_name, new_description, new_personality, new_scenario, new_first_message, new_example_messages, new_alternate_greetings, new_creator_notes, chat_name):
         """
@@ -839,30 +1730,7 @@ class ConfigurationCharacters():
             logger.error(f"Character '{character_name}' not found in the configuration.")
 
     def renumber_sequence_numbers(self, character_name, conversation_method=None):
-        config = self.load_configuration()
-        char_data = config["character_list"].get(character_name)
-        if not char_data:
-            return
-        
-        if conversation_method is None:
-            conversation_method = char_data.get("conversation_method")
-
-        chat_id = char_data.get("current_chat")
-        if not chat_id or "chats" not in char_data:
-            return
-        
-        chat_data = char_data["chats"][chat_id]
-        if not chat_data:
-            return
-        
-        chat_content = chat_data.get("chat_content", {})
-        sorted_messages = sorted(chat_content.items(), key=lambda x: x[1].get("sequence_number", float('inf')))
-
-        for idx, (msg_id, msg) in enumerate(sorted_messages):
-            msg["sequence_number"] = idx + 1
-
-        chat_data["chat_content"] = chat_content
-        char_data["chats"][chat_id] = chat_data
-        config["character_list"][character_name] = char_data
-
-        self.save_configuration_edit(config)
+        """
+        Renumbers the messages of a character's current chat to a contiguous 1..n sequence.
+        """
+        self.update_chat_history(character_name)
@@ -1423,8 +1423,9 @@ class CharacterAIAssistantDialog(QDialog):
         gen_kwargs.setdefault("max_tokens", 2200)
 
         full_text = ""
+        stream = provider.generate_stream(messages, **gen_kwargs)
         try:
-            async for chunk in provider.generate_stream(messages, **gen_kwargs):
+            async for chunk in stream:
                 if chunk:
                     full_text += chunk
                     self.stream_output.moveCursor(QtGui.QTextCursor.MoveOperation.End)
@@ -1436,6 +1437,8 @@ class CharacterAIAssistantDialog(QDialog):
             self.stream_output.append("\n\n" + err_text.replace("{error}", str(e)))
             self.btn_generate.setEnabled(True)
             return
+        finally:
+            await stream.aclose()
 
         self._generated_raw = full_text
         self.btn_generate.setEnabled(True)
@@ -8982,10 +8982,14 @@ class SummaryEditorDialog(QDialog):
                     old_text, new_messages_chunk, self.character_name, user_name
                 )
 
-                async for chunk in provider.generate_summary(summary_messages):
-                    self.summary_edit.insertPlainText(chunk)
-                    scrollbar = self.summary_edit.verticalScrollBar()
-                    scrollbar.setValue(scrollbar.maximum())
+                stream = provider.generate_summary(summary_messages, priority="foreground")
+                try:
+                    async for chunk in stream:
+                        self.summary_edit.insertPlainText(chunk)
+                        scrollbar = self.summary_edit.verticalScrollBar()
+                        scrollbar.setValue(scrollbar.maximum())
+                finally:
+                    await stream.aclose()
 
                 generation_successful = True
 
@@ -73,12 +73,15 @@ from app.utils.translator import Translator
 from app.utils.character_cards import CharactersCard, SoulGateway
 from app.utils.text_to_speech import AudioPlaybackWorker
 from app.utils.ambient_client import AmbientPlayer
+from app.utils.model_residency import ModelResidencyManager
 from app.utils.models_hub import (
     ModelSearch, ModelRecommendations, ModelPopular, 
     ModelInformation, ModelRepoFiles, FileSelectorDialog, FileDownloader, 
     ModelItemWidget, RecommendedModelItemWidget
 )
 from app.gui.sow_system_signals import Soul_Of_Waifu_System
+from app.gui.streaming_markdown import StreamingMarkdownRenderer
+from app.gui.stream_dispatcher import StreamDispatcher
 from app.configuration import configuration
 
 logger = logging.getLogger("Interface Signals")
@@ -181,6 +184,8 @@ class InterfaceSignals():
         self.chat_container.setSpacing(5)
 
         self.messages = {}
+        self._chat_appearance_cache = None
+        self._markdown_styles_cache = None
 
         self.pending_attachments = []
         self._attachment_preview_widgets = {}
@@ -431,6 +436,9 @@ class InterfaceSignals():
         self.animation_max.start()
 
     def get_chat_appearance(self):
+        if self._chat_appearance_cache is not None:
+            return dict(self._chat_appearance_cache)
+
         defaults = {
             "user_bubble_color": "#292929",
             "char_bubble_color": "#222222",
@@ -445,7 +453,29 @@ class InterfaceSignals():
             "max_width": 750,
         }
         saved = self.configuration_settings.get_main_setting("chat_appearance") or {}
-        return {**defaults, **saved}
+        self._chat_appearance_cache = {**defaults, **saved}
+        return dict(self._chat_appearance_cache)
+
+    def _invalidate_chat_appearance(self):
+        self._chat_appearance_cache = None
+        self._markdown_styles_cache = None
+
+    def _get_markdown_styles(self):
+        if self._markdown_styles_cache is None:
+            s = self.get_chat_appearance()
+            qc = s.get("quote_color", "#FFA500")
+            ic = s.get("italic_color", "#a3a3a3")
+            self._markdown_styles_cache = {
+                "qc": qc,
+                "ic": ic,
+                "cbg": s.get("code_bg_color", "#121318"),
+                "header_bg": s.get("code_header_bg", "#1c1e26"),
+                "border_color": s.get("code_border", "#2a2d3d"),
+                "text_color": s.get("code_text_color", "#e1e4ed"),
+                "quote_sub": rf'<span style="color: {qc};">"\1"</span>',
+                "italic_sub": rf'<i><span style="color: {ic};">\1</span></i>',
+            }
+        return self._markdown_styles_cache
 
     def _hex_to_rgba(self, hex_color, alpha_pct):
         h = hex_color.lstrip("#")
@@ -520,6 +550,7 @@ class InterfaceSignals():
         
     def on_reset_appearance(self):
         self.configuration_settings.update_main_setting("chat_appearance", {})
+        self._invalidate_chat_appearance()
         s = self.get_chat_appearance()
         wt = self.get_window_theme()
         u = self.get_ui_appearance()
@@ -528,6 +559,7 @@ class InterfaceSignals():
         
     def on_save_chat_appearance(self, s):
         self.configuration_settings.update_main_setting("chat_appearance", dict(s))
+        self._invalidate_chat_appearance()
 
     def get_window_theme(self):
         defaults = {
@@ -900,7 +932,7 @@ class InterfaceSignals():
 
     def update_lip_sync(self, value):
         if hasattr(self, 'web_bridge') and self.web_bridge:
-            asyncio.create_task(self.web_bridge.manager.broadcast({"type": "avatar_telemetry", "volume": value}))
+            self.web_bridge.manager.publish({"type": "avatar_telemetry", "volume": value})
 
         if not self.current_active_character:
             return
@@ -1430,7 +1462,7 @@ class InterfaceSignals():
             entry["attachments"] = attachments_meta
             chat_content_ref[message_id] = entry
 
-            self.configuration_characters.save_configuration_edit(config_data)
+            self.configuration_characters.save_chat_message(character_name, current_chat, message_id)
         except Exception as e:
             logger.error(f"Failed to persist attachments for message {message_id}: {e}")
 
@@ -1448,7 +1480,7 @@ class InterfaceSignals():
             entry["tts_audio"] = segments
             chat_content_ref[message_id] = entry
 
-            self.configuration_characters.save_configuration_edit(config_data)
+            self.configuration_characters.save_chat_message(character_name, current_chat, message_id)
         except Exception as e:
             logger.error(f"Failed to persist TTS audio for message {message_id}: {e}")
 
@@ -2234,8 +2266,12 @@ class InterfaceSignals():
                         {"role": "user", "content": text},
                     ]
                     result = ""
-                    async for chunk in provider.generate_stream(messages, temperature=0.2, max_tokens=600):
-                        result += chunk
+                    stream = provider.generate_stream(messages, temperature=0.2, max_tokens=600)
+                    try:
+                        async for chunk in stream:
+                            result += chunk
+                    finally:
+                        await stream.aclose()
                     return result.strip() or text
                 except Exception as e:
                     logger.warning(f"[SoulStage] _ss_translate_fn failed: {e}")
@@ -2850,6 +2886,28 @@ class InterfaceSignals():
         _plot_event_type: list = ["none"]
         narrator_bubble = narrator_wrap = char_label = npc_bubble = None
         char_full_text = npc_full_text = ""
+        char_renderer = StreamingMarkdownRenderer(
+            lambda text, think_start: self.markdown_to_html(text, think_index_start=think_start)
+        )
+
+        def flush_narrator(delta):
+            if narrator_bubble:
+                narrator_bubble.append_text(delta)
+                chat_view.scroll_to_bottom()
+
+        def flush_char(_delta):
+            if char_label:
+                char_label.setText(char_renderer.render(char_full_text))
+                chat_view.scroll_to_bottom()
+
+        def flush_npc(delta):
+            if npc_bubble:
+                npc_bubble.append_text(delta)
+                chat_view.scroll_to_bottom()
+
+        narrator_dispatcher = StreamDispatcher(flush_narrator, name="soul_stage_narrator")
+        char_dispatcher = StreamDispatcher(flush_char, name="soul_stage_char")
+        npc_dispatcher = StreamDispatcher(flush_npc, name="soul_stage_npc")
 
         async def on_narrator_chunk(chunk: str):
             nonlocal narrator_bubble, narrator_wrap
@@ -2867,12 +2925,12 @@ class InterfaceSignals():
                     def _get_idx(_i=_narr_idx):
                         return _i
                     self.ss_msg_mgr.attach_context_menu(narrator_wrap, narrator_bubble.text_label, _get_idx, is_player=False)
-            narrator_bubble.append_text(chunk)
-            chat_view.scroll_to_bottom()
+            narrator_dispatcher.push(chunk)
             await asyncio.sleep(0)
 
         async def on_narrator_done():
             nonlocal narrator_bubble, narrator_wrap
+            await narrator_dispatcher.flush()
             if narrator_bubble:
                 entry = {
                     "role": "narrator",
@@ -2887,6 +2945,7 @@ class InterfaceSignals():
         async def on_char_start(name: str, _avatar):
             nonlocal char_label, char_full_text
             char_full_text = ""
+            char_renderer.reset()
             _char_idx = len(chat_log) + len(turn_log)
             char_label, _ = self._ss_add_custom_message(name, "", is_user=False, msg_idx=_char_idx)
             await asyncio.sleep(0)
@@ -2895,11 +2954,14 @@ class InterfaceSignals():
             nonlocal char_label, char_full_text
             if char_label:
                 char_full_text += chunk
-                char_label.setText(self.markdown_to_html(char_full_text))
-                chat_view.scroll_to_bottom()
+                char_dispatcher.push(chunk)
             await asyncio.sleep(0)
 
         async def on_char_done(name: str, full_text: str):
+            await char_dispatcher.flush()
+            if char_label:
+                char_label.setText(char_renderer.render(char_full_text))
+                chat_view.scroll_to_bottom()
             turn_log.append({"role": "char", "content": full_text, "actor_name": name})
 
         async def on_npc_start(npc, avatar_path: str):
@@ -2924,11 +2986,11 @@ class InterfaceSignals():
             nonlocal npc_bubble, npc_full_text
             if npc_bubble:
                 npc_full_text += chunk
-                npc_bubble.append_text(chunk)
-                chat_view.scroll_to_bottom()
+                npc_dispatcher.push(chunk)
             await asyncio.sleep(0)
 
         async def on_npc_done(name: str, full_text: str):
+            await npc_dispatcher.flush()
             npc_obj = session.orchestrator.npc_registry.get(name)
             arch = npc_obj.archetype if npc_obj else "citizen"
             turn_log.append({"role": "npc", "content": full_text, "actor_name": name, "archetype": arch})
@@ -2992,8 +3054,13 @@ class InterfaceSignals():
 
                 gen_kwargs = self._get_gen_kwargs(c_method)
 
-                async for chunk in provider.generate_stream(messages, **gen_kwargs):
-                    yield chunk
+                stream = provider.generate_stream(messages, **gen_kwargs)
+                try:
+                    async for chunk in stream:
+                        yield chunk
+                finally:
+                    # Releases the local server slot even when the consumer stops early.
+                    await stream.aclose()
 
             return stream_wrapper()
         
@@ -3011,6 +3078,8 @@ class InterfaceSignals():
             on_turn_complete=on_turn_complete, on_error=on_error, on_choices=on_choices,
             on_dice_roll=on_dice_roll
         )
+        for dispatcher in (narrator_dispatcher, char_dispatcher, npc_dispatcher):
+            await dispatcher.aclose()
 
         full_chat_log = []
         if self._soul_stage_scene_id:
@@ -3023,10 +3092,8 @@ class InterfaceSignals():
                 _save_scenes(d)
                 full_chat_log = d["scenes"][self._soul_stage_scene_id].get("chat_log", [])
 
-        asyncio.create_task(
-            session.orchestrator.sync_party_memory(
-                session.conversation_method, session.party_names, full_chat_log, user_name
-            )
+        session.orchestrator.schedule_party_memory_sync(
+            session.conversation_method, session.party_names, full_chat_log, user_name
         )
 
     def _ss_restore_chat(self, chat_log: list):
@@ -3433,6 +3500,28 @@ class InterfaceSignals():
         
         narrator_bubble = narrator_wrap = char_label = npc_bubble = None
         char_full_text = npc_full_text = ""
+        char_renderer = StreamingMarkdownRenderer(
+            lambda text, think_start: self.markdown_to_html(text, think_index_start=think_start)
+        )
+
+        def flush_narrator(delta):
+            if narrator_bubble:
+                narrator_bubble.append_text(delta)
+                chat_view.scroll_to_bottom()
+
+        def flush_char(_delta):
+            if char_label:
+                char_label.setText(char_renderer.render(char_full_text))
+                chat_view.scroll_to_bottom()
+
+        def flush_npc(delta):
+            if npc_bubble:
+                npc_bubble.append_text(delta)
+                chat_view.scroll_to_bottom()
+
+        narrator_dispatcher = StreamDispatcher(flush_narrator, name="soul_stage_narrator")
+        char_dispatcher = StreamDispatcher(flush_char, name="soul_stage_char")
+        npc_dispatcher = StreamDispatcher(flush_npc, name="soul_stage_npc")
         char_name_saved = None
 
         from app.gui.soul_stage_page import SoulStageEventCard, SoulStageNPCBubble, _save_scenes, _load_scenes
@@ -3453,12 +3542,12 @@ class InterfaceSignals():
                     def _get_idx(_i=_narr_idx):
                         return _i
                     self.ss_msg_mgr.attach_context_menu(narrator_wrap, narrator_bubble.text_label, _get_idx, is_player=False)
-            narrator_bubble.append_text(chunk)
-            chat_view.scroll_to_bottom()
+            narrator_dispatcher.push(chunk)
             await asyncio.sleep(0)
 
         async def on_narrator_done():
             nonlocal narrator_bubble, narrator_wrap
+            await narrator_dispatcher.flush()
             if narrator_bubble:
                 entry = {"role": "narrator", "content": narrator_bubble.text_label.text(), "actor_name": "NARRATOR"}
                 if pending_dice[0] is not None:
@@ -3469,6 +3558,7 @@ class InterfaceSignals():
         async def on_char_start(name: str, _avatar):
             nonlocal char_label, char_name_saved, char_full_text
             char_full_text = ""; char_name_saved = name
+            char_renderer.reset()
             _char_idx = len(chat_log) + len(turn_log)
             char_label, _ = self._ss_add_custom_message(name, "", is_user=False, msg_idx=_char_idx)
             await asyncio.sleep(0)
@@ -3477,11 +3567,14 @@ class InterfaceSignals():
             nonlocal char_label, char_full_text
             if char_label:
                 char_full_text += chunk
-                char_label.setText(self.markdown_to_html(char_full_text))
-                chat_view.scroll_to_bottom()
+                char_dispatcher.push(chunk)
             await asyncio.sleep(0)
 
         async def on_char_done(name: str, full_text: str):
+            await char_dispatcher.flush()
+            if char_label:
+                char_label.setText(char_renderer.render(char_full_text))
+                chat_view.scroll_to_bottom()
             turn_log.append({"role": "char", "content": full_text, "actor_name": name})
 
         async def on_npc_start(npc, avatar_path: str):
@@ -3505,10 +3598,12 @@ class InterfaceSignals():
         async def on_npc_chunk(name: str, chunk: str):
             nonlocal npc_bubble, npc_full_text
             if npc_bubble:
-                npc_full_text += chunk; npc_bubble.append_text(chunk); chat_view.scroll_to_bottom()
+                npc_full_text += chunk
+                npc_dispatcher.push(chunk)
             await asyncio.sleep(0)
 
         async def on_npc_done(name: str, full_text: str):
+            await npc_dispatcher.flush()
             npc_obj = session.orchestrator.npc_registry.get(name)
             arch = npc_obj.archetype if npc_obj else "citizen"
             turn_log.append({"role": "npc", "content": full_text, "actor_name": name, "archetype": arch})
@@ -3565,8 +3660,13 @@ class InterfaceSignals():
 
                 gen_kwargs = self._get_gen_kwargs(c_method)
 
-                async for chunk in provider.generate_stream(messages, **gen_kwargs):
-                    yield chunk
+                stream = provider.generate_stream(messages, **gen_kwargs)
+                try:
+                    async for chunk in stream:
+                        yield chunk
+                finally:
+                    # Releases the local server slot even when the consumer stops early.
+                    await stream.aclose()
 
             return stream_wrapper()
      
@@ -3594,6 +3694,8 @@ class InterfaceSignals():
             manual_next_actor=manual_next_actor,
             private_recipient=private_recipient,
         )
+        for dispatcher in (narrator_dispatcher, char_dispatcher, npc_dispatcher):
+            await dispatcher.aclose()
 
         full_chat_log = []
         if self._soul_stage_scene_id:
@@ -3606,9 +3708,9 @@ class InterfaceSignals():
                 _save_scenes(d)
                 full_chat_log = d["scenes"][self._soul_stage_scene_id].get("chat_log", [])
 
-        asyncio.create_task(session.orchestrator.sync_party_memory(
+        session.orchestrator.schedule_party_memory_sync(
             session.conversation_method, session.party_names, full_chat_log, user_name
-        ))
+        )
 
     def _soul_stage_interrupt(self):
         if self.soul_stage_session and self.soul_stage_session.orchestrator.is_running:
@@ -13461,9 +13563,9 @@ class InterfaceSignals():
         self.message_order = []
 
         self._chat_chunk_size = 30
-        self._chat_loaded_count = 0
+        self._chat_oldest_sequence = None
+        self._chat_has_older = False
         self._chat_is_loading_history = False
-        self._chat_all_messages = []
         
         scrollbar = self.ui.scrollArea_chat.verticalScrollBar()
         try:
@@ -15040,9 +15142,11 @@ class InterfaceSignals():
                     if c_text.strip():
                         context_messages.append({"role": "assistant", "content": c_text.strip()})
 
-            messages, activated_lorebook_entries = self.prompt_engine.build_system_prompt_blocks(
+            cache_aware = self.prompt_engine.is_prompt_cache_enabled(conversation_method)
+            messages, activated_lorebook_entries = await self.prompt_engine.build_system_prompt_blocks_async(
                 character_name, user_name, user_description, context_messages, llm_user_text,
-                image_attachments=image_attachments_b64 or None, provider_style=provider_style
+                image_attachments=image_attachments_b64 or None, provider_style=provider_style,
+                cache_aware=cache_aware
             )
 
             provider = AIFactory.get_provider(conversation_method)
@@ -15053,116 +15157,141 @@ class InterfaceSignals():
                 messages = await self.run_tool_loop(provider, messages, character_name, user_name)
 
             gen_kwargs = self._get_gen_kwargs(conversation_method)
+            if cache_aware:
+                gen_kwargs["cache_key"] = f"{character_name}/{current_chat}"
             generator = provider.generate_stream(messages, **gen_kwargs)
 
-            try:
-                sentence_buffer_chat = ""
-                _tts_active = current_text_to_speech not in ("Nothing", None) and not discord_context
-                _state_tag_started = False
-                _in_reasoning = False
-                _reasoning_scan_buffer = ""
-
-                async for chunk in generator:
-                    if self.abort_generation: 
-                        break
-                    if chunk:
-                        delta = chunk
-                        if full_text and chunk.startswith(full_text):
-                            delta = chunk[len(full_text):]
-                        
-                        if not delta:
-                            continue
-
-                        full_text += delta
-
-                        if not first_chunk_received:
-                            probe_text = full_text
-                            if probe_text.startswith(f"{character_name}:"):
-                                probe_text = probe_text[len(f"{character_name}:"):].lstrip()
-                            visible_probe, _ = extract_reasoning(probe_text)
+            stream_renderer = StreamingMarkdownRenderer(
+                lambda text, think_start: self.apply_macros(
+                    self.markdown_to_html(text, think_index_start=think_start), character_name, user_name
+                )
+            )
 
-                            if not visible_probe.strip():
-                                if getattr(self, "web_bridge", None):
-                                    asyncio.create_task(self.web_bridge.broadcast_chunk(delta))
-                                await asyncio.sleep(0.005)
-                                continue
+            sentence_buffer_chat = ""
+            _tts_active = current_text_to_speech not in ("Nothing", None) and not discord_context
+            _state_tag_started = False
+            _in_reasoning = False
+            _reasoning_scan_buffer = ""
+            web_message_started = False
+
+            async def flush_stream(delta):
+                nonlocal first_chunk_received, character_answer_container, character_answer_label
+                nonlocal sentence_buffer_chat, _state_tag_started, _in_reasoning, _reasoning_scan_buffer
+                nonlocal web_message_started
+
+                # Chunks are queued synchronously, so message_start has to be queued the same way
+                # before the first of them (reasoning included) to keep the web client's order.
+                if not web_message_started and getattr(self, "web_bridge", None):
+                    self.web_bridge.publish_message_start()
+                    web_message_started = True
+
+                if not first_chunk_received:
+                    probe_text = full_text
+                    if probe_text.startswith(f"{character_name}:"):
+                        probe_text = probe_text[len(f"{character_name}:"):].lstrip()
+                    visible_probe, _ = extract_reasoning(probe_text)
+
+                    if not visible_probe.strip():
+                        if getattr(self, "web_bridge", None):
+                            self.web_bridge.publish_chunk(delta)
+                        return
+
+                    if typing_widget: 
+                        try:
+                            typing_widget.deleteLater()
+                            self.chat_container.removeWidget(typing_widget)
+                        except: 
+                            pass
+                    
+                    character_answer_container = await self.add_message(character_name, "", is_user=False, message_id=None)
+                    character_answer_label = character_answer_container["label"]
+                    first_chunk_received = True
 
-                            if typing_widget: 
-                                try:
-                                    typing_widget.deleteLater()
-                                    self.chat_container.removeWidget(typing_widget)
-                                except: 
-                                    pass
-                            
-                            character_answer_container = await self.add_message(character_name, "", is_user=False, message_id=None)
-                            character_answer_label = character_answer_container["label"]
-                            first_chunk_received = True
-                            
-                            if getattr(self, "web_bridge", None): 
-                                asyncio.create_task(self.web_bridge.broadcast_message_start())
+                    # Earlier batches were reasoning only; the speech splitter starts from the visible text.
+                    tts_delta = visible_probe
+                else:
+                    tts_delta = delta
 
-                        clean_partial_text = full_text
-                        if clean_partial_text.startswith(f"{character_name}:"):
-                            clean_partial_text = clean_partial_text[len(f"{character_name}:"):].lstrip()
+                clean_partial_text = full_text
+                if clean_partial_text.startswith(f"{character_name}:"):
+                    clean_partial_text = clean_partial_text[len(f"{character_name}:"):].lstrip()
 
-                        clean_partial_text = strip_partial_state_tag(clean_partial_text)
+                clean_partial_text = strip_partial_state_tag(clean_partial_text)
 
-                        processed_html = self.markdown_to_html(clean_partial_text)
-                        processed_html = self.apply_macros(processed_html, character_name, user_name)
-                        character_answer_label.setText(processed_html)
+                character_answer_label.setText(stream_renderer.render(clean_partial_text))
 
-                        scrollbar = self.ui.scrollArea_chat.verticalScrollBar()
-                        scrollbar.setValue(scrollbar.maximum())
-                        
-                        if getattr(self, "web_bridge", None): 
-                            asyncio.create_task(self.web_bridge.broadcast_chunk(delta))
-
-                        if _tts_active:
-                            if not _state_tag_started:
-                                if _in_reasoning:
-                                    _reasoning_scan_buffer += delta
-                                    close_span = find_reasoning_close(_reasoning_scan_buffer)
-                                    if close_span:
-                                        _in_reasoning = False
-                                        sentence_buffer_chat += _reasoning_scan_buffer[close_span[1]:]
-                                        _reasoning_scan_buffer = ""
+                scrollbar = self.ui.scrollArea_chat.verticalScrollBar()
+                scrollbar.setValue(scrollbar.maximum())
+                
+                if getattr(self, "web_bridge", None): 
+                    self.web_bridge.publish_chunk(delta)
+
+                if _tts_active:
+                    if not _state_tag_started:
+                        if _in_reasoning:
+                            _reasoning_scan_buffer += tts_delta
+                            close_span = find_reasoning_close(_reasoning_scan_buffer)
+                            if close_span:
+                                _in_reasoning = False
+                                sentence_buffer_chat += _reasoning_scan_buffer[close_span[1]:]
+                                _reasoning_scan_buffer = ""
+                        else:
+                            probe = sentence_buffer_chat + tts_delta
+                            open_span = find_reasoning_open(probe)
+                            if open_span:
+                                _in_reasoning = True
+                                sentence_buffer_chat = probe[:open_span[0]]
+                                _reasoning_scan_buffer = probe[open_span[1]:]
+                                close_span = find_reasoning_close(_reasoning_scan_buffer)
+                                if close_span:
+                                    _in_reasoning = False
+                                    sentence_buffer_chat += _reasoning_scan_buffer[close_span[1]:]
+                                    _reasoning_scan_buffer = ""
+                            else:
+                                stripped_check = strip_partial_state_tag(probe)
+                                if len(stripped_check) < len(probe):
+                                    _state_tag_started = True
+                                    sentence_buffer_chat = stripped_check
                                 else:
-                                    probe = sentence_buffer_chat + delta
-                                    open_span = find_reasoning_open(probe)
-                                    if open_span:
-                                        _in_reasoning = True
-                                        sentence_buffer_chat = probe[:open_span[0]]
-                                        _reasoning_scan_buffer = probe[open_span[1]:]
-                                        close_span = find_reasoning_close(_reasoning_scan_buffer)
-                                        if close_span:
-                                            _in_reasoning = False
-                                            sentence_buffer_chat += _reasoning_scan_buffer[close_span[1]:]
-                                            _reasoning_scan_buffer = ""
-                                    else:
-                                        stripped_check = strip_partial_state_tag(probe)
-                                        if len(stripped_check) < len(probe):
-                                            _state_tag_started = True
-                                            sentence_buffer_chat = stripped_check
-                                        else:
-                                            sentence_buffer_chat = probe
-                            while not _state_tag_started and not _in_reasoning:
-                                match = re.search(r'([.!?\n]+["”’\'»*_]*)', sentence_buffer_chat)
-                                if not match:
-                                    break
-                                
-                                split_idx = match.end()
-                                sentence = sentence_buffer_chat[:split_idx].strip()
+                                    sentence_buffer_chat = probe
+                    while not _state_tag_started and not _in_reasoning:
+                        match = re.search(r'([.!?\n]+["”’\'»*_]*)', sentence_buffer_chat)
+                        if not match:
+                            break
+                        
+                        split_idx = match.end()
+                        sentence = sentence_buffer_chat[:split_idx].strip()
+                        
+                        if len(sentence) > 3:
+                            if hasattr(self, 'chat_tts_worker') and self.chat_tts_worker:
+                                self.chat_tts_worker.add_text(
+                                    sentence,
+                                    message_id=character_answer_container["message_id"] if character_answer_container else None
+                                )
                                 
-                                if len(sentence) > 3:
-                                    if hasattr(self, 'chat_tts_worker') and self.chat_tts_worker:
-                                        self.chat_tts_worker.add_text(
-                                            sentence,
-                                            message_id=character_answer_container["message_id"] if character_answer_container else None
-                                        )
-                                        
-                                sentence_buffer_chat = sentence_buffer_chat[split_idx:]
+                        sentence_buffer_chat = sentence_buffer_chat[split_idx:]
 
-                        await asyncio.sleep(0.005)
+            stream_dispatcher = StreamDispatcher(flush_stream, name="chat")
+
+            try:
+                try:
+                    async for chunk in generator:
+                        if self.abort_generation: 
+                            break
+                        if chunk:
+                            delta = chunk
+                            if full_text and chunk.startswith(full_text):
+                                delta = chunk[len(full_text):]
+                            
+                            if not delta:
+                                continue
+
+                            full_text += delta
+                            stream_dispatcher.push(delta)
+                finally:
+                    # An aborted stream must give its local server slot back right away.
+                    await generator.aclose()
+                    await stream_dispatcher.aclose()
 
                 if _tts_active and sentence_buffer_chat.strip():
                     raw_tail = sentence_buffer_chat.strip()
@@ -15305,7 +15434,7 @@ class InterfaceSignals():
                         await discord_context.channel.send(chunk)
                         
             if getattr(self, "web_bridge", None):
-                asyncio.create_task(self.web_bridge.broadcast_message_end())
+                self.web_bridge.publish_message_end()
                     
         except Exception:
             import traceback
@@ -15443,9 +15572,11 @@ class InterfaceSignals():
                 if c_text.strip():
                     context_messages.append({"role": "assistant", "content": c_text.strip()})
 
-        messages, activated_lorebook_entries = self.prompt_engine.build_system_prompt_blocks(
+        cache_aware = self.prompt_engine.is_prompt_cache_enabled(conversation_method)
+        messages, activated_lorebook_entries = await self.prompt_engine.build_system_prompt_blocks_async(
             character_name, user_name, user_description, context_messages, llm_user_text,
-            image_attachments=image_attachments_b64 or None, provider_style=provider_style
+            image_attachments=image_attachments_b64 or None, provider_style=provider_style,
+            cache_aware=cache_aware
         )
 
         provider = AIFactory.get_provider(conversation_method)
@@ -15454,46 +15585,58 @@ class InterfaceSignals():
                 messages = await self.run_tool_loop(provider, messages, character_name, user_name)
 
             gen_kwargs = self._get_gen_kwargs(conversation_method)
+            if cache_aware:
+                gen_kwargs["cache_key"] = f"{character_name}/{current_chat}"
             generator = provider.generate_stream(messages, **gen_kwargs)
+            stream_renderer = StreamingMarkdownRenderer(
+                lambda text, think_start: self.apply_macros(
+                    self.markdown_to_html(text, think_index_start=think_start), character_name, user_name
+                )
+            )
 
-            async for chunk in generator:
-                if chunk:
-                    full_text += chunk
-
-                    if not first_chunk_received:
-                        probe_text = full_text
-                        if probe_text.startswith(f"{character_name}:"):
-                            probe_text = probe_text[len(f"{character_name}:"):].lstrip()
-                        visible_probe, _ = extract_reasoning(probe_text)
-
-                        if not visible_probe.strip():
-                            await asyncio.sleep(0.005)
-                            continue
-
-                        if typing_widget:
-                            try:
-                                typing_widget.deleteLater()
-                                self.chat_container.removeWidget(typing_widget)
-                            except Exception:
-                                pass
-                        
-                        character_answer_frame.show()
-                        character_answer_label.setText("")
-                        first_chunk_received = True
+            def flush_stream(_delta):
+                nonlocal first_chunk_received
+
+                if not first_chunk_received:
+                    probe_text = full_text
+                    if probe_text.startswith(f"{character_name}:"):
+                        probe_text = probe_text[len(f"{character_name}:"):].lstrip()
+                    visible_probe, _ = extract_reasoning(probe_text)
+
+                    if not visible_probe.strip():
+                        return
+
+                    if typing_widget:
+                        try:
+                            typing_widget.deleteLater()
+                            self.chat_container.removeWidget(typing_widget)
+                        except Exception:
+                            pass
+                    
+                    character_answer_frame.show()
+                    character_answer_label.setText("")
+                    first_chunk_received = True
+
+                clean_partial_text = full_text
+                if clean_partial_text.startswith(f"{character_name}:"):
+                    clean_partial_text = clean_partial_text[len(f"{character_name}:"):].lstrip()
 
-                    clean_partial_text = full_text
-                    if clean_partial_text.startswith(f"{character_name}:"):
-                        clean_partial_text = clean_partial_text[len(f"{character_name}:"):].lstrip()
+                clean_partial_text = strip_partial_state_tag(clean_partial_text)
 
-                    clean_partial_text = strip_partial_state_tag(clean_partial_text)
+                character_answer_label.setText(stream_renderer.render(clean_partial_text))
 
-                    processed_html = self.markdown_to_html(clean_partial_text)
-                    processed_html = self.apply_macros(processed_html, character_name, user_name)
-                    character_answer_label.setText(processed_html)
+                scrollbar = self.ui.scrollArea_chat.verticalScrollBar()
+                scrollbar.setValue(scrollbar.maximum())
 
-                    scrollbar = self.ui.scrollArea_chat.verticalScrollBar()
-                    scrollbar.setValue(scrollbar.maximum())
-                    await asyncio.sleep(0.01)
+            stream_dispatcher = StreamDispatcher(flush_stream, name="regenerate")
+            try:
+                async for chunk in generator:
+                    if chunk:
+                        full_text += chunk
+                        stream_dispatcher.push(chunk)
+            finally:
+                await generator.aclose()
+                await stream_dispatcher.aclose()
 
         if not first_chunk_received and 'typing_widget' in locals() and typing_widget:
             try:
@@ -15643,8 +15786,12 @@ class InterfaceSignals():
 
             gen_kwargs = self._get_gen_kwargs(conversation_method)
 
-            async for chunk in provider.generate_summary(summary_messages, **gen_kwargs):
-                full_new_summary += chunk
+            stream = provider.generate_summary(summary_messages, **gen_kwargs)
+            try:
+                async for chunk in stream:
+                    full_new_summary += chunk
+            finally:
+                await stream.aclose()
 
             if full_new_summary and len(full_new_summary) > 50:
                 chat_data["summary_text"] = full_new_summary.strip()
@@ -16252,6 +16399,7 @@ class InterfaceSignals():
             translate_action = QAction(self.translations.get("msg_action_translate", "Translate"), None)
             image_gen_action = QAction(self.translations.get("msg_action_generate_image", "Generate Image"), None)
             replay_voice_action = QAction(self.translations.get("msg_action_replay_voice", "Play voice message"), None)
+            check_chat_action = QAction(self.translations.get("msg_action_check_chat", "Check chat consistency"), None)
 
             edit_icon = QtGui.QIcon("app/gui/icons/edit.png")
             delete_icon = QtGui.QIcon("app/gui/icons/delete.png")
@@ -16268,6 +16416,7 @@ class InterfaceSignals():
             translate_action.setIcon(translate_icon)
             image_gen_action.setIcon(image_gen_icon)
             replay_voice_action.setIcon(replay_voice_icon)
+            check_chat_action.setIcon(regenerate_icon)
 
             try:
                 delete_action.triggered.disconnect()
@@ -16277,6 +16426,7 @@ class InterfaceSignals():
                 translate_action.triggered.disconnect()
                 image_gen_action.triggered.disconnect()
                 replay_voice_action.triggered.disconnect()
+                check_chat_action.triggered.disconnect()
             except TypeError:
                 pass
 
@@ -16325,6 +16475,11 @@ class InterfaceSignals():
                             )
                         )
                         menu.addAction(translate_action)
+
+            check_chat_action.triggered.connect(lambda: asyncio.create_task(self.check_chat_consistency(character_name)))
+            menu.addSeparator()
+            menu.addAction(check_chat_action)
+
             pos = button.mapToGlobal(QtCore.QPoint(button.width() - 30, button.height() + 2))
             def _start_fade():
                 anim_timer = QtCore.QTimer(menu)
@@ -16486,9 +16641,7 @@ class InterfaceSignals():
 
             msg_data["image_status"] = "generating"
             chat_content[message_id] = msg_data
-            config_data = self.configuration_characters.load_configuration()
-            config_data["character_list"][character_name]["chats"][current_chat]["chat_content"] = chat_content
-            self.configuration_characters.save_configuration_edit(config_data)
+            self.configuration_characters.save_chat_message(character_name, current_chat, message_id)
             await self.render_messages(character_name)
 
             if retry_prompt:
@@ -16590,10 +16743,7 @@ Image prompt:"""
                 msg_data["image_prompt"] = img_prompt_text
                 msg_data.pop("image_status", None)
                 
-                config_data = self.configuration_characters.load_configuration()
-                config_data["character_list"][character_name]["chats"][current_chat]["chat_content"] = chat_content
-
-                self.configuration_characters.save_configuration_edit(config_data)
+                self.configuration_characters.save_chat_message(character_name, current_chat, message_id)
                 
                 await self.render_messages(character_name)
             else:
@@ -16623,9 +16773,7 @@ Image prompt:"""
         try:
             msg_data["image_status"] = "failed"
             chat_content[message_id] = msg_data
-            config_data = self.configuration_characters.load_configuration()
-            config_data["character_list"][character_name]["chats"][current_chat]["chat_content"] = chat_content
-            self.configuration_characters.save_configuration_edit(config_data)
+            self.configuration_characters.save_chat_message(character_name, current_chat, message_id)
             await self.render_messages(character_name)
         except Exception as e:
             logger.error(f"Failed to mark image generation as failed for {message_id}: {e}")
@@ -16657,7 +16805,7 @@ Image prompt:"""
                 logger.error(f"LLM Translation failed: Provider '{conversation_method}' not found.")
                 return text_to_translate
 
-            translated_result = await self.prompt_engine._memory_llm_call(provider, messages)
+            translated_result = await self.prompt_engine._memory_llm_call(provider, messages, priority="foreground")
 
             if not translated_result:
                 return text_to_translate
@@ -16689,6 +16837,30 @@ Image prompt:"""
             logger.error(f"LLM Translation failed for method {conversation_method}: {e}")
             return text_to_translate
 
+    async def check_chat_consistency(self, character_name):
+        """
+        Checks the sequence numbers and chat history of the current chat against its messages,
+        repairs them if they drifted and re-renders the chat.
+        """
+        try:
+            issues = self.configuration_characters.check_chat_consistency(character_name)
+        except Exception as e:
+            logger.error(f"Error checking chat consistency: {e}")
+            return
+
+        if issues:
+            await self.first_render_messages(character_name)
+            text = self.translations.get("toast_chat_check_repaired", "Fixed {count} problem(s) in this chat.").format(count=len(issues))
+        else:
+            text = self.translations.get("toast_chat_check_ok", "No problems found in this chat.")
+
+        sow_toast(
+            parent=self.main_window,
+            title=self.translations.get("toast_chat_check_title", "Chat check"),
+            text=text,
+            msg_type="success"
+        )
+
     async def delete_message(self, character_name, conversation_method, message_id):
         """
         Deletes a message from the interface and the configuration file.
@@ -16849,8 +17021,6 @@ Image prompt:"""
                 character_name=character_name,
                 edited_text=new_text
             )
-                
-            self.configuration_characters.update_chat_history(character_name)
             
         except Exception as e:
             logger.error(f"Error saving inline edit: {e}")
@@ -17055,18 +17225,17 @@ Image prompt:"""
             pass
         label.linkActivated.connect(_on_link)
 
-    def markdown_to_html(self, text, expanded_think_ids=None):
+    def markdown_to_html(self, text, expanded_think_ids=None, think_index_start=0):
         import html
 
         expanded_think_ids = expanded_think_ids or set()
 
-        s = self.get_chat_appearance()
-        qc = s.get("quote_color", "#FFA500")
-        ic = s.get("italic_color", "#a3a3a3")
-        cbg = s.get("code_bg_color", "#121318")
-        header_bg = s.get("code_header_bg", "#1c1e26")
-        border_color = s.get("code_border", "#2a2d3d")
-        text_color = s.get("code_text_color", "#e1e4ed")
+        styles = self._get_markdown_styles()
+        qc = styles["qc"]
+        cbg = styles["cbg"]
+        header_bg = styles["header_bg"]
+        border_color = styles["border_color"]
+        text_color = styles["text_color"]
 
         code_blocks = []
         inline_blocks = []
@@ -17115,7 +17284,7 @@ Image prompt:"""
 
             escaped_thought = html.escape(think_content).replace("\n", "<br>")
 
-            block_idx = len(think_blocks)
+            block_idx = think_index_start + len(think_blocks)
             is_expanded = block_idx in expanded_think_ids
             toggle_hint = self.translations.get("thinking_hide_hint", "hide") if is_expanded else self.translations.get("thinking_show_hint", "show")
             arrow = "▾" if is_expanded else "▸"
@@ -17159,14 +17328,14 @@ Image prompt:"""
 
         text = re.sub(_REASONING_TAG_HTML_OPEN_ONLY_RE, replace_think_block, text, flags=re.DOTALL | re.IGNORECASE)
 
-        text = re.sub(r'"(.*?)"', rf'<span style="color: {qc};">"\1"</span>', text)
-        text = re.sub(r'“(.*?)”', rf'<span style="color: {qc};">"\1"</span>', text)
+        text = re.sub(r'"(.*?)"', styles["quote_sub"], text)
+        text = re.sub(r'“(.*?)”', styles["quote_sub"], text)
 
         text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
         text = re.sub(r'__(.*?)__', r'<b>\1</b>', text)
 
-        text = re.sub(r'\*(.*?)\*', rf'<i><span style="color: {ic};">\1</span></i>', text)
-        text = re.sub(r'_(.*?)_', rf'<i><span style="color: {ic};">\1</span></i>', text)
+        text = re.sub(r'\*(.*?)\*', styles["italic_sub"], text)
+        text = re.sub(r'_(.*?)_', styles["italic_sub"], text)
 
         text = re.sub(r'^#\s+(.*)$', r'<h1>\1</h1>', text, flags=re.MULTILINE)
         text = re.sub(r'^##\s+(.*)$', r'<h2>\1</h2>', text, flags=re.MULTILINE)
@@ -17338,10 +17507,7 @@ Image prompt:"""
             return
 
         chat_content[last_key]["current_variant_id"] = new_variant["variant_id"]
-        chats[current_chat]["chat_content"] = chat_content
-        
-        config["character_list"][character_name] = character_information
-        self.configuration_characters.save_configuration_edit(config)
+        self.configuration_characters.save_chat_message(character_name, current_chat, last_key)
 
         message_id = last_key
         if message_id not in self.messages:
@@ -17454,14 +17620,17 @@ Image prompt:"""
 
         return text
 
+    def _set_chat_history_cursor(self, chunk):
+        if chunk:
+            self._chat_oldest_sequence = chunk[0].get("sequence_number")
+        self._chat_has_older = len(chunk) == self._chat_chunk_size and self._chat_oldest_sequence is not None
+
     def _on_chat_scroll(self, value):
         if getattr(self, '_chat_is_loading_history', False) or getattr(self, '_is_chat_rendering', False):
             return
 
-        if value <= 50:
-            if hasattr(self, '_chat_loaded_count') and hasattr(self, '_chat_all_messages'):
-                if self._chat_loaded_count < len(self._chat_all_messages):
-                    asyncio.create_task(self._load_older_messages())
+        if value <= 50 and getattr(self, '_chat_has_older', False):
+            asyncio.create_task(self._load_older_messages())
 
     async def _load_older_messages(self):
         self._chat_is_loading_history = True
@@ -17472,17 +17641,16 @@ Image prompt:"""
         
         self.chat_widget.setUpdatesEnabled(False)
         
-        total_msgs = len(self._chat_all_messages)
-        end_idx = total_msgs - self._chat_loaded_count
-        start_idx = max(0, end_idx - self._chat_chunk_size)
-        
-        chunk = self._chat_all_messages[start_idx:end_idx]
-        
         character_name = self.current_active_character
+
+        chunk = self.configuration_characters.get_chat_messages(
+            character_name, self._chat_chunk_size, self._chat_oldest_sequence
+        )
         
         insert_index = 0
         
-        for message_id, msg_data in chunk:
+        for msg_data in chunk:
+            message_id = msg_data.get("message_id")
             is_user = msg_data.get("is_user", False)
             current_variant_id = msg_data.get("current_variant_id", "default")
             variants = msg_data.get("variants",[])
@@ -17498,7 +17666,7 @@ Image prompt:"""
             )
             insert_index += 1
             
-        self._chat_loaded_count += len(chunk)
+        self._set_chat_history_cursor(chunk)
         self.ensure_header_image_on_top()
         
         self.chat_widget.setUpdatesEnabled(True)
@@ -17552,18 +17720,13 @@ Image prompt:"""
                 self.ui.scrollArea_chat.setUpdatesEnabled(True)
                 return
             
-            current_chat = character_information["current_chat"]
-            chats = character_information.get("chats", {})
-            chat_content = chats[current_chat].get("chat_content", {})
-
-            sorted_messages = sorted(chat_content.items(), key=lambda x: x[1].get("sequence_number", float('inf')))
-            
-            self._chat_all_messages = sorted_messages
-            
-            chunk = self._chat_all_messages[-self._chat_chunk_size:]
-            self._chat_loaded_count = len(chunk)
+            # Only the newest page is read from the message store; older pages follow on scroll.
+            chunk = self.configuration_characters.get_chat_messages(character_name, self._chat_chunk_size)
+            self._chat_oldest_sequence = None
+            self._set_chat_history_cursor(chunk)
 
-            for message_id, msg_data in chunk:
+            for msg_data in chunk:
+                message_id = msg_data.get("message_id")
                 is_user = msg_data.get("is_user", False)
                 current_variant_id = msg_data.get("current_variant_id", "default")
                 variants = msg_data.get("variants", [])
@@ -17601,14 +17764,10 @@ Image prompt:"""
             self.ui.scrollArea_chat.setUpdatesEnabled(True)
             return
         
-        current_chat = character_information["current_chat"]
-        chats = character_information.get("chats", {})
-        chat_content = chats[current_chat].get("chat_content", {})
-        
-        sorted_chat_content = sorted(chat_content.items(), key=lambda x: x[1].get("sequence_number", float('inf')))
-        if len(sorted_chat_content) > 100:
-            sorted_chat_content = sorted_chat_content[-100:]
-        limited_chat_content = dict(sorted_chat_content)
+        limited_chat_content = {
+            msg_data.get("message_id"): msg_data
+            for msg_data in self.configuration_characters.get_chat_messages(character_name, 100)
+        }
 
         new_message_ids = list(limited_chat_content.keys())
         existing_ids = set(self.messages.keys())
@@ -17669,6 +17828,10 @@ Image prompt:"""
         
         scrollbar = self.ui.scrollArea_chat.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
+
+    def unload_emotion_model(self):
+        self.tokenizer = None
+        self.model = None
         
     async def detect_emotion(self, character_name, text):
         """
@@ -17684,21 +17847,27 @@ Image prompt:"""
         if current_sow_system_mode == "Nothing":
             return
 
+        residency = ModelResidencyManager.shared()
         if self.tokenizer is None or self.model is None:
             def _load_model():
                 tokenizer_path = os.path.join("app", "utils", "emotions", "detector")
                 tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
                 model = AutoModelForSequenceClassification.from_pretrained(tokenizer_path)
                 return tokenizer, model
+            baseline = residency.snapshot()
             self.tokenizer, self.model = await asyncio.to_thread(_load_model)
+            residency.register("emotion:chat", self.unload_emotion_model, baseline)
+
+        tokenizer, model = self.tokenizer, self.model
 
         def _run_inference():
-            inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True)
+            inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
             with torch.no_grad():
-                outputs = self.model(**inputs)
+                outputs = model(**inputs)
             return torch.argmax(outputs.logits, dim=1).item()
 
-        predicted_class_id = await asyncio.to_thread(_run_inference)
+        with residency.in_use("emotion:chat"):
+            predicted_class_id = await asyncio.to_thread(_run_inference)
 
         emotions = [
             "admiration", "amusement", "anger", "annoyance", "approval", "caring", "confusion", "curiosity",
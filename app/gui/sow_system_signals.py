@@ -37,6 +37,8 @@ from app.utils.ai_clients.prompt_engine import (
     strip_partial_reasoning_tag, extract_reasoning, find_reasoning_open, find_reasoning_close
 )
 from app.utils.ai_clients.ai_factory import AIFactory
+from app.gui.streaming_markdown import StreamingMarkdownRenderer
+from app.utils.model_residency import ModelResidencyManager
 from app.utils.soul_companion.soul_companion import SoulCompanion
 from app.utils.translator import Translator
 from app.utils.text_to_speech import TTSWorker, PipelinedTTSWorker
@@ -913,6 +915,7 @@ class Soul_Of_Waifu_System(QtCore.QObject):
         translator_engine = self.configuration_settings.get_main_setting("translator") # 0-Off, 1-Google, 2-Yandex, 3-LLM
         target_lang = self.configuration_settings.get_main_setting("target_language") # 0-RU
 
+        stream_generator = None
         try:
             self.llm_task = asyncio.current_task()
             
@@ -923,8 +926,10 @@ class Soul_Of_Waifu_System(QtCore.QObject):
                 if msg.get("user"): context_messages.append({"role": "user", "content": msg["user"].strip()})
                 if msg.get("character"): context_messages.append({"role": "assistant", "content": msg["character"].strip()})
             
-            messages, activated_lorebook_entries = self.prompt_engine.build_system_prompt_blocks(
-                self.character_name, user_name, user_description, context_messages, user_text
+            cache_aware = self.prompt_engine.is_prompt_cache_enabled(conversation_method)
+            messages, activated_lorebook_entries = await self.prompt_engine.build_system_prompt_blocks_async(
+                self.character_name, user_name, user_description, context_messages, user_text,
+                cache_aware=cache_aware
             )
 
             provider = AIFactory.get_provider(conversation_method)
@@ -932,8 +937,15 @@ class Soul_Of_Waifu_System(QtCore.QObject):
                 raise ValueError(f"Unknown method: {conversation_method}")
 
             gen_kwargs = self._get_gen_kwargs(conversation_method)
+            if cache_aware:
+                gen_kwargs["cache_key"] = f"{self.character_name}/{current_chat}"
 
             stream_generator = provider.generate_stream(messages, **gen_kwargs)
+            stream_renderer = StreamingMarkdownRenderer(
+                lambda text, _think_start: self.markdown_to_html(text)
+                .replace("{{user}}", user_name)
+                .replace("{{char}}", self.character_name)
+            )
             
             async for data_chunk in stream_generator:
                 if self.is_interrupted:
@@ -975,18 +987,17 @@ class Soul_Of_Waifu_System(QtCore.QObject):
                                 _state_tag_started = True
                             sentence_buffer = safe_buffer
 
-                display_text = full_text
-                if display_text.startswith(f"{self.character_name}:"):
-                    display_text = display_text[len(f"{self.character_name}:"):].lstrip()
+                if stream_renderer.frame_due():
+                    display_text = full_text
+                    if display_text.startswith(f"{self.character_name}:"):
+                        display_text = display_text[len(f"{self.character_name}:"):].lstrip()
 
-                display_text = strip_partial_state_tag(display_text)
+                    display_text = strip_partial_state_tag(display_text)
 
-                display_html = self.markdown_to_html(display_text)
-                display_html = display_html.replace("{{user}}", user_name).replace("{{char}}", self.character_name)
-                character_answer_label.setText(display_html)
-                
-                if current_sow_system_mode in ["Nothing", "Expressions Images", "Live2D Model", "VRM"]:
-                    self.ui.scrollArea_chat.verticalScrollBar().setValue(self.ui.scrollArea_chat.verticalScrollBar().maximum())
+                    character_answer_label.setText(stream_renderer.render(display_text))
+
+                    if current_sow_system_mode in ["Nothing", "Expressions Images", "Live2D Model", "VRM"]:
+                        self.ui.scrollArea_chat.verticalScrollBar().setValue(self.ui.scrollArea_chat.verticalScrollBar().maximum())
 
                 await asyncio.sleep(0.01)
 
@@ -1012,6 +1023,11 @@ class Soul_Of_Waifu_System(QtCore.QObject):
         except Exception as e:
             logger.error(f"Error when generating LLM: {e}")
 
+        finally:
+            # An interrupted stream must give its local server slot back right away.
+            if stream_generator is not None:
+                await stream_generator.aclose()
+
         if self.is_interrupted:
             full_text += " ... [Interrupted]"
             display_html = self.markdown_to_html(full_text).replace("{{user}}", user_name).replace("{{char}}", self.character_name)
@@ -1619,6 +1635,10 @@ class Soul_Of_Waifu_System(QtCore.QObject):
             "layout": message_container
         }
 
+    def unload_emotion_model(self):
+        self.tokenizer = None
+        self.session = None
+
     async def detect_emotion(self, character_name, text, vrm_mode=False):
         """
         Detects emotion based on the input text and updates the character's expression (image, Live2D model or VRM).
@@ -1634,15 +1654,18 @@ class Soul_Of_Waifu_System(QtCore.QObject):
         if current_sow_system_mode == "Nothing":
             return
 
+        residency = ModelResidencyManager.shared()
         if self.tokenizer is None or self.session is None:
+            baseline = residency.snapshot()
             tokenizer_path = os.path.join("app", "utils", "emotions", "detector")
             self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
             model_path = os.path.join("app", "utils", "emotions", "detector")
             self.session = AutoModelForSequenceClassification.from_pretrained(model_path)
+            residency.register("emotion:sow", self.unload_emotion_model, baseline)
 
         inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True)
 
-        with torch.no_grad():
+        with torch.no_grad(), residency.in_use("emotion:sow"):
             outputs = self.session(**inputs)
 
         logits = outputs.logits
@@ -0,0 +1,118 @@
+import time
+import asyncio
+import inspect
+import logging
+
+from app.configuration import configuration
+
+logger = logging.getLogger("Stream Dispatcher")
+
+
+class StreamDispatcher:
+    """
+    Coalesces the deltas of a token stream and hands them to a flush callback on a fixed tick.
+
+    Fast providers emit hundreds of tiny deltas per second; instead of updating the bubble,
+    scrolling, feeding the TTS splitter and sending a WebSocket frame for every one of them,
+    callers push() the deltas here and do that work once per tick with the joined batch.
+    Flushes run one at a time and in order; flush() / aclose() deliver whatever is still
+    buffered (call aclose() when the stream ends).
+
+    The tick comes from the "stream_flush_interval_ms" setting (33 ms by default) and a
+    per-stream summary is logged when "stream_dispatcher_stats" is enabled.
+    """
+    DEFAULT_INTERVAL_MS = 33
+
+    def __init__(self, on_flush, interval_ms: float = None, name: str = "stream"):
+        self.on_flush = on_flush
+        self.name = name
+
+        configuration_settings = configuration.ConfigurationSettings()
+        if interval_ms is None:
+            interval_ms = configuration_settings.get_main_setting("stream_flush_interval_ms")
+        try:
+            interval_ms = float(interval_ms) if interval_ms is not None else self.DEFAULT_INTERVAL_MS
+        except (TypeError, ValueError):
+            interval_ms = self.DEFAULT_INTERVAL_MS
+        self.interval = max(interval_ms, 0.0) / 1000.0
+        self.log_stats = bool(configuration_settings.get_main_setting("stream_dispatcher_stats"))
+
+        self._buffer = []
+        self._timer_task = None
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+
+        self._started_at = time.monotonic()
+        self._stats = {
+            "deltas": 0,
+            "chars": 0,
+            "flushes": 0,
+            "max_batch": 0,
+            "flush_time": 0.0,
+        }
+
+    def push(self, delta: str):
+        if not delta or self._closed:
+            return
+        self._buffer.append(delta)
+        self._stats["deltas"] += 1
+        self._stats["chars"] += len(delta)
+
+        if self._timer_task is None:
+            self._timer_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval)
+        # Cleared before flushing so that flush() never cancels a flush that is in progress.
+        self._timer_task = None
+        await self._flush_buffer()
+
+    async def _flush_buffer(self):
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            batch_size = len(self._buffer)
+            batch = "".join(self._buffer)
+            self._buffer.clear()
+
+            started = time.monotonic()
+            try:
+                result = self.on_flush(batch)
+                if inspect.isawaitable(result):
+                    await result
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[{self.name}] Stream flush failed: {e}", exc_info=True)
+            finally:
+                self._stats["flushes"] += 1
+                self._stats["max_batch"] = max(self._stats["max_batch"], batch_size)
+                self._stats["flush_time"] += time.monotonic() - started
+
+    async def flush(self):
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+            self._timer_task = None
+        await self._flush_buffer()
+
+    async def aclose(self):
+        await self.flush()
+        if self._closed:
+            return
+        self._closed = True
+        if self.log_stats:
+            stats = self.stats()
+            logger.info(
+                f"[{self.name}] {stats['deltas']} deltas -> {stats['flushes']} flushes "
+                f"(avg batch {stats['avg_batch']:.1f}, max {stats['max_batch']}), "
+                f"flush time {stats['flush_time'] * 1000:.1f} ms over {stats['duration']:.2f}s"
+            )
+
+    def stats(self) -> dict:
+        flushes = self._stats["flushes"]
+        return {
+            **self._stats,
+            "avg_batch": self._stats["deltas"] / flushes if flushes else 0.0,
+            "duration": time.monotonic() - self._started_at,
+            "interval_ms": self.interval * 1000.0,
+        }
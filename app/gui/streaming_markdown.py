@@ -0,0 +1,108 @@
+import time
+
+from app.utils.ai_clients.prompt_engine import _REASONING_OPEN_RE, _REASONING_CLOSE_ANY_RE as _REASONING_CLOSE_RE
+
+_FENCE = "```"
+_BLOCK_SEPARATOR = "\n\n"
+
+
+class StreamingMarkdownRenderer:
+    """
+    Incremental Markdown -> HTML rendering for a message that is still being streamed.
+
+    The text is split into blocks at blank lines. A block is committed (rendered once and
+    kept as HTML) as soon as it is followed by a blank line and no code fence, inline code
+    span or reasoning tag is left open in it; only the open trailing block is re-rendered on
+    the following frames. Every per-line Markdown rule of markdown_to_html stays inside a
+    block, so the concatenated output matches a full render of the text.
+
+    Widget updates are throttled to FRAME_INTERVAL: callers check frame_due() before doing
+    any work for a delta and call render() once the stream ends to show the final state.
+    """
+    FRAME_INTERVAL = 1 / 60
+
+    def __init__(self, render_fn, frame_interval: float = None):
+        """
+        render_fn(text, think_index_start) must return the HTML for a piece of text; the
+        second argument numbers reasoning blocks across committed pieces.
+        """
+        self.render_fn = render_fn
+        self.frame_interval = self.FRAME_INTERVAL if frame_interval is None else frame_interval
+        self._last_render = 0.0
+        self.reset()
+
+    def reset(self):
+        self._source = ""
+        self._html = ""
+        self._think_blocks = 0
+        self._state = (False, False, 0)
+        # (source length, html, scan state, reasoning blocks) after every committed block
+        self._commits = []
+
+    def frame_due(self) -> bool:
+        return time.monotonic() - self._last_render >= self.frame_interval
+
+    @staticmethod
+    def _advance(state, chunk: str):
+        fence_open, inline_open, think_depth = state
+        fences = chunk.count(_FENCE)
+        if fences % 2:
+            fence_open = not fence_open
+        if (chunk.count("`") - fences * len(_FENCE)) % 2:
+            inline_open = not inline_open
+        think_depth += len(_REASONING_OPEN_RE.findall(chunk)) - len(_REASONING_CLOSE_RE.findall(chunk))
+        return fence_open, inline_open, max(think_depth, 0)
+
+    def _rewind(self, text: str):
+        # The caller's cleanup (state/reasoning tag stripping) may have shortened the text:
+        # drop committed blocks until the remaining ones are a prefix again.
+        while self._commits and not text.startswith(self._source):
+            self._commits.pop()
+            if self._commits:
+                end, _, self._state, self._think_blocks = self._commits[-1]
+                self._source = self._source[:end]
+            else:
+                self._source = ""
+                self._state = (False, False, 0)
+                self._think_blocks = 0
+        self._html = "".join(commit[1] for commit in self._commits)
+
+    def _commit_complete_blocks(self, text: str):
+        state = self._state
+        pos = len(self._source)
+        while True:
+            sep = text.find(_BLOCK_SEPARATOR, pos)
+            if sep == -1:
+                return
+            end = sep + len(_BLOCK_SEPARATOR)
+            state = self._advance(state, text[pos:end])
+            pos = end
+            fence_open, inline_open, think_depth = state
+            if fence_open or inline_open or think_depth:
+                continue
+
+            block = text[len(self._source):end]
+            block_html = self.render_fn(block, self._think_blocks)
+            self._source = text[:end]
+            self._html += block_html
+            self._state = state
+            self._think_blocks += len(_REASONING_OPEN_RE.findall(block))
+            self._commits.append((end, block_html, state, self._think_blocks))
+
+    def render(self, text: str) -> str:
+        """
+        Returns the HTML for the whole text, re-rendering only what changed since the last call.
+        """
+        self._last_render = time.monotonic()
+        if not text:
+            self.reset()
+            return ""
+
+        if not text.startswith(self._source):
+            self._rewind(text)
+        self._commit_complete_blocks(text)
+
+        tail = text[len(self._source):]
+        if not tail:
+            return self._html
+        return self._html + self.render_fn(tail, self._think_blocks)
@@ -1,4 +1,9 @@
+import json
+import asyncio
+import hashlib
 import logging
+import weakref
+import threading
 from app.configuration import configuration
 from app.utils.ai_clients.providers.openai_provider import OpenAIProvider
 from app.utils.ai_clients.providers.openrouter_provider import OpenRouterProvider
@@ -15,10 +20,127 @@ from app.utils.ai_clients.providers.player2_provider import Player2Provider
 logger = logging.getLogger("AI Factory")
 
 class AIFactory:
+    """
+    Hands out AI providers from a pool, so their HTTP clients and keep-alive connections
+    are reused across requests instead of being rebuilt for every call.
+
+    Pooled providers are keyed by (method, model, base_url, api key hash) per event loop.
+    When the relevant settings change, the next get_provider() call builds a new provider
+    and retires the old one; retired and pooled providers are closed by aclose_all().
+    The providers of a loop that has been closed are dropped, since their clients can't
+    run on any other loop.
+    """
+    RETIRE_GRACE_SECONDS = 300
+
+    _pool: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    _retired: list = []
+    _pool_lock = threading.Lock()
+
+    @staticmethod
+    def _key_hash(api_key) -> str:
+        return hashlib.sha256(str(api_key or "").encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def get_provider(cls, conversation_method: str):
+        """
+        Factory method returning the appropriate AI provider, reusing a pooled instance when possible.
+        """
+        spec = cls._provider_spec(conversation_method)
+        if spec is None:
+            return None
+        (model, base_url, api_key), build = spec
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # HTTP clients bind to the loop they first run on; without one there is nothing safe to share.
+            return build()
+
+        signature = (conversation_method, model, base_url, cls._key_hash(api_key))
+        with cls._pool_lock:
+            cls._drop_closed_loops_locked()
+            providers = cls._pool.setdefault(loop, {})
+            pooled = providers.get(conversation_method)
+            if pooled is not None and pooled[0] == signature:
+                return pooled[1]
+
+            provider = build()
+            providers[conversation_method] = (signature, provider)
+
+        if pooled is not None:
+            logger.info(f"Settings for {conversation_method} changed; replacing pooled provider.")
+            cls._retire(pooled[1], loop)
+        return provider
+
+    @classmethod
+    def _drop_closed_loops_locked(cls):
+        for loop in [loop for loop in cls._pool.keys() if loop.is_closed()]:
+            dropped = cls._pool.pop(loop)
+            logger.debug(f"Dropped {len(dropped)} pooled provider(s) of a closed event loop.")
+
+    @classmethod
+    def _retire(cls, provider, loop):
+        # A retired provider may still be streaming a response, so it is closed after a grace period.
+        with cls._pool_lock:
+            cls._retired.append(provider)
+
+        def _close():
+            with cls._pool_lock:
+                if provider not in cls._retired:
+                    return
+                cls._retired.remove(provider)
+            asyncio.ensure_future(cls._close_provider(provider))
+
+        loop.call_later(cls.RETIRE_GRACE_SECONDS, _close)
+
+    @staticmethod
+    async def _close_provider(provider):
+        try:
+            await provider.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close provider {type(provider).__name__}: {e}")
+
+    @classmethod
+    def invalidate(cls, conversation_method: str = None):
+        """
+        Drops pooled providers (all of them, or those of one method) so the next call rebuilds them.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with cls._pool_lock:
+            cls._drop_closed_loops_locked()
+            dropped = []
+            for providers in cls._pool.values():
+                methods = [method for method in providers if conversation_method in (None, method)]
+                dropped.extend(providers.pop(method)[1] for method in methods)
+        for provider in dropped:
+            if loop is not None:
+                cls._retire(provider, loop)
+            else:
+                with cls._pool_lock:
+                    cls._retired.append(provider)
+
+    @classmethod
+    async def aclose_all(cls):
+        """
+        Closes every pooled and retired provider. Called once on application shutdown.
+        """
+        with cls._pool_lock:
+            providers = [
+                provider for pooled in cls._pool.values() for _, provider in pooled.values()
+            ] + cls._retired
+            cls._pool = weakref.WeakKeyDictionary()
+            cls._retired = []
+        if providers:
+            await asyncio.gather(*(cls._close_provider(p) for p in providers))
+            logger.info(f"Closed {len(providers)} pooled AI provider(s).")
+
     @staticmethod
-    def get_provider(conversation_method: str):
+    def _provider_spec(conversation_method: str):
         """
-        Factory method to instantiate the appropriate AI provider.
+        Reads the settings for a method and returns ((model, base_url, api_key), builder).
         """
         config_settings = configuration.ConfigurationSettings()
         config_api = configuration.ConfigurationAPI()
@@ -34,52 +156,52 @@ class AIFactory:
             else:
                 base_url = "https://api.openai.com/v1"
             
-            return OpenAIProvider(api_key=api_key, model=model, base_url=base_url)
+            return (model, base_url, api_key), lambda: OpenAIProvider(api_key=api_key, model=model, base_url=base_url)
 
         elif conversation_method == "OpenRouter":
             api_key = config_api.get_token("OPENROUTER_API_TOKEN")
             model = config_settings.get_main_setting("openrouter_model")
             base_url = "https://openrouter.ai/api/v1"
 
-            return OpenRouterProvider(api_key=api_key, model=model, base_url=base_url)
+            return (model, base_url, api_key), lambda: OpenRouterProvider(api_key=api_key, model=model, base_url=base_url)
 
         elif conversation_method == "Mistral AI":
             api_key = config_api.get_token("MISTRAL_AI_API_TOKEN")
             model = config_settings.get_main_setting("mistral_model_endpoint") or "mistral-small-latest"
-            return MistralProvider(api_key=api_key, model=model)
+            return (model, None, api_key), lambda: MistralProvider(api_key=api_key, model=model)
 
         elif conversation_method == "Anthropic":
             api_key = config_api.get_token("ANTHROPIC_API_TOKEN")
             model = config_settings.get_main_setting("anthropic_model") or "claude-sonnet-4-6"
-            return AnthropicProvider(api_key=api_key, model=model)
+            return (model, None, api_key), lambda: AnthropicProvider(api_key=api_key, model=model)
 
         elif conversation_method == "Google Gemini":
             api_key = config_api.get_token("GEMINI_API_TOKEN")
             model = config_settings.get_main_setting("gemini_model") or "gemini-3.5-flash"
-            return GeminiProvider(api_key=api_key, model=model)
+            return (model, None, api_key), lambda: GeminiProvider(api_key=api_key, model=model)
 
         elif conversation_method == "DeepSeek":
             api_key = config_api.get_token("DEEPSEEK_API_TOKEN")
             model = config_settings.get_main_setting("deepseek_model") or "deepseek-v4-flash"
-            return DeepSeekProvider(api_key=api_key, model=model)
+            return (model, None, api_key), lambda: DeepSeekProvider(api_key=api_key, model=model)
 
         elif conversation_method == "Grok":
             api_key = config_api.get_token("GROK_API_TOKEN")
             model = config_settings.get_main_setting("grok_model") or "grok-4.3"
-            return GrokProvider(api_key=api_key, model=model)
+            return (model, None, api_key), lambda: GrokProvider(api_key=api_key, model=model)
 
         elif conversation_method == "Qwen":
             api_key = config_api.get_token("QWEN_API_TOKEN")
             model = config_settings.get_main_setting("qwen_model") or "qwen3.5-flash"
-            return QwenProvider(api_key=api_key, model=model)
+            return (model, None, api_key), lambda: QwenProvider(api_key=api_key, model=model)
 
         elif conversation_method == "Z.AI":
             api_key = config_api.get_token("ZAI_API_TOKEN")
             model = config_settings.get_main_setting("zai_model") or "glm-4.7"
-            return ZAIProvider(api_key=api_key, model=model)
+            return (model, None, api_key), lambda: ZAIProvider(api_key=api_key, model=model)
 
         elif conversation_method == "Player2":
-            return Player2Provider()
+            return (None, None, None), Player2Provider
 
         elif conversation_method == "Local LLM":
             advanced_enabled = config_settings.get_main_setting("adv_sampling")
@@ -101,7 +223,18 @@ class AIFactory:
                     if dyn_range > 0:
                         advanced_params["dynatemp_range"] = dyn_range
 
-            return LocalProvider(port=48596, advanced_params=advanced_params)
+            parallel_slots = config_settings.get_main_setting("local_parallel_slots") or 1
+            prompt_cache = bool(config_settings.get_main_setting("local_prompt_cache"))
+            slot_save = bool(config_settings.get_main_setting("local_slot_save"))
+            signature = (
+                json.dumps([advanced_params, parallel_slots, prompt_cache, slot_save], sort_keys=True),
+                "http://127.0.0.1:48596/v1",
+                None
+            )
+            return signature, lambda: LocalProvider(
+                port=48596, advanced_params=advanced_params, parallel_slots=parallel_slots,
+                prompt_cache=prompt_cache, slot_save=slot_save
+            )
 
         else:
             logger.error(f"Unknown conversation method requested: {conversation_method}")
@@ -1,6 +1,20 @@
+import inspect
+import httpx
 from abc import ABC, abstractmethod
 from typing import AsyncGenerator
 
+
+def create_http_client(**kwargs) -> httpx.AsyncClient:
+    """
+    Creates a long-lived keep-alive HTTP client for a provider.
+    HTTP/2 is used when the optional h2 package is installed.
+    """
+    try:
+        return httpx.AsyncClient(http2=True, **kwargs)
+    except ImportError:
+        return httpx.AsyncClient(**kwargs)
+
+
 class BaseAIProvider(ABC):
     """
     Abstract base class for all AI providers.
@@ -48,3 +62,15 @@ class BaseAIProvider(ABC):
             dict: Format {"content": str | None, "tool_calls": list | None}
         """
         pass
+
+    async def aclose(self):
+        """
+        Releases the provider's HTTP client. Pooled providers are closed by AIFactory.
+        """
+        client = getattr(self, "client", None)
+        closer = getattr(client, "close", None) or getattr(client, "aclose", None)
+        if closer is None:
+            return
+        result = closer()
+        if inspect.isawaitable(result):
+            await result
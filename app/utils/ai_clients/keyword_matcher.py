@@ -0,0 +1,68 @@
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of keywords.
+
+    Finds every keyword occurring in a text (overlapping matches included) in a single pass,
+    so the cost depends on the text length instead of keywords x text. Matching is exact:
+    callers normalize keywords and text the same way (lower() / casefold()) beforehand.
+    """
+    def __init__(self, keywords):
+        keywords = list(keywords)
+        self.keywords = tuple(dict.fromkeys(k for k in keywords if k))
+        self.match_empty = "" in keywords
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+
+        for keyword_idx, keyword in enumerate(self.keywords):
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                node = next_node
+            self._output[node] = self._output[node] + (keyword_idx,)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> set:
+        """
+        Returns the set of keywords that occur in the text.
+        """
+        found = {""} if self.match_empty else set()
+        if not self.keywords or not text:
+            return found
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        matched = set()
+        node = 0
+
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                matched.update(output[node])
+
+        found.update(self.keywords[idx] for idx in matched)
+        return found
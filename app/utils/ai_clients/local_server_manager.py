@@ -12,9 +12,12 @@ import yaml
 import psutil
 
 from app.configuration import configuration
+from app.utils.ai_clients.local_slot_scheduler import LocalSlotScheduler
 
 logger = logging.getLogger("Local Server Manager")
 
+SLOT_SAVE_DIR = Path("app/utils/ai_clients/backend/_temp/slots")
+
 class LocalServerManager:
     """
     Manages the local launch of the LLM server (llama.cpp backend).
@@ -106,6 +109,25 @@ class LocalServerManager:
         except Exception as e:
             logger.warning(f"Couldn't delete lock file: {e}")
 
+    def get_parallel_slots(self) -> int:
+        try:
+            return max(1, int(self.configuration_settings.get_main_setting("local_parallel_slots") or 1))
+        except (TypeError, ValueError):
+            return 1
+
+    def clear_slot_files(self):
+        """
+        Saved KV states are only valid for the model and context they were written with,
+        so every fresh server process starts from an empty slot directory.
+        """
+        try:
+            SLOT_SAVE_DIR.mkdir(parents=True, exist_ok=True)
+            for entry in SLOT_SAVE_DIR.glob("*.bin"):
+                entry.unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"Couldn't clear saved slot files: {e}")
+        LocalSlotScheduler.shared().clear_slot_owners()
+
     def resolve_server_executable(self, llm_device, llm_backend):
         exe_suffix = ".exe" if platform.system() == "Windows" else ""
         current_server = None
@@ -176,16 +198,33 @@ class LocalServerManager:
             logger.warning("Server already running.")
             return
 
-        c_arg = "0" if (context_size is None or context_size <= 0) else str(context_size)
+        parallel_slots = self.get_parallel_slots()
+
+        # llama-server splits -c evenly between its slots, so the total is scaled up to keep
+        # the configured context window for every slot.
+        if context_size is None or context_size <= 0:
+            c_arg = "0"
+        else:
+            c_arg = str(context_size * parallel_slots)
 
         command = [
             current_server,
             "-m", model_path,
             "-c", c_arg,
             "--port", str(self.SERVER_PORT),
-            "--parallel", "1",
+            "--parallel", str(parallel_slots),
         ]
 
+        if parallel_slots > 1:
+            logger.info(f"Multi-slot mode: {parallel_slots} slots (slot 0 is reserved for interactive generations).")
+
+        if self.configuration_settings.get_main_setting("local_prompt_cache"):
+            command.extend(["--cache-reuse", "256"])
+            if self.configuration_settings.get_main_setting("local_slot_save"):
+                self.clear_slot_files()
+                command.extend(["--slot-save-path", str(SLOT_SAVE_DIR.resolve())])
+                logger.info(f"Prompt cache slots are saved per chat in: {SLOT_SAVE_DIR}")
+
         if reasoning_mode is False:
             command.extend(["--reasoning-budget", "0", "--reasoning", "off"])
             logger.info("Reasoning mode is disabled (--reasoning off + --reasoning-budget 0). Note: some models/quants ignore this flag; a <think> tag filter downstream is still recommended as a safety net.")
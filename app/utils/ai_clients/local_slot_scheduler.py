@@ -0,0 +1,259 @@
+import time
+import heapq
+import asyncio
+import logging
+import threading
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger("Local Slot Scheduler")
+
+PRIORITY_FOREGROUND = "foreground"
+PRIORITY_BACKGROUND = "background"
+
+_PRIORITY_RANK = {PRIORITY_FOREGROUND: 0, PRIORITY_BACKGROUND: 1}
+
+
+class _Waiter:
+    __slots__ = ("rank", "seq", "loop", "future", "affinity", "slot", "enqueued_at")
+
+    def __init__(self, rank, seq, loop, future, affinity=None):
+        self.rank = rank
+        self.seq = seq
+        self.loop = loop
+        self.future = future
+        self.affinity = affinity
+        self.slot = None
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other):
+        return (self.rank, self.seq) < (other.rank, other.seq)
+
+
+class LocalSlotScheduler:
+    """
+    Client-side scheduler in front of the llama.cpp server slots (--parallel N).
+
+    Interactive (foreground) generations own slot 0 and always jump ahead of queued
+    background work. Background agents (Soul Memory, auto-summaries, image prompts,
+    companion heartbeats) are limited to the remaining slots and paced by a minimum
+    interval between their starts, so a memory batch can't starve the chat. With a
+    single slot both share it, but foreground requests are still served first.
+
+    Every slot remembers which conversation (cache key) its KV cache currently holds, and
+    requests carrying the same key are steered back to that slot when it is free.
+
+    The state is guarded by a thread lock because Soul Companion drives its own event
+    loop in a separate thread; waiters are woken through their own loop.
+    """
+    BACKGROUND_MIN_INTERVAL = 0.5
+    SLOW_WAIT_LOG_SECONDS = 2.0
+    WAIT_SAMPLES = 200
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, slots: int = 1):
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._waiters = []
+        self._busy = []
+        self._owners = {}
+        self._next_background_start = 0.0
+        self._stats = {
+            PRIORITY_FOREGROUND: self._new_stats(),
+            PRIORITY_BACKGROUND: self._new_stats(),
+        }
+        self.configure(slots)
+
+    @classmethod
+    def shared(cls, slots: int = None) -> "LocalSlotScheduler":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(slots or 1)
+            elif slots is not None:
+                cls._instance.configure(slots)
+            return cls._instance
+
+    def _new_stats(self) -> dict:
+        return {
+            "queued": 0,
+            "in_flight": 0,
+            "served": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+            "recent_waits": deque(maxlen=self.WAIT_SAMPLES),
+        }
+
+    @property
+    def slots(self) -> int:
+        return len(self._busy)
+
+    @property
+    def multi_slot(self) -> bool:
+        return len(self._busy) > 1
+
+    def configure(self, slots: int) -> None:
+        try:
+            slots = max(1, int(slots))
+        except (TypeError, ValueError):
+            slots = 1
+
+        with self._lock:
+            if slots == len(self._busy):
+                return
+            if slots > len(self._busy):
+                self._busy.extend([False] * (slots - len(self._busy)))
+            else:
+                # Slots that are still busy are dropped once their request releases them.
+                self._busy = self._busy[:slots]
+            # A different --parallel value means a restarted server with empty slots.
+            self._owners.clear()
+            logger.info(f"Local LLM scheduler configured for {slots} slot(s).")
+            self._dispatch_locked()
+
+    def _eligible_slots(self, rank: int) -> range:
+        if len(self._busy) == 1:
+            return range(1)
+        if rank == 0:
+            return range(len(self._busy))
+        return range(1, len(self._busy))
+
+    def _free_slot_locked(self, rank: int, affinity=None):
+        free = [slot for slot in self._eligible_slots(rank) if not self._busy[slot]]
+        if not free:
+            return None
+        if affinity is not None:
+            for slot in free:
+                if self._owners.get(slot) == affinity:
+                    return slot
+        return free[0]
+
+    def slot_owner(self, slot: int):
+        with self._lock:
+            return self._owners.get(slot)
+
+    def set_slot_owner(self, slot: int, owner) -> None:
+        with self._lock:
+            self._owners[slot] = owner
+
+    def clear_slot_owners(self) -> None:
+        with self._lock:
+            self._owners.clear()
+
+    def _dispatch_locked(self) -> None:
+        pending = []
+        while self._waiters:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done():
+                continue
+            slot = self._free_slot_locked(waiter.rank, waiter.affinity)
+            if slot is None:
+                pending.append(waiter)
+                if all(self._busy):
+                    break
+                continue
+            try:
+                waiter.loop.call_soon_threadsafe(self._wake, waiter)
+            except RuntimeError:
+                # The waiter's loop is already closed; nobody is left to use the slot.
+                continue
+            self._busy[slot] = True
+            waiter.slot = slot
+        for waiter in pending:
+            heapq.heappush(self._waiters, waiter)
+
+    @staticmethod
+    def _wake(waiter) -> None:
+        if not waiter.future.done():
+            waiter.future.set_result(waiter.slot)
+
+    def _release(self, slot: int) -> None:
+        with self._lock:
+            if slot < len(self._busy):
+                self._busy[slot] = False
+            self._dispatch_locked()
+
+    def _record_wait(self, priority: str, waited: float) -> None:
+        stats = self._stats[priority]
+        stats["served"] += 1
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+        stats["recent_waits"].append(waited)
+
+    async def _pace_background(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_background_start)
+            self._next_background_start = start_at + self.BACKGROUND_MIN_INTERVAL
+        delay = start_at - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def acquire(self, priority: str = PRIORITY_FOREGROUND, affinity=None):
+        """
+        Waits for a server slot suitable for the given priority and yields its index.
+        A slot already holding the affinity key is preferred when several are free.
+        """
+        if priority not in _PRIORITY_RANK:
+            priority = PRIORITY_FOREGROUND
+        rank = _PRIORITY_RANK[priority]
+        stats = self._stats[priority]
+
+        if rank:
+            await self._pace_background()
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(rank, next(self._seq), loop, loop.create_future(), affinity)
+
+        with self._lock:
+            stats["queued"] += 1
+            heapq.heappush(self._waiters, waiter)
+            self._dispatch_locked()
+
+        try:
+            slot = await waiter.future
+        except BaseException:
+            with self._lock:
+                stats["queued"] -= 1
+                assigned = waiter.slot
+            if assigned is not None:
+                self._release(assigned)
+            raise
+
+        waited = time.monotonic() - waiter.enqueued_at
+        with self._lock:
+            stats["queued"] -= 1
+            stats["in_flight"] += 1
+            self._record_wait(priority, waited)
+
+        if waited >= self.SLOW_WAIT_LOG_SECONDS:
+            logger.info(f"{priority.capitalize()} request waited {waited:.2f}s for local slot {slot}.")
+
+        try:
+            yield slot
+        finally:
+            with self._lock:
+                stats["in_flight"] -= 1
+            self._release(slot)
+
+    def metrics(self) -> dict:
+        """
+        Snapshot of queue depth, in-flight requests and wait times per priority.
+        """
+        with self._lock:
+            snapshot = {"slots": len(self._busy), "busy_slots": sum(self._busy)}
+            for priority, stats in self._stats.items():
+                waits = sorted(stats["recent_waits"])
+                p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+                snapshot[priority] = {
+                    "queue_depth": stats["queued"],
+                    "in_flight": stats["in_flight"],
+                    "served": stats["served"],
+                    "avg_wait": stats["total_wait"] / stats["served"] if stats["served"] else 0.0,
+                    "p95_wait": p95,
+                    "max_wait": stats["max_wait"],
+                }
+            return snapshot
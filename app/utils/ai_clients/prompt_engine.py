@@ -1,16 +1,20 @@
 import os
 import re
 import json
+import hashlib
 import logging
 import asyncio
+import functools
+import threading
 from pathlib import Path
+from collections import OrderedDict, deque
 
 import tiktoken
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
 from app.configuration import configuration
 from app.utils.embedding_provider import get_embedder
+from app.utils.ai_clients.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger("Prompt Engine")
 
@@ -20,6 +24,39 @@ tiktoken_file = ai_clients_dir / "9b5ad71b2ce5302211f9c61530b329a4922fc6a4"
 if tiktoken_file.exists():
     os.environ["TIKTOKEN_CACHE_DIR"] = str(ai_clients_dir)
 
+_TOKEN_COUNT_CACHE_SIZE = 16384
+_token_count_cache = OrderedDict()
+_token_count_lock = threading.Lock()
+
+
+def _content_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def cached_token_count(encoder, text: str) -> int:
+    """
+    Counts tokens through a process-wide LRU keyed by encoding name and content hash.
+    Shared by PromptEngine and Soul Stage so unchanged prompt sections and history messages
+    are only encoded once.
+    """
+    if not text or encoder is None:
+        return 0
+
+    key = (encoder.name, _content_digest(text))
+    with _token_count_lock:
+        count = _token_count_cache.get(key)
+        if count is not None:
+            _token_count_cache.move_to_end(key)
+            return count
+
+    count = len(encoder.encode(text, disallowed_special=()))
+
+    with _token_count_lock:
+        _token_count_cache[key] = count
+        if len(_token_count_cache) > _TOKEN_COUNT_CACHE_SIZE:
+            _token_count_cache.popitem(last=False)
+    return count
+
 _STATE_TAG_OPEN_RE = re.compile(r"<\s*(?:state[_\-\s]*update|update[_\-\s]*state)\s*>", re.IGNORECASE)
 _STATE_TAG_FULL_RE = re.compile(
     r"<\s*(state[_\-\s]*update|update[_\-\s]*state)\s*>(.*?)<\s*/\s*\1\s*>",
@@ -187,11 +224,22 @@ class PromptEngine:
     Unified Context Manager for AI Providers.
     Responsible for generating system prompts, applying lorebooks, managing memory, and computing tokens.
     """
+    # Sections that stay identical from turn to turn. In cache-aware mode they form the system
+    # prompt; everything else is moved next to the new user message so the prefix stays reusable.
+    STATIC_PROMPT_SECTIONS = ("System prompt", "Character's information", "Persona information", "Author's notes")
+
+    # Share of the history budget freed at once when the cache-aware window overflows.
+    HISTORY_EVICTION_CHUNK = 0.25
+    # Chats whose history packing is kept for the next turn.
+    HISTORY_PACKS_SIZE = 64
+
     def __init__(self):
         self.configuration_settings = configuration.ConfigurationSettings()
         self.configuration_characters = configuration.ConfigurationCharacters()
         self.lorebook_state = {}
-        self.embedding_cache = {}
+        self.history_packs = OrderedDict()
+        self.semantic_trigger_cache = {}
+        self.keyword_matchers = {}
 
         try:
             self.encoder = tiktoken.get_encoding("cl100k_base")
@@ -209,6 +257,11 @@ class PromptEngine:
         raw_size = self.configuration_settings.get_main_setting("context_size")
         return raw_size if raw_size is not None else 8192
 
+    def is_prompt_cache_enabled(self, conversation_method: str) -> bool:
+        if conversation_method != "Local LLM":
+            return False
+        return bool(self.configuration_settings.get_main_setting("local_prompt_cache"))
+
     def is_soul_memory_enabled(self) -> bool:
         try:
             return self.configuration_settings.get_main_setting("soul_memory")
@@ -219,7 +272,87 @@ class PromptEngine:
         if not text or not self.encoder:
             return 0
 
-        return len(self.encoder.encode(text, disallowed_special=()))
+        return cached_token_count(self.encoder, text)
+
+    def _pack_short_term_memory(self, chat_messages, available_tokens, pack_key, cache_aware=False):
+        """
+        Selects the longest suffix of chat_messages that fits into available_tokens.
+
+        The packing of the previous turn is kept per chat: when the history only grew at the end,
+        new messages are appended to the window and the oldest ones evicted (or older ones
+        re-admitted if the budget grew) instead of walking and counting the whole window again.
+
+        In cache-aware mode the window start only moves in chunks: an overflow evicts
+        HISTORY_EVICTION_CHUNK of the budget at once and older messages are re-admitted only
+        when the budget grew by more than two chunks, so the prompt prefix (and the server's
+        KV cache for it) survives most turns.
+        """
+        pack = self.history_packs.get(pack_key)
+        total = len(chat_messages)
+
+        reusable = (
+            pack is not None
+            and pack["count"] <= total
+            and pack["start"] <= pack["count"]
+            and all(
+                _content_digest(str(chat_messages[pack["start"] + offset].get("content", ""))) == digest
+                for offset, (digest, _) in enumerate(pack["entries"])
+            )
+            and (
+                pack["count"] == 0
+                or _content_digest(str(chat_messages[pack["count"] - 1].get("content", ""))) == pack["tail_digest"]
+            )
+        )
+
+        def measure(msg):
+            content = str(msg.get("content", ""))
+            return (_content_digest(content), self.count_tokens(content) if content.strip() else 0)
+
+        if reusable:
+            start = pack["start"]
+            entries = pack["entries"]
+            used = pack["used"]
+            for msg in chat_messages[pack["count"]:]:
+                entry = measure(msg)
+                entries.append(entry)
+                used += entry[1]
+        else:
+            start = total
+            entries = deque()
+            used = 0
+
+        eviction_target = available_tokens
+        if cache_aware and used > available_tokens:
+            eviction_target = int(available_tokens * (1 - self.HISTORY_EVICTION_CHUNK))
+
+        while entries and used > eviction_target:
+            used -= entries.popleft()[1]
+            start += 1
+
+        readmit = not (cache_aware and reusable) or (
+            available_tokens - used > 2 * available_tokens * self.HISTORY_EVICTION_CHUNK
+        )
+
+        while readmit and start > 0:
+            entry = measure(chat_messages[start - 1])
+            if used + entry[1] > available_tokens:
+                break
+            entries.appendleft(entry)
+            used += entry[1]
+            start -= 1
+
+        self.history_packs[pack_key] = {
+            "count": total,
+            "start": start,
+            "entries": entries,
+            "used": used,
+            "tail_digest": _content_digest(str(chat_messages[-1].get("content", ""))) if chat_messages else b""
+        }
+        self.history_packs.move_to_end(pack_key)
+        while len(self.history_packs) > self.HISTORY_PACKS_SIZE:
+            self.history_packs.popitem(last=False)
+
+        return [msg for msg in chat_messages[start:] if msg.get("content", "").strip()]
 
     def _merge_consecutive_roles(self, messages):
         merged = []
@@ -232,7 +365,93 @@ class PromptEngine:
                 merged.append({"role": role, "content": content})
         return merged
 
+    @staticmethod
+    def _run_steps(steps):
+        """
+        Drives a *_steps generator, running every blocking call it yields right here.
+        """
+        result, error = None, None
+        while True:
+            try:
+                step = steps.throw(error) if error is not None else steps.send(result)
+            except StopIteration as done:
+                return done.value
+            try:
+                result, error = step(), None
+            except Exception as e:
+                result, error = None, e
+
+    @staticmethod
+    async def _arun_steps(steps):
+        """
+        Drives a *_steps generator on the event loop, running every blocking call it yields
+        (embedding, topic retrieval) in a worker thread. Everything else, including the
+        PromptEngine caches, stays on the loop thread.
+        """
+        result, error = None, None
+        while True:
+            try:
+                step = steps.throw(error) if error is not None else steps.send(result)
+            except StopIteration as done:
+                return done.value
+            try:
+                result, error = await asyncio.to_thread(step), None
+            except Exception as e:
+                result, error = None, e
+
+    def _semantic_trigger_matrix_steps(self, lorebook_name, entries, model):
+        """
+        Returns (entry index -> row, normalized trigger embedding matrix) for the semantic entries of a lorebook.
+
+        The matrix is keyed by the trigger passages themselves, so editing an entry (update_lorebook,
+        imports) only re-encodes the passages that changed, in a single batch.
+        """
+        rows = {}
+        passages = []
+        for idx, entry in enumerate(entries):
+            semantic_trigger_text = entry.get("semantic_trigger", "")
+            if entry.get("trigger_type", "keyword") == "semantic" and semantic_trigger_text:
+                rows[idx] = len(passages)
+                passages.append(f"passage: {semantic_trigger_text.lower()[:1000]}")
+
+        passages = tuple(passages)
+        cached = self.semantic_trigger_cache.get(lorebook_name)
+        if cached and cached["passages"] == passages:
+            return rows, cached["matrix"]
+
+        vectors = cached["vectors"] if cached else {}
+        missing = [p for p in dict.fromkeys(passages) if p not in vectors]
+        if missing:
+            encoded = yield functools.partial(model.encode, missing, convert_to_numpy=True, normalize_embeddings=True)
+            vectors.update(zip(missing, encoded))
+
+        vectors = {p: vectors[p] for p in passages}
+        matrix = np.stack([vectors[p] for p in passages]).astype(np.float32) if passages else None
+        self.semantic_trigger_cache[lorebook_name] = {"passages": passages, "vectors": vectors, "matrix": matrix}
+        return rows, matrix
+
+    def _get_keyword_matcher(self, lorebook_name, entries):
+        """
+        Returns the compiled matcher over all keys and exclude keys of a lorebook, rebuilt only when they change.
+        """
+        signature = tuple(
+            (tuple(entry.get("key", [])), tuple(entry.get("exclude_key", []))) for entry in entries
+        )
+        cached = self.keyword_matchers.get(lorebook_name)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        keywords = [key.lower() for keys, exclude_keys in signature for key in keys + exclude_keys]
+        matcher = KeywordMatcher(keywords)
+        self.keyword_matchers[lorebook_name] = (signature, matcher)
+        return matcher
+
     def get_activated_lorebook_entries(self, lorebook_name, chat_messages, character_name, user_name, user_message):
+        return self._run_steps(self._activated_lorebook_entries_steps(
+            lorebook_name, chat_messages, character_name, user_name, user_message
+        ))
+
+    def _activated_lorebook_entries_steps(self, lorebook_name, chat_messages, character_name, user_name, user_message):
         config = self.configuration_settings.load_configuration()
         lorebooks = config.get("user_data", {}).get("lorebooks", {})
 
@@ -259,7 +478,13 @@ class PromptEngine:
             "scenario":[]
         }
         
+        scan_texts = {}
+        keyword_hits = {}
+        keyword_matcher = None
+
         semantic_context = ""
+        semantic_similarities = None
+        semantic_rows = {}
         model = None
 
         for idx, entry in enumerate(entries):
@@ -320,15 +545,26 @@ class PromptEngine:
 
             else:
                 local_depth = entry.get("depth", global_scan_depth)
-                msgs_slice = chat_messages[-local_depth:] if local_depth > 0 else []
-                relevant_text = " ".join([str(msg.get("content", "")) for msg in msgs_slice])
-                full_text_to_scan = (relevant_text + " " + user_message).lower()
+                full_text_to_scan = scan_texts.get(local_depth)
+                if full_text_to_scan is None:
+                    msgs_slice = chat_messages[-local_depth:] if local_depth > 0 else []
+                    relevant_text = " ".join([str(msg.get("content", "")) for msg in msgs_slice])
+                    full_text_to_scan = (relevant_text + " " + user_message).lower()
+                    scan_texts[local_depth] = full_text_to_scan
 
                 if trigger_type == "keyword" or trigger_type not in ["semantic"]:
+                    hits = keyword_hits.get(local_depth)
+                    if hits is None:
+                        # One pass of the compiled matcher per distinct scan window.
+                        if keyword_matcher is None:
+                            keyword_matcher = self._get_keyword_matcher(lorebook_name, entries)
+                        hits = keyword_matcher.find(full_text_to_scan)
+                        keyword_hits[local_depth] = hits
+
                     keys = entry.get("key",[])
-                    has_key = any(key.lower() in full_text_to_scan for key in keys) if keys else False
+                    has_key = any(key.lower() in hits for key in keys) if keys else False
                     exclude_keys = entry.get("exclude_key",[])
-                    has_exclude = any(ex_key.lower() in full_text_to_scan for ex_key in exclude_keys) if exclude_keys else False
+                    has_exclude = any(ex_key.lower() in hits for ex_key in exclude_keys) if exclude_keys else False
                     if has_key and not has_exclude:
                         is_triggered = True
 
@@ -336,13 +572,18 @@ class PromptEngine:
                     semantic_trigger_text = entry.get("semantic_trigger", "")
                     if semantic_trigger_text:
                         if not model:
-                            model = get_embedder()
+                            model = yield get_embedder
                         if model:
-                            if not semantic_context:
+                            if semantic_similarities is None:
+                                # One query embedding and one matrix-vector product for all semantic entries of this turn.
                                 semantic_context = full_text_to_scan[:1000]
-                            emb1 = model.encode([f"query: {semantic_context}"])
-                            emb2 = model.encode([f"passage: {semantic_trigger_text.lower()[:1000]}"])
-                            sim = cosine_similarity(emb1, emb2)[0][0]
+                                semantic_rows, trigger_matrix = yield from self._semantic_trigger_matrix_steps(lorebook_name, entries, model)
+                                query_vecs = yield functools.partial(
+                                    model.encode, [f"query: {semantic_context}"], convert_to_numpy=True, normalize_embeddings=True
+                                )
+                                query_vec = query_vecs[0]
+                                semantic_similarities = trigger_matrix @ query_vec.astype(np.float32)
+                            sim = semantic_similarities[semantic_rows[idx]]
                             if sim > 0.72:
                                 is_triggered = True
 
@@ -373,6 +614,11 @@ class PromptEngine:
         return activated_entries
 
     def get_merged_lorebook_entries(self, character_information, chat_messages, character_name, user_name, user_message, activated_lorebook=None):
+        return self._run_steps(self._merged_lorebook_entries_steps(
+            character_information, chat_messages, character_name, user_name, user_message, activated_lorebook
+        ))
+
+    def _merged_lorebook_entries_steps(self, character_information, chat_messages, character_name, user_name, user_message, activated_lorebook=None):
         if isinstance(activated_lorebook, dict):
             return activated_lorebook
             
@@ -389,7 +635,7 @@ class PromptEngine:
         activated_entries = {"classic": [], "scenario": []}
         for lb_name in selected_lorebooks:
             if lb_name in lorebooks:
-                entries = self.get_activated_lorebook_entries(
+                entries = yield from self._activated_lorebook_entries_steps(
                     lb_name, chat_messages, character_name, user_name, user_message
                 )
                 activated_entries["classic"].extend(entries.get("classic", []))
@@ -448,11 +694,35 @@ class PromptEngine:
         
         logger.info("\n".join(log_output))
 
-    def build_system_prompt_blocks(self, character_name, user_name, user_description, chat_messages, user_message, activated_lorebook=None, image_attachments=None, provider_style="openai"):
+    @staticmethod
+    def _format_memory_topic(stem: str, full_text: str) -> str:
+        if stem.lower().startswith("diary_"):
+            display_content = "... " + full_text[-2500:] if len(full_text) > 2500 else full_text
+            return f"--- [DIARY ENTRY: {stem}] ---\n{display_content}"
+        return f"--- [DEEP MEMORY: {stem}] ---\n{full_text}"
+
+    async def build_system_prompt_blocks_async(self, *args, **kwargs):
+        """
+        build_system_prompt_blocks for the event loop: the semantic lorebook embeddings and the
+        Soul Memory topic retrieval run in a worker thread, the rest of the build on the loop.
+        """
+        return await self._arun_steps(self._system_prompt_blocks_steps(*args, **kwargs))
+
+    def build_system_prompt_blocks(self, character_name, user_name, user_description, chat_messages, user_message, activated_lorebook=None, image_attachments=None, provider_style="openai", cache_aware=False):
         """
         Builds a robust system prompt list with structured blocks, memory, and lore integration.
         Returns a list of message dicts.
+
+        cache_aware keeps the system prompt limited to static sections and delivers the per-turn
+        context (lore, summary, state, Soul Memory) together with the new user message, so that
+        system prompt + history form a stable prefix for the local server's prompt cache.
         """
+        return self._run_steps(self._system_prompt_blocks_steps(
+            character_name, user_name, user_description, chat_messages, user_message,
+            activated_lorebook, image_attachments, provider_style, cache_aware
+        ))
+
+    def _system_prompt_blocks_steps(self, character_name, user_name, user_description, chat_messages, user_message, activated_lorebook=None, image_attachments=None, provider_style="openai", cache_aware=False):
         max_context_tokens = self._get_max_context_tokens()
 
         config = self.configuration_settings.load_configuration()
@@ -556,11 +826,12 @@ class PromptEngine:
             "{{user_description}}": user_description
         }
 
-        activated_entries = self.get_merged_lorebook_entries(
+        activated_entries = yield from self._merged_lorebook_entries_steps(
             character_information, chat_messages, character_name, user_name, user_message, activated_lorebook
         )
 
         system_blocks = []
+        dynamic_blocks = []
         current_token_count = 0
 
         for section in order:
@@ -591,14 +862,15 @@ class PromptEngine:
                 for key, value in replacements.items():
                     content = content.replace(key, str(value))
                 
-                system_blocks.append({"role": "system", "content": content})
+                is_dynamic = cache_aware and section not in self.STATIC_PROMPT_SECTIONS
+                (dynamic_blocks if is_dynamic else system_blocks).append({"role": "system", "content": content})
                 current_token_count += self.count_tokens(content)
 
         if state_prompt_block:
             for key, value in replacements.items():
                 state_prompt_block = state_prompt_block.replace(key, str(value))
             
-            system_blocks.append({"role": "system", "content": state_prompt_block})
+            (dynamic_blocks if cache_aware else system_blocks).append({"role": "system", "content": state_prompt_block})
             current_token_count += self.count_tokens(state_prompt_block)
 
         final_user_message = user_message
@@ -617,7 +889,7 @@ class PromptEngine:
         # Soul Memory Processing
         if self.is_soul_memory_enabled():
             try:
-                from app.utils.soul_memory import SoulMemoryAgent
+                from app.utils.soul_memory import SoulMemoryAgent, TopicRAG, TopicVectorStore
                 agent = SoulMemoryAgent(None)
                 _, index_path, usr_path, topics_dir, *_ = agent.get_memory_paths(character_name, current_chat_id)
                 
@@ -638,64 +910,14 @@ class PromptEngine:
                 if topics_dir and topics_dir.exists():
                     query_context = " ".join([str(msg.get("content", "")) for msg in chat_messages[-4:]] + [final_user_message])
 
-                    model = get_embedder()
-                    if model is None:
-                        logger.info("[Soul Memory] Embedder unavailable — skipping semantic topic search.")
-                    topic_files = list(topics_dir.glob("*.md")) if model else []
-
-                    found_topics = []
-
-                    if model and topic_files:
-                        safe_query_context = str(query_context)[:1000]
-                        query_vec = model.encode([f"query: {safe_query_context}"])[0]
-                        topic_vectors = []
-                        topic_contents = []
-                        
-                        for topic_file in topic_files:
-                            t_name = topic_file.name.lower()
-                            full_text = topic_file.read_text(encoding="utf-8")
-                            
-                            if t_name in explicit_topics:
-                                if t_name.startswith("diary_"):
-                                    display_content = "... " + full_text[-2500:] if len(full_text) > 2500 else full_text
-                                    found_topics.append(f"--- [DIARY ENTRY: {topic_file.stem}] ---\n{display_content}")
-                                else:
-                                    found_topics.append(f"--- [DEEP MEMORY: {topic_file.stem}] ---\n{full_text}")
-                                continue
-                            
-                            if t_name.startswith("diary_"):
-                                content_preview = full_text[-600:]
-                                encoding_target = f"Diary: {topic_file.stem}. Recent thoughts: {content_preview}"
-                            else:
-                                content_preview = full_text[:200]
-                                encoding_target = f"Topic: {topic_file.stem}. Content: {content_preview}"
-                            
-                            target_hash = f"topic_{character_name}_{t_name}"
-                            if target_hash in self.embedding_cache:
-                                t_vec = self.embedding_cache[target_hash]
-                            else:
-                                t_vec = model.encode([f"passage: {encoding_target}"])[0]
-                                self.embedding_cache[target_hash] = t_vec
-                            
-                            topic_vectors.append(t_vec)
-                            topic_contents.append((topic_file.stem, full_text))
-
-                        if topic_vectors:
-                            similarities = cosine_similarity([query_vec], topic_vectors)[0]
-                            top_indices = np.argsort(similarities)[::-1]
-                            
-                            for idx in top_indices:
-                                if similarities[idx] > 0.42:
-                                    t_name, t_full_content = topic_contents[idx]
-                                    if not any(t_name in ft for ft in found_topics):
-                                        if t_name.lower().startswith("diary_"):
-                                            display_content = "... " + t_full_content[-2500:] if len(t_full_content) > 2500 else t_full_content
-                                            found_topics.append(f"--- [DIARY ENTRY: {t_name}] ---\n{display_content}")
-                                        else:
-                                            found_topics.append(f"--- [DEEP MEMORY: {t_name}] ---\n{t_full_content}")
-                                
-                                if len(found_topics) >= 3:
-                                    break
+                    relevant_topics = yield functools.partial(
+                        TopicRAG(topics_dir, TopicVectorStore.VIEW_PROMPT).retrieve,
+                        query_context, max_topics=3, min_score=0.42, explicit=explicit_topics
+                    )
+                    found_topics = [
+                        self._format_memory_topic(Path(t_name).stem, t_full_content)
+                        for t_name, t_full_content in relevant_topics.items()
+                    ]
 
                     if found_topics:
                         if soul_memory_content:
@@ -703,7 +925,7 @@ class PromptEngine:
                         soul_memory_content += "[RELEVANT DEEP MEMORY TOPICS]\n" + "\n\n".join(found_topics)
                 
                 if soul_memory_content:
-                    system_blocks.append({"role": "system", "content": soul_memory_content})
+                    (dynamic_blocks if cache_aware else system_blocks).append({"role": "system", "content": soul_memory_content})
                     current_token_count += self.count_tokens(soul_memory_content)
                     
             except Exception as e:
@@ -720,6 +942,12 @@ class PromptEngine:
             user_msg_tokens += len(image_attachments) * self.IMAGE_TOKEN_ESTIMATE
         current_token_count += user_msg_tokens
 
+        if dynamic_blocks:
+            dynamic_content = "\n\n".join(b["content"] for b in dynamic_blocks if b.get("content"))
+            final_user_message = (
+                f"[CURRENT CONTEXT]\n{dynamic_content}\n[END OF CURRENT CONTEXT]\n\n{final_user_message}"
+            )
+
         final_user_content = self._build_final_user_content(final_user_message, image_attachments, provider_style)
 
         if max_context_tokens <= 0:
@@ -750,22 +978,9 @@ class PromptEngine:
             return final_messages, activated_entries
         
         # Short-Term Memory filtering
-        reversed_history = []
-        history_tokens_used = 0
-
-        for msg in reversed(chat_messages):
-            msg_content = msg.get("content", "")
-            if not msg_content.strip(): 
-                continue
-            
-            msg_tokens = self.count_tokens(msg_content)
-            if history_tokens_used + msg_tokens > available_tokens:
-                break
-
-            reversed_history.append(msg)
-            history_tokens_used += msg_tokens
-
-        short_term_memory = list(reversed(reversed_history))
+        short_term_memory = self._pack_short_term_memory(
+            chat_messages, available_tokens, (character_name, current_chat_id), cache_aware=cache_aware
+        )
         final_history = self._merge_consecutive_roles(short_term_memory)
 
         cleaned_history = []
@@ -879,16 +1094,21 @@ class PromptEngine:
             configured = 0
         return max(configured, self.SOUL_MEMORY_MIN_MAX_TOKENS)
 
-    async def _memory_llm_call(self, provider, messages: list[dict]) -> str:
+    async def _memory_llm_call(self, provider, messages: list[dict], priority: str = "background") -> str:
         try:
             full_response = ""
             max_tokens = self._get_soul_memory_max_tokens()
             reasoning_effort = self.configuration_settings.get_main_setting("soul_memory_reasoning_effort") or "none"
-            async for chunk in provider.generate_stream(
+            stream = provider.generate_stream(
                 messages, temperature=0.1, top_p=0.95, max_tokens=max_tokens,
-                reasoning_effort=reasoning_effort, reasoning_mode=False
-            ):
-                full_response += chunk
+                reasoning_effort=reasoning_effort, reasoning_mode=False, priority=priority
+            )
+            try:
+                async for chunk in stream:
+                    full_response += chunk
+            finally:
+                # The task is cancelled on purpose; its local server slot must come back right away.
+                await stream.aclose()
             return full_response.strip()
         except asyncio.CancelledError:
             logger.info("Memory Agent task was cancelled gracefully.")
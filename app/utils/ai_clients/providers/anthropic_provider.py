@@ -1,7 +1,7 @@
 import json
-import httpx
 import logging
-from app.utils.ai_clients.base_provider import BaseAIProvider
+from contextlib import asynccontextmanager
+from app.utils.ai_clients.base_provider import BaseAIProvider, create_http_client
 
 logger = logging.getLogger("Anthropic Provider")
 
@@ -17,10 +17,23 @@ VALID_EFFORT_LEVELS = {"low", "medium", "high", "xhigh", "max"}
 
 class AnthropicProvider(BaseAIProvider):
     def __init__(self, api_key: str, model: str = None):
-        super().__init__(api_key)
+        self.api_key = api_key
         self.model = model if model else "claude-sonnet-5"
         self.base_url = "https://api.anthropic.com/v1/messages"
         self._thinking_variant = None
+        self._http_client = None
+
+    @asynccontextmanager
+    async def _client(self):
+        # Requests share one keep-alive client instead of opening a connection per call.
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = create_http_client(timeout=60.0)
+        yield self._http_client
+
+    async def aclose(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
 
     def _build_anthropic_messages(self, messages: list[dict]):
         system_text = ""
@@ -174,7 +187,7 @@ class AnthropicProvider(BaseAIProvider):
         for variant in variants:
             payload = self._build_payload(messages, kwargs, 2048, True, variant)
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with self._client() as client:
                 async with client.stream("POST", self.base_url, headers=headers, json=payload) as response:
                     if response.status_code != 200:
                         error_body = await response.aread()
@@ -222,7 +235,7 @@ class AnthropicProvider(BaseAIProvider):
         variants = self._thinking_variants(kwargs)
         last_error = None
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with self._client() as client:
             for variant in variants:
                 payload = self._build_payload(messages, kwargs, 1024, False, variant)
                 response = await client.post(self.base_url, headers=headers, json=payload)
@@ -258,7 +271,7 @@ class AnthropicProvider(BaseAIProvider):
         variants = self._thinking_variants(kwargs)
         last_error = None
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with self._client() as client:
             for variant in variants:
                 payload = self._build_payload(messages, kwargs, 2048, False, variant, tools=tools)
                 response = await client.post(self.base_url, headers=headers, json=payload)
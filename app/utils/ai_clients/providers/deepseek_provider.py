@@ -1,8 +1,7 @@
 import json
 import logging
-import httpx
 from openai import AsyncOpenAI
-from app.utils.ai_clients.base_provider import BaseAIProvider
+from app.utils.ai_clients.base_provider import BaseAIProvider, create_http_client
 
 logger = logging.getLogger("DeepSeek Provider")
 
@@ -23,7 +22,7 @@ class DeepSeekProvider(BaseAIProvider):
         self.client = AsyncOpenAI(
             base_url=self.base_url,
             api_key=self.api_key,
-            http_client=httpx.AsyncClient(timeout=120)
+            http_client=create_http_client(timeout=120)
         )
 
     def _is_thinking_model(self) -> bool:
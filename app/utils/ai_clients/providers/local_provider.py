@@ -1,7 +1,12 @@
+import hashlib
 import logging
+from contextlib import asynccontextmanager
+
 import httpx
 from openai import AsyncOpenAI, APIConnectionError, APITimeoutError
 from app.utils.ai_clients.base_provider import BaseAIProvider
+from app.utils.ai_clients.local_slot_scheduler import LocalSlotScheduler, PRIORITY_FOREGROUND, PRIORITY_BACKGROUND
+from app.utils.ai_clients.local_server_manager import SLOT_SAVE_DIR
 
 logger = logging.getLogger("Local Provider")
 
@@ -13,18 +18,26 @@ REASONING_EFFORT_TO_BUDGET = {
 }
 
 class LocalProvider(BaseAIProvider):
-    def __init__(self, port: int = 48596, advanced_params: dict = None):
-        self.base_url = f"http://127.0.0.1:{port}/v1"
+    MAX_SLOT_FILES = 16
+
+    def __init__(self, port: int = 48596, advanced_params: dict = None, parallel_slots: int = 1,
+                 prompt_cache: bool = False, slot_save: bool = False):
+        self.server_url = f"http://127.0.0.1:{port}"
+        self.base_url = f"{self.server_url}/v1"
         self.api_key = "no-key-required"
         self.advanced_params = advanced_params or {}
+        self.scheduler = LocalSlotScheduler.shared(parallel_slots)
+        self.prompt_cache = prompt_cache
+        self.slot_save = prompt_cache and slot_save
 
+        self.http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(connect=10.0, read=120.0, write=30.0, pool=10.0),
+            limits=httpx.Limits(max_connections=5, max_keepalive_connections=2)
+        )
         self.client = AsyncOpenAI(
             base_url=self.base_url,
             api_key=self.api_key,
-            http_client=httpx.AsyncClient(
-                timeout=httpx.Timeout(connect=10.0, read=120.0, write=30.0, pool=10.0),
-                limits=httpx.Limits(max_connections=5, max_keepalive_connections=2)
-            )
+            http_client=self.http_client
         )
 
     def _connection_error_message(self, e: Exception) -> str:
@@ -34,6 +47,66 @@ class LocalProvider(BaseAIProvider):
             "It may still be loading the model, may have crashed, or the port may be blocked."
         )
 
+    def _apply_slot(self, extra_body: dict, slot: int) -> None:
+        if self.prompt_cache:
+            extra_body["cache_prompt"] = True
+        if self.prompt_cache or self.scheduler.multi_slot:
+            extra_body["id_slot"] = slot
+
+    @asynccontextmanager
+    async def _acquire_slot(self, priority: str, cache_key: str = None):
+        """
+        Takes a server slot from the scheduler. With the prompt cache enabled the chat is
+        pinned to the slot that already holds its KV cache, and when the slot has to change
+        hands the previous chat's state is saved and the new one's restored from disk.
+        """
+        affinity = cache_key if self.prompt_cache else None
+        async with self.scheduler.acquire(priority, affinity=affinity) as slot:
+            if self.prompt_cache:
+                await self._switch_slot_owner(slot, cache_key)
+            yield slot
+
+    @staticmethod
+    def _slot_filename(cache_key: str) -> str:
+        return hashlib.sha1(cache_key.encode("utf-8")).hexdigest()[:20] + ".bin"
+
+    async def _switch_slot_owner(self, slot: int, cache_key: str) -> None:
+        owner = self.scheduler.slot_owner(slot)
+        if owner == cache_key:
+            return
+
+        if self.slot_save:
+            if owner is not None:
+                await self._slot_action(slot, "save", owner)
+            if cache_key is not None and (SLOT_SAVE_DIR / self._slot_filename(cache_key)).exists():
+                await self._slot_action(slot, "restore", cache_key)
+
+        self.scheduler.set_slot_owner(slot, cache_key)
+
+    async def _slot_action(self, slot: int, action: str, cache_key: str) -> None:
+        try:
+            response = await self.http_client.post(
+                f"{self.server_url}/slots/{slot}",
+                params={"action": action},
+                json={"filename": self._slot_filename(cache_key)}
+            )
+            response.raise_for_status()
+            if action == "save":
+                self._prune_slot_files()
+        except Exception as e:
+            logger.warning(f"Local slot {action} failed for slot {slot}: {e}")
+
+    def _prune_slot_files(self) -> None:
+        try:
+            files = sorted(SLOT_SAVE_DIR.glob("*.bin"), key=lambda f: f.stat().st_mtime, reverse=True)
+            for stale in files[self.MAX_SLOT_FILES:]:
+                stale.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Couldn't prune saved slot files: {e}")
+
+    def scheduler_metrics(self) -> dict:
+        return self.scheduler.metrics()
+
     def _apply_thinking_budget(self, extra_body: dict, kwargs: dict, payload: dict) -> None:
         reasoning_mode = kwargs.get("reasoning_mode")
         if reasoning_mode is False:
@@ -64,14 +137,17 @@ class LocalProvider(BaseAIProvider):
 
         extra_body = dict(self.advanced_params) if self.advanced_params else {}
         self._apply_thinking_budget(extra_body, kwargs, payload)
-        if extra_body:
-            payload["extra_body"] = extra_body
 
         try:
-            completion = await self.client.chat.completions.create(**payload)
-            async for chunk in completion:
-                if chunk.choices and chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+            async with self._acquire_slot(kwargs.get("priority", PRIORITY_FOREGROUND), kwargs.get("cache_key")) as slot:
+                self._apply_slot(extra_body, slot)
+                if extra_body:
+                    payload["extra_body"] = extra_body
+
+                completion = await self.client.chat.completions.create(**payload)
+                async for chunk in completion:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
         except (APIConnectionError, APITimeoutError) as e:
             yield self._connection_error_message(e)
         except Exception as e:
@@ -94,15 +170,21 @@ class LocalProvider(BaseAIProvider):
         if stop_sequences:
             payload["stop"] = stop_sequences
 
+        extra_body = {}
         reasoning_mode = kwargs.get("reasoning_mode", False)
         if reasoning_mode is False:
-            payload["extra_body"] = {"thinking_budget_tokens": 0}
+            extra_body["thinking_budget_tokens"] = 0
 
         try:
-            completion = await self.client.chat.completions.create(**payload)
-            async for chunk in completion:
-                if chunk.choices and chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+            async with self._acquire_slot(kwargs.get("priority", PRIORITY_BACKGROUND)) as slot:
+                self._apply_slot(extra_body, slot)
+                if extra_body:
+                    payload["extra_body"] = extra_body
+
+                completion = await self.client.chat.completions.create(**payload)
+                async for chunk in completion:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
         except (APIConnectionError, APITimeoutError) as e:
             logger.error(f"Local API Connection Error (summary): {e}")
             yield ""
@@ -132,11 +214,14 @@ class LocalProvider(BaseAIProvider):
         reasoning_mode = kwargs.get("reasoning_mode")
         if reasoning_mode is False:
             extra_body["thinking_budget_tokens"] = 0
-        if extra_body:
-            payload["extra_body"] = extra_body
 
         try:
-            completion = await self.client.chat.completions.create(**payload)
+            async with self._acquire_slot(kwargs.get("priority", PRIORITY_FOREGROUND), kwargs.get("cache_key")) as slot:
+                self._apply_slot(extra_body, slot)
+                if extra_body:
+                    payload["extra_body"] = extra_body
+
+                completion = await self.client.chat.completions.create(**payload)
             msg = completion.choices[0].message
             return {
                 "content": msg.content,
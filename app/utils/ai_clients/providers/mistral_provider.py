@@ -10,6 +10,9 @@ class MistralProvider(BaseAIProvider):
         self.model = model if model else "mistral-small-latest"
         self.client = Mistral(api_key=self.api_key)
 
+    async def aclose(self):
+        await self.client.__aexit__(None, None, None)
+
     async def generate_stream(self, messages: list[dict], **kwargs):
         try:
             response = await self.client.chat.stream_async(
@@ -1,8 +1,7 @@
 import re
 import logging
-import httpx
 from openai import AsyncOpenAI
-from app.utils.ai_clients.base_provider import BaseAIProvider
+from app.utils.ai_clients.base_provider import BaseAIProvider, create_http_client
 
 logger = logging.getLogger("OpenAI Provider")
 
@@ -17,7 +16,7 @@ class OpenAIProvider(BaseAIProvider):
         self.client = AsyncOpenAI(
             base_url=self.base_url,
             api_key=self.api_key,
-            http_client=httpx.AsyncClient(timeout=120)
+            http_client=create_http_client(timeout=120)
         )
 
     def _is_reasoning_model(self) -> bool:
@@ -1,7 +1,6 @@
 import logging
-import httpx
 from openai import AsyncOpenAI
-from app.utils.ai_clients.base_provider import BaseAIProvider
+from app.utils.ai_clients.base_provider import BaseAIProvider, create_http_client
 
 logger = logging.getLogger("OpenRouter Provider")
 
@@ -24,7 +23,7 @@ class OpenRouterProvider(BaseAIProvider):
         self.client = AsyncOpenAI(
             base_url=self.base_url,
             api_key=self.api_key,
-            http_client=httpx.AsyncClient(timeout=120)
+            http_client=create_http_client(timeout=120)
         )
 
     async def generate_stream(self, messages: list[dict], **kwargs):
@@ -16,8 +16,9 @@ from typing import AsyncGenerator, Callable, Optional, List
 from pathlib import Path
 
 from app.configuration import configuration
-from app.utils.ai_clients.prompt_engine import PromptEngine
+from app.utils.ai_clients.prompt_engine import PromptEngine, cached_token_count
 from app.utils.ai_clients.ai_factory import AIFactory
+from app.utils.ai_clients.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger("Soul Stage")
 
@@ -50,7 +51,7 @@ def count_tokens(text: str, model_name: str = "default") -> int:
         return 0
     enc = _get_encoder(model_name)
     if enc is not None:
-        return len(enc.encode(text))
+        return cached_token_count(enc, text)
     return max(1, len(text) // 4)
 
 
@@ -219,6 +220,14 @@ class LoreRegistry:
         for raw in cards or []:
             card = raw if isinstance(raw, LoreCard) else LoreCard.from_dict(raw)
             self.cards[card.id] = card
+        self._matcher: Optional[tuple[tuple, KeywordMatcher]] = None
+
+    def _trigger_matcher(self) -> KeywordMatcher:
+        signature = tuple(tuple(card.triggers) for card in self.cards.values())
+        if self._matcher is None or self._matcher[0] != signature:
+            matcher = KeywordMatcher(t.casefold() for triggers in signature for t in triggers)
+            self._matcher = (signature, matcher)
+        return self._matcher[1]
 
     def to_dict(self) -> list[dict]:
         return [card.to_dict() for card in self.cards.values()]
@@ -240,6 +249,7 @@ class LoreRegistry:
 
     def relevant(self, text: str, audience: str = "party") -> list[LoreCard]:
         haystack = (text or "").casefold()
+        hits = self._trigger_matcher().find(haystack)
         ranked: list[tuple[int, LoreCard]] = []
         for card in self.cards.values():
             if not card.enabled or not card.content:
@@ -252,7 +262,7 @@ class LoreRegistry:
                 visible = card.visibility == f"private:{audience}"
             if not visible:
                 continue
-            score = sum(1 for trigger in card.triggers if trigger.casefold() in haystack)
+            score = sum(1 for trigger in card.triggers if trigger.casefold() in hits)
             if score:
                 ranked.append((score, card))
         ranked.sort(key=lambda item: (-item[0], item[1].title.casefold()))
@@ -1125,31 +1135,111 @@ from app.utils.embedding_provider import get_embedder as _get_embedder
 
 NPC_MEM_DIR = Path(".soul_stage/npc_memory")
 
-class NPCMemoryEntry:
-    __slots__ = ("text", "embedding", "turn_idx", "timestamp")
+class NPCMemoryStore:
+    """
+    On-disk long-term memory of a single NPC.
 
-    def __init__(self, text: str, embedding, turn_idx: int, timestamp: float):
-        self.text = text
-        self.embedding = embedding
-        self.turn_idx = turn_idx
-        self.timestamp = timestamp
+    Embeddings are kept L2-normalized as a raw float32 matrix (<name>.f32, one row per memory)
+    with a JSON-lines sidecar (<name>.jsonl) holding text, turn and timestamp for each row.
+    Appending a memory writes one row and one line at the end of each file; the files are only
+    rewritten when old memories are trimmed.
+    """
 
-    def to_dict(self) -> dict:
-        return {
-            "text": self.text,
-            "embedding": self.embedding.tolist() if hasattr(self.embedding, "tolist") else list(self.embedding),
-            "turn_idx": self.turn_idx,
-            "timestamp": self.timestamp,
-        }
+    def __init__(self, base_path: Path):
+        # Built from the full name: NPC names may contain dots ("Dr. Who").
+        self.vec_path  = base_path.with_name(f"{base_path.name}.f32")
+        self.meta_path = base_path.with_name(f"{base_path.name}.jsonl")
+        self.meta: list[dict] = []
+        self.dim = 0
+        self._buf = np.empty((0, 0), dtype=np.float32)
 
-    @classmethod
-    def from_dict(cls, d: dict) -> "NPCMemoryEntry":
-        return cls(
-            text=d["text"],
-            embedding=np.array(d["embedding"], dtype=np.float32),
-            turn_idx=d.get("turn_idx", 0),
-            timestamp=d.get("timestamp", 0),
-        )
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._buf[:len(self.meta)]
+
+    @staticmethod
+    def normalize(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / (np.linalg.norm(vectors, axis=-1, keepdims=True) + 1e-9)
+
+    def exists(self) -> bool:
+        return self.meta_path.exists()
+
+    def load(self) -> None:
+        meta = []
+        torn = False
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    meta.append(json.loads(line))
+                except json.JSONDecodeError:
+                    torn = True
+                    break
+
+        dim = int(meta[0].get("dim", 0)) if meta else 0
+        if dim <= 0 or not self.vec_path.exists():
+            self._set(np.empty((0, 0), dtype=np.float32), [])
+            return
+
+        matrix = np.fromfile(self.vec_path, dtype=np.float32)
+        rows = min(len(meta), matrix.size // dim)
+        vectors = matrix[:rows * dim].reshape(rows, dim)
+        if torn or rows != len(meta) or matrix.size != rows * dim:
+            # An interrupted append left the files out of step; cut both back to the rows they
+            # share so later appends line up again.
+            logger.warning(f"[NPCMemory] Repairing {self.meta_path.name}: {len(meta)} entries, {matrix.size // dim} vectors.")
+            self.rewrite(vectors, meta[:rows])
+            return
+        self._set(vectors, meta[:rows])
+
+    def _set(self, vectors: np.ndarray, meta: list[dict]) -> None:
+        self.meta = list(meta)
+        self.dim  = vectors.shape[1] if vectors.ndim == 2 else 0
+        self._buf = np.array(vectors, dtype=np.float32, copy=True).reshape(len(self.meta), self.dim)
+
+    def append(self, vector: np.ndarray, meta: dict) -> None:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if self.meta and vector.shape[0] != self.dim:
+            raise ValueError(f"embedding size {vector.shape[0]} does not match stored size {self.dim}")
+
+        count = len(self.meta)
+        if count >= self._buf.shape[0] or self._buf.shape[1] != vector.shape[0]:
+            grown = np.empty((max(16, count * 2), vector.shape[0]), dtype=np.float32)
+            if count:
+                grown[:count] = self._buf[:count]
+            self._buf = grown
+        self._buf[count] = vector
+        self.dim = vector.shape[0]
+        self.meta.append({**meta, "dim": self.dim})
+
+        with open(self.vec_path, "ab") as f:
+            f.write(vector.tobytes())
+        with open(self.meta_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.meta[-1], ensure_ascii=False) + "\n")
+
+    def rewrite(self, vectors: np.ndarray, meta: list[dict]) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        dim = vectors.shape[1] if vectors.ndim == 2 else 0
+        meta = [{**m, "dim": dim} for m in meta]
+        self._set(vectors, meta)
+
+        vec_tmp  = self.vec_path.with_name(self.vec_path.name + ".tmp")
+        meta_tmp = self.meta_path.with_name(self.meta_path.name + ".tmp")
+        vectors.tofile(vec_tmp)
+        meta_tmp.write_text("".join(json.dumps(m, ensure_ascii=False) + "\n" for m in meta), encoding="utf-8")
+        os.replace(vec_tmp, self.vec_path)
+        os.replace(meta_tmp, self.meta_path)
+
+    def delete(self) -> None:
+        self._set(np.empty((0, 0), dtype=np.float32), [])
+        self.vec_path.unlink(missing_ok=True)
+        self.meta_path.unlink(missing_ok=True)
 
 
 class NPCMemoryRegistry(NPCRegistry):
@@ -1158,13 +1248,14 @@ class NPCMemoryRegistry(NPCRegistry):
     """
 
     MAX_MEMORIES_PER_NPC = 200
+    TRIM_SLACK            = 50
     TOP_K_RETRIEVAL       = 5
     SIMILARITY_THRESHOLD  = 0.30
 
     def __init__(self, embedder=None):
         super().__init__()
         self.embedder = embedder
-        self._mem_cache: dict[str, list[NPCMemoryEntry]] = {}
+        self._mem_cache: dict[str, NPCMemoryStore] = {}
         self._current_turn_idx: int = 0
 
         try:
@@ -1173,110 +1264,160 @@ class NPCMemoryRegistry(NPCRegistry):
             logger.warning(f"[NPCMemory] Could not create {NPC_MEM_DIR}")
 
     def _get_embedder(self):
+        # Not cached: holding the shared service would keep the model alive after the
+        # residency manager evicts it.
         if self.embedder is not None:
             return self.embedder
-        self.embedder = _get_embedder()
-        return self.embedder
+        return _get_embedder()
 
     def set_turn_idx(self, turn_idx: int) -> None:
         self._current_turn_idx = turn_idx
 
     def _mem_path(self, name: str) -> Path:
         safe = name.replace(" ", "_").replace("/", "_").replace("\\", "_")
-        return NPC_MEM_DIR / f"{safe}.json"
+        return NPC_MEM_DIR / safe
+
+    def _legacy_path(self, name: str) -> Path:
+        return NPC_MEM_DIR / f"{self._mem_path(name).name}.json"
 
-    def _load_memories(self, name: str) -> list[NPCMemoryEntry]:
+    def _load_memories(self, name: str) -> NPCMemoryStore:
         if name in self._mem_cache:
             return self._mem_cache[name]
-        path = self._mem_path(name)
-        if not path.exists():
-            self._mem_cache[name] = []
-            return []
+        store = NPCMemoryStore(self._mem_path(name))
+        self._mem_cache[name] = store
         try:
-            data = json.loads(path.read_text(encoding="utf-8"))
-            entries = [NPCMemoryEntry.from_dict(d) for d in data]
-            self._mem_cache[name] = entries
-            return entries
+            if store.exists():
+                store.load()
+            else:
+                self._migrate_legacy(name, store)
         except Exception as e:
             logger.warning(f"[NPCMemory] Failed to load memories for {name}: {e}")
-            self._mem_cache[name] = []
-            return []
+        return store
 
-    def _save_memories(self, name: str, entries: list[NPCMemoryEntry]) -> None:
-        self._mem_cache[name] = entries
-        path = self._mem_path(name)
-        try:
-            data = [e.to_dict() for e in entries]
-            path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
-        except Exception as e:
-            logger.warning(f"[NPCMemory] Failed to save memories for {name}: {e}")
-
-    def add_memory(self, npc_name: str, text: str, turn_idx: Optional[int] = None) -> None:
-        if not text or not text.strip():
+    def _migrate_legacy(self, name: str, store: NPCMemoryStore) -> None:
+        legacy_path = self._legacy_path(name)
+        if not legacy_path.exists():
             return
+        data = json.loads(legacy_path.read_text(encoding="utf-8"))[-self.MAX_MEMORIES_PER_NPC:]
+        if data:
+            vectors = store.normalize([d["embedding"] for d in data])
+            meta = [
+                {"text": d["text"], "turn_idx": d.get("turn_idx", 0), "timestamp": d.get("timestamp", 0)}
+                for d in data
+            ]
+            store.rewrite(vectors, meta)
+        legacy_path.unlink(missing_ok=True)
+        logger.info(f"[NPCMemory] Migrated {len(data)} memories for {name} to the matrix store.")
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
         embedder = self._get_embedder()
         if embedder is None:
+            return None
+        emb = embedder.encode(text)
+        if hasattr(emb, "numpy"):
+            emb = emb.numpy()
+        return NPCMemoryStore.normalize(emb)
+
+    def add_memory(self, npc_name: str, text: str, turn_idx: Optional[int] = None) -> None:
+        if not text or not text.strip():
             return
         try:
             safe_text = text[:1000]
-            formatted_text = f"passage: {safe_text.strip()}"
-            emb = embedder.encode(formatted_text)
-            if hasattr(emb, "numpy"):
-                emb = emb.numpy()
-            emb = np.asarray(emb, dtype=np.float32)
+            emb = self._embed(f"passage: {safe_text.strip()}")
         except Exception as e:
             logger.warning(f"[NPCMemory] Embedding failed for {npc_name}: {e}")
             return
+        if emb is None:
+            return
 
-        entries = self._load_memories(npc_name)
-        entries.append(NPCMemoryEntry(
-            text=text,
-            embedding=emb,
-            turn_idx=turn_idx if turn_idx is not None else self._current_turn_idx,
-            timestamp=time.time(),
-        ))
-
-        if len(entries) > self.MAX_MEMORIES_PER_NPC:
-            entries = entries[-self.MAX_MEMORIES_PER_NPC:]
+        store = self._load_memories(npc_name)
+        meta = {
+            "text": text,
+            "turn_idx": turn_idx if turn_idx is not None else self._current_turn_idx,
+            "timestamp": time.time(),
+        }
+        try:
+            if len(store) and store.dim != emb.shape[0]:
+                logger.warning(f"[NPCMemory] Embedding size changed for {npc_name}; resetting stored memories.")
+                store.delete()
+            store.append(emb, meta)
+            # Trim with some slack so the files are rewritten once per batch of memories, not on every append.
+            if len(store) > self.MAX_MEMORIES_PER_NPC + self.TRIM_SLACK:
+                keep = self.MAX_MEMORIES_PER_NPC
+                store.rewrite(store.vectors[-keep:], store.meta[-keep:])
+        except Exception as e:
+            logger.warning(f"[NPCMemory] Failed to save memories for {npc_name}: {e}")
+            return
+        logger.debug(f"[NPCMemory] +1 memory for {npc_name} (total={min(len(store), self.MAX_MEMORIES_PER_NPC)})")
 
-        self._save_memories(npc_name, entries)
-        logger.debug(f"[NPCMemory] +1 memory for {npc_name} (total={len(entries)})")
+    def _top_k(self, store: NPCMemoryStore, scores: np.ndarray, offset: int, top_k: int) -> List[str]:
+        k = min(top_k, scores.shape[0])
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [store.meta[offset + i]["text"] for i in top if scores[i] >= self.SIMILARITY_THRESHOLD]
 
     def recall(self, npc_name: str, query: str, top_k: Optional[int] = None) -> List[str]:
         """Retrieve top-k relevant memories for the given query."""
         top_k = top_k or self.TOP_K_RETRIEVAL
-        entries = self._load_memories(npc_name)
-        if not entries:
-            return []
-        embedder = self._get_embedder()
-        if embedder is None:
+        store = self._load_memories(npc_name)
+        if not len(store):
             return []
 
         try:
             safe_query = str(query)[:1000]
-            formatted_query = f"query: {safe_query.strip()}"
-            q_emb = embedder.encode(formatted_query)
-            if hasattr(q_emb, "numpy"):
-                q_emb = q_emb.numpy()
-            q_emb = np.asarray(q_emb, dtype=np.float32)
+            q_emb = self._embed(f"query: {safe_query.strip()}")
         except Exception as e:
             logger.warning(f"[NPCMemory] Query embedding failed: {e}")
             return []
+        if q_emb is None or q_emb.shape[0] != store.dim:
+            return []
 
-        sims = []
-        for e in entries:
-            emb = np.asarray(e.embedding, dtype=np.float32)
-            n1 = np.linalg.norm(q_emb) + 1e-9
-            n2 = np.linalg.norm(emb) + 1e-9
-            sim = float(np.dot(q_emb, emb) / (n1 * n2))
-            sims.append(sim)
+        offset = max(0, len(store) - self.MAX_MEMORIES_PER_NPC)
+        scores = store.vectors[offset:] @ q_emb
+        return self._top_k(store, scores, offset, top_k)
 
-        ranked = sorted(zip(sims, entries), key=lambda x: -x[0])
-        return [e.text for s, e in ranked[:top_k] if s >= self.SIMILARITY_THRESHOLD]
+    def recall_many(self, npc_names: List[str], query: str, top_k: Optional[int] = None) -> dict:
+        """
+        Recall for several NPCs at once: the query is embedded once and all memory
+        matrices are scored in a single stacked matvec. Returns {npc_name: [memories]}.
+        """
+        top_k = top_k or self.TOP_K_RETRIEVAL
+        results = {name: [] for name in npc_names}
+        stores = [(name, self._load_memories(name)) for name in dict.fromkeys(npc_names)]
+        stores = [(name, store) for name, store in stores if len(store)]
+        if not stores:
+            return results
 
-    def get_memory_block(self, npc_name: str, query: str, top_k: Optional[int] = None) -> str:
-        """Format memories as a prompt block for injection into NPC_SYSTEM_PROMPT."""
-        memories = self.recall(npc_name, query, top_k)
+        try:
+            safe_query = str(query)[:1000]
+            q_emb = self._embed(f"query: {safe_query.strip()}")
+        except Exception as e:
+            logger.warning(f"[NPCMemory] Query embedding failed: {e}")
+            return results
+        if q_emb is None:
+            return results
+
+        segments = []
+        for name, store in stores:
+            if store.dim != q_emb.shape[0]:
+                continue
+            offset = max(0, len(store) - self.MAX_MEMORIES_PER_NPC)
+            segments.append((name, store, offset, store.vectors[offset:]))
+        if not segments:
+            return results
+
+        scores = np.concatenate([vectors for *_, vectors in segments]) @ q_emb
+        start = 0
+        for name, store, offset, vectors in segments:
+            end = start + vectors.shape[0]
+            results[name] = self._top_k(store, scores[start:end], offset, top_k)
+            start = end
+        return results
+
+    @staticmethod
+    def format_memory_block(memories: List[str]) -> str:
         if not memories:
             return ""
         lines = ["", "[MEMORIES — your past interactions, relevant to current context]"]
@@ -1286,19 +1427,27 @@ class NPCMemoryRegistry(NPCRegistry):
         lines.append("")
         return "\n".join(lines)
 
+    def get_memory_block(self, npc_name: str, query: str, top_k: Optional[int] = None) -> str:
+        """Format memories as a prompt block for injection into NPC_SYSTEM_PROMPT."""
+        return self.format_memory_block(self.recall(npc_name, query, top_k))
+
+    def get_memory_blocks(self, npc_names: List[str], query: str, top_k: Optional[int] = None) -> dict:
+        """Memory blocks for several NPCs from one batched recall."""
+        recalled = self.recall_many(npc_names, query, top_k)
+        return {name: self.format_memory_block(memories) for name, memories in recalled.items()}
+
     def clear_memory(self, npc_name: str) -> None:
         """Delete all memories for an NPC."""
-        self._mem_cache.pop(npc_name, None)
-        path = self._mem_path(npc_name)
-        if path.exists():
-            try:
-                path.unlink()
-            except Exception as e:
-                logger.warning(f"[NPCMemory] Failed to delete {path}: {e}")
+        store = self._mem_cache.pop(npc_name, None) or NPCMemoryStore(self._mem_path(npc_name))
+        try:
+            store.delete()
+            self._legacy_path(npc_name).unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"[NPCMemory] Failed to delete memories of {npc_name}: {e}")
 
     def memory_count(self, npc_name: str) -> int:
         """Return number of stored memories for an NPC."""
-        return len(self._load_memories(npc_name))
+        return min(len(self._load_memories(npc_name)), self.MAX_MEMORIES_PER_NPC)
     
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # TOKEN-AWARE CONTEXT WINDOW
@@ -2415,6 +2564,8 @@ class SoulStageOrchestrator:
         self.is_running    = False
         self._cancel_flag  = False
         self.current_task: Optional[asyncio.Task] = None
+        self._background_tasks: set[asyncio.Task] = set()
+        self._summary_task: Optional[asyncio.Task] = None
 
         self.context_window = context_window
 
@@ -2445,6 +2596,52 @@ class SoulStageOrchestrator:
         self._cancel_flag = True
         if self.current_task and not self.current_task.done():
             self.current_task.cancel()
+        for task in list(self._background_tasks):
+            task.cancel()
+
+    def _pipelining_enabled(self) -> bool:
+        """
+        Pipelined turns prefetch NPC memories and the party's Soul Memory topics while the
+        narrator streams, and move history summarization off the critical path.
+        """
+        try:
+            return bool(self.cfg_settings.get_main_setting("soul_stage_pipelining"))
+        except Exception:
+            return False
+
+    def _spawn_background(self, coro, label: str) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+
+        def _done(t: asyncio.Task):
+            self._background_tasks.discard(t)
+            if not t.cancelled() and t.exception() is not None:
+                logger.warning(f"[SoulStage] Background {label} failed: {t.exception()}")
+
+        task.add_done_callback(_done)
+        return task
+
+    def schedule_party_memory_sync(self, conversation_method: str, party_names: list, turn_messages: list, user_name: str) -> asyncio.Task:
+        coro = self.sync_party_memory(conversation_method, party_names, turn_messages, user_name)
+        if self._pipelining_enabled():
+            return self._spawn_background(coro, "party memory sync")
+        return asyncio.create_task(coro)
+
+    def _warm_party_memory(self, party_names: list) -> None:
+        """Brings the party's Soul Memory topic vectors up to date ahead of their prompt builds."""
+        if not self.prompt_engine or not self.prompt_engine.is_soul_memory_enabled():
+            return
+        embedder = _get_embedder()
+        if embedder is None:
+            return
+        from app.utils.soul_memory import SoulMemoryAgent, TopicVectorStore
+        agent = SoulMemoryAgent(None)
+        for name in party_names:
+            try:
+                topics_dir = agent.get_memory_paths(name)[3]
+                TopicVectorStore.for_dir(topics_dir, TopicVectorStore.VIEW_PROMPT).refresh(embedder)
+            except Exception as e:
+                logger.warning(f"[SoulStage] Soul Memory prefetch failed for {name}: {e}")
 
     def reset_scene(self):
         self.npc_registry.clear()
@@ -2812,18 +3009,22 @@ class SoulStageOrchestrator:
             user_name,
             user_description
         )
-        async for chunk in generator:
-            if self._cancel_flag:
-                break
-            full_text += chunk
-            try:
-                await on_chunk(chunk)
-            except RuntimeError as exc:
-                if "has been deleted" in str(exc):
-                    logger.info("[SoulStage] Character bubble target was deleted; cancelling stale stream.")
-                    self._cancel_flag = True
+        try:
+            async for chunk in generator:
+                if self._cancel_flag:
                     break
-                raise
+                full_text += chunk
+                try:
+                    await on_chunk(chunk)
+                except RuntimeError as exc:
+                    if "has been deleted" in str(exc):
+                        logger.info("[SoulStage] Character bubble target was deleted; cancelling stale stream.")
+                        self._cancel_flag = True
+                        break
+                    raise
+        finally:
+            # A cancelled turn must give its local server slot back right away.
+            await generator.aclose()
 
         return full_text
 
@@ -2839,6 +3040,7 @@ class SoulStageOrchestrator:
         on_chunk: Callable,
         user_name: str,
         user_description: str,
+        memory_block: Optional[str] = None,
     ) -> str:
         party_list = ", ".join(party_names) if party_names else "none"
         system = NPC_SYSTEM_PROMPT.format(
@@ -2851,11 +3053,11 @@ class SoulStageOrchestrator:
             user_name=user_name,
             user_description=user_description
         )
-        if hasattr(self.npc_registry, 'get_memory_block'):
+        if memory_block is None and hasattr(self.npc_registry, 'get_memory_block'):
             recall_query = f"{player_message}\n{narrator_text[:200] if narrator_text else ''}"
             memory_block = self.npc_registry.get_memory_block(npc.name, recall_query)
-            if memory_block:
-                system = system + "\n" + memory_block
+        if memory_block:
+            system = system + "\n" + memory_block
         private_block = self.world_state.private_knowledge_block(npc.name)
         if private_block:
             system += "\n" + private_block
@@ -2935,8 +3137,14 @@ class SoulStageOrchestrator:
         self.is_running   = True
         self.current_task = asyncio.current_task()
         max_actor_depth   = self.max_actor_depth if hasattr(self, 'max_actor_depth') and self.max_actor_depth else 3
+        pipelined         = self._pipelining_enabled()
+        prefetch_tasks: list[asyncio.Task] = []
 
         try:
+            if self._summary_task is not None and not self._summary_task.done():
+                # The planner reads the historical summary, so the previous turn's one must land first.
+                await asyncio.wait({self._summary_task})
+
             planner_message = player_message
             actor_message = player_message
             
@@ -3042,6 +3250,22 @@ class SoulStageOrchestrator:
                     except Exception as e:
                         logger.warning(f"[SoulStage] on_dice_roll callback failed: {e}")
 
+            npc_memory_task = None
+            active_npc_names = [n.name for n in self.npc_registry.list_active()]
+            can_recall = bool(active_npc_names) and hasattr(self.npc_registry, 'get_memory_blocks')
+            if pipelined:
+                # Recall against the narration plan so it can run while the narration itself streams.
+                if can_recall:
+                    recall_query = f"{actor_message}\n{str(plan.get('narration_plan', ''))[:200]}"
+                    npc_memory_task = self._spawn_background(
+                        asyncio.to_thread(self.npc_registry.get_memory_blocks, active_npc_names, recall_query),
+                        "NPC memory prefetch",
+                    )
+                    prefetch_tasks.append(npc_memory_task)
+                prefetch_tasks.append(self._spawn_background(
+                    asyncio.to_thread(self._warm_party_memory, party_names), "Soul Memory prefetch"
+                ))
+
             dynamic_context = list(context_messages)
             intra_turn_dialogue = ""
 
@@ -3074,6 +3298,21 @@ class SoulStageOrchestrator:
                 await on_turn_complete()
                 return
 
+            npc_memory_blocks = {}
+            try:
+                if npc_memory_task is not None:
+                    npc_memory_blocks = await npc_memory_task
+                elif can_recall:
+                    recall_query = f"{actor_message}\n{narration_text[:200] if narration_text else ''}"
+                    npc_memory_blocks = await asyncio.to_thread(
+                        self.npc_registry.get_memory_blocks, active_npc_names, recall_query
+                    )
+            except asyncio.CancelledError:
+                if self._cancel_flag:
+                    raise
+            except Exception as e:
+                logger.warning(f"[NPC] Batched memory recall failed: {e}")
+
             next_actor  = plan.get("next_actor", "PLAYER")
             actor_depth = 0
             bridge_budget = 1
@@ -3144,6 +3383,8 @@ class SoulStageOrchestrator:
                         _nc,
                         user_name=user_name,
                         user_description=user_description,
+                        # Popped so that an NPC acting twice in one turn recalls its fresh line too.
+                        memory_block=npc_memory_blocks.pop(_actor, None),
                     )
 
                     dynamic_context.append({
@@ -3211,7 +3452,12 @@ class SoulStageOrchestrator:
             expired_statuses = self.world_state.tick_statuses()
             if expired_statuses:
                 self.world_state.add_event(actor="System", action=f"Expired statuses: {', '.join(expired_statuses)}")
-            await self._summarize_history(conversation_method)
+            if pipelined:
+                self._summary_task = self._spawn_background(
+                    self._summarize_history(conversation_method), "history summary"
+                )
+            else:
+                await self._summarize_history(conversation_method)
 
             await on_turn_complete()
 
@@ -3221,6 +3467,9 @@ class SoulStageOrchestrator:
             logger.error(f"[SoulStage] Error: {e}", exc_info=True)
             await on_error(str(e))
         finally:
+            for task in prefetch_tasks:
+                if not task.done():
+                    task.cancel()
             self.is_running = False
             self.current_task = None
 
@@ -3469,8 +3718,12 @@ class SoulStageOrchestrator:
                 stop_sequences = stop_list[:4]
 
         gen_kwargs = self._get_reasoning_kwargs(conversation_method)
-        async for chunk in provider.generate_stream(messages, temperature=temperature, max_tokens=max_tokens, stop=stop_sequences, **gen_kwargs):
-            yield chunk
+        stream = provider.generate_stream(messages, temperature=temperature, max_tokens=max_tokens, stop=stop_sequences, **gen_kwargs)
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
 
     async def sync_party_memory(self, conversation_method: str, party_names: list, turn_messages: list, user_name: str):
         if not self.prompt_engine:
@@ -1,20 +1,49 @@
 import gc
+import sys
+import json
+import time
+import asyncio
 import logging
 import threading
 from pathlib import Path
 from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
 
 logger = logging.getLogger("EmbeddingProvider")
 
 MODEL_NAME = "e5-small-en-ru"
+RESIDENCY_KEY = "embedding"
+
+BACKEND_TORCH     = "torch"
+BACKEND_ONNX      = "onnx"
+BACKEND_ONNX_INT8 = "onnx_int8"
 
 _model = None
+_service = None
 _failed: bool = False
 _available: Optional[bool] = None
+_backend: Optional[str] = None
 _lock = threading.Lock()
 
-def _check_available() -> bool:
+def _model_dir() -> Path:
+    project_root = Path(__file__).resolve().parent.parent.parent
+    return project_root / "app" / "utils" / MODEL_NAME
+
+def _configured_backend() -> str:
+    try:
+        from app.configuration import configuration
+        backend = configuration.ConfigurationSettings().get_main_setting("embedding_backend")
+    except Exception:
+        backend = None
+    return backend if backend in (BACKEND_ONNX, BACKEND_ONNX_INT8) else BACKEND_TORCH
+
+def _check_available(backend: str = BACKEND_TORCH) -> bool:
     global _available
+    if backend != BACKEND_TORCH and OnnxEmbedder.is_supported():
+        return True
     if _available is None:
         try:
             import sentence_transformers
@@ -29,29 +58,301 @@ def _check_available() -> bool:
             )
     return _available
 
+class OnnxEmbedder:
+    """
+    Runs the exported e5 sentence-transformer graph through onnxruntime.
+
+    Expects the layout written by sentence-transformers' ONNX export inside the model folder:
+    onnx/model.onnx (or onnx/model_qint8_*.onnx / model_quint8_*.onnx for int8), tokenizer.json,
+    and the usual modules.json / 1_Pooling config. Neither torch nor sentence-transformers is
+    imported on this path.
+    """
+    def __init__(self, model_dir: Path, onnx_path: Path, device: str = "cpu"):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir
+        self.onnx_path = onnx_path
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = ["CPUExecutionProvider"]
+        if device.startswith("cuda") and "CUDAExecutionProvider" in onnxruntime.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+        self.session = onnxruntime.InferenceSession(str(onnx_path), options, providers=providers)
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.max_seq_length = self._read_json("sentence_bert_config.json").get("max_seq_length", 512)
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding()
+
+        pooling = self._read_json("1_Pooling/config.json")
+        self.cls_pooling = bool(pooling.get("pooling_mode_cls_token"))
+        modules = self._read_json("modules.json")
+        self.normalize = any(
+            str(m.get("type", "")).endswith("Normalize") for m in (modules if isinstance(modules, list) else [])
+        )
+
+    def _read_json(self, relative: str):
+        try:
+            return json.loads((self.model_dir / relative).read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+
+    @staticmethod
+    def is_supported() -> bool:
+        try:
+            import onnxruntime
+            import tokenizers
+            return True
+        except ImportError:
+            return False
+
+    @staticmethod
+    def find_graph(model_dir: Path, quantized: bool) -> Optional[Path]:
+        onnx_dir = model_dir / "onnx"
+        if not onnx_dir.is_dir():
+            return None
+        if quantized:
+            candidates = sorted(onnx_dir.glob("model_qint8*.onnx")) + sorted(onnx_dir.glob("model_quint8*.onnx"))
+            return candidates[0] if candidates else None
+        plain = onnx_dir / "model.onnx"
+        return plain if plain.exists() else None
+
+    def get_sentence_embedding_dimension(self) -> Optional[int]:
+        shape = self.session.get_outputs()[0].shape
+        return shape[-1] if isinstance(shape[-1], int) else None
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+        if self.cls_pooling:
+            pooled = hidden[:, 0]
+        else:
+            mask = attention[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, sentences, convert_to_numpy: bool = True, batch_size: int = 32,
+               show_progress_bar: bool = False, normalize_embeddings: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts  = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension() or 0), dtype=np.float32)
+
+        # Sorting by length keeps padding inside each batch small.
+        order  = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        chunks = [
+            self._encode_batch([texts[i] for i in order[start:start + batch_size]])
+            for start in range(0, len(order), batch_size)
+        ]
+        vectors = np.empty((len(texts), chunks[0].shape[1]), dtype=np.float32)
+        vectors[order] = np.concatenate(chunks)
+
+        if self.normalize or normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        return vectors[0] if single else vectors
+
+
+class EmbeddingService:
+    """
+    Thread-safe front for the embedding model.
+
+    Single-text encode() calls arriving from different threads within BATCH_WINDOW are
+    coalesced into one forward pass (a caller that is alone encodes right away), and recent embeddings are kept in an LRU keyed by the
+    full (prefixed) text, so repeated "query: ..." / "passage: ..." lookups are free.
+    Exposes the SentenceTransformer.encode() call shape, so callers can use it as the model.
+    """
+    BATCH_WINDOW = 0.004
+    MAX_BATCH    = 64
+    CACHE_SIZE   = 4096
+
+    _PASSTHROUGH_KWARGS = {"convert_to_numpy", "batch_size", "show_progress_bar"}
+
+    def __init__(self, model):
+        self.model = model
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pending: list[tuple[str, Future]] = []
+        self._pending_lock = threading.Lock()
+        self._batch_running = False
+        self._callers = 0
+        self._model_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def _cache_get(self, text: str) -> Optional[np.ndarray]:
+        with self._cache_lock:
+            vec = self._cache.get(text)
+            if vec is not None:
+                self._cache.move_to_end(text)
+            return vec
+
+    def _cache_put(self, text: str, vec: np.ndarray):
+        vec.setflags(write=False)
+        with self._cache_lock:
+            self._cache[text] = vec
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def _run_model(self, texts: list[str]) -> np.ndarray:
+        from app.utils.model_residency import ModelResidencyManager
+        with self._model_lock, ModelResidencyManager.shared().in_use(RESIDENCY_KEY):
+            vectors = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _drain(self):
+        while True:
+            with self._pending_lock:
+                batch = self._pending[:self.MAX_BATCH]
+                del self._pending[:self.MAX_BATCH]
+                if not batch:
+                    self._batch_running = False
+                    return
+
+            unique = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(unique, self._run_model(unique)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for text, vec in vectors.items():
+                self._cache_put(text, vec)
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+    def _submit(self, texts: list[str]) -> list[Future]:
+        futures = [Future() for _ in texts]
+        with self._pending_lock:
+            self._pending.extend(zip(texts, futures))
+            lead = not self._batch_running
+            self._batch_running = True
+            concurrent = self._callers > 1
+
+        # The first caller waits one window when other encode() calls are on their way,
+        # then encodes everything queued.
+        if lead:
+            if concurrent:
+                time.sleep(self.BATCH_WINDOW)
+            self._drain()
+        return futures
+
+    def encode(self, sentences, convert_to_numpy: bool = True, normalize_embeddings: bool = False, **kwargs):
+        # Batching and the cache deal in numpy vectors; anything else goes to the model as is.
+        if not convert_to_numpy or set(kwargs) - self._PASSTHROUGH_KWARGS:
+            with self._model_lock:
+                return self.model.encode(
+                    sentences, convert_to_numpy=convert_to_numpy,
+                    normalize_embeddings=normalize_embeddings, **kwargs
+                )
+
+        single = isinstance(sentences, str)
+        texts  = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        vectors = [self._cache_get(text) for text in texts]
+        missing = [i for i, vec in enumerate(vectors) if vec is None]
+        if missing:
+            with self._pending_lock:
+                self._callers += 1
+            try:
+                futures = self._submit([texts[i] for i in missing])
+                for i, future in zip(missing, futures):
+                    vectors[i] = future.result()
+            finally:
+                with self._pending_lock:
+                    self._callers -= 1
+
+        # The cache keeps the raw vectors, so normalization happens on the way out.
+        result = np.stack(vectors)
+        if normalize_embeddings:
+            result = result / (np.linalg.norm(result, axis=1, keepdims=True) + 1e-12)
+        return result[0] if single else result
+
+    async def encode_many(self, texts: list[str], prefix: str = "") -> np.ndarray:
+        """
+        Encodes a list of texts (each prepended with prefix) off the event loop in one batch.
+        """
+        return await asyncio.to_thread(self.encode, [f"{prefix}{t}" for t in texts])
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+def _load_onnx(backend: str, device: str):
+    model_dir = _model_dir()
+    onnx_path = OnnxEmbedder.find_graph(model_dir, quantized=backend == BACKEND_ONNX_INT8)
+    if onnx_path is None:
+        logger.warning(
+            f"[EmbeddingProvider] No exported ONNX graph for backend '{backend}' in "
+            f"'{model_dir / 'onnx'}'. Falling back to the PyTorch backend."
+        )
+        return None
+    logger.info(f"[EmbeddingProvider] Loading ONNX embedding model from '{onnx_path}'...")
+    return OnnxEmbedder(model_dir, onnx_path, device=device)
+
+def _load_torch(device: str):
+    from sentence_transformers import SentenceTransformer
+
+    local_path = _model_dir()
+    model_target = str(local_path) if local_path.exists() else MODEL_NAME
+
+    logger.info(
+        f"[EmbeddingProvider] Loading embedding model on "
+        f"{device.upper()} from '{model_target}'..."
+    )
+    return SentenceTransformer(model_target, device=device)
+
 def get_embedder(device: str = "cpu"):
-    global _model, _failed
+    global _model, _service, _failed, _backend
 
-    if _model is not None or _failed or not _check_available():
-        return _model
+    if _service is not None or _failed:
+        return _service
+
+    backend = _configured_backend()
+    if not _check_available(backend):
+        return _service
 
     with _lock:
         if _model is None and not _failed:
+            from app.utils.model_residency import ModelResidencyManager
+            baseline = ModelResidencyManager.snapshot()
             try:
-                from sentence_transformers import SentenceTransformer
-
-                project_root = Path(__file__).resolve().parent.parent.parent
-                local_path = project_root / "app" / "utils" / MODEL_NAME
-                model_target = str(local_path) if local_path.exists() else MODEL_NAME
+                model = None
+                if backend != BACKEND_TORCH and OnnxEmbedder.is_supported():
+                    try:
+                        model = _load_onnx(backend, device)
+                    except Exception as e:
+                        logger.error(f"[EmbeddingProvider] ONNX backend failed to load: {e}", exc_info=True)
+                        model = None
+                if model is None:
+                    backend = BACKEND_TORCH
+                    if not _check_available(backend):
+                        _failed = True
+                        return None
+                    model = _load_torch(device)
 
+                _model = model
+                _backend = backend
+                _service = EmbeddingService(_model)
                 logger.info(
-                    f"[EmbeddingProvider] Loading embedding model on "
-                    f"{device.upper()} from '{model_target}'..."
-                )
-                _model = SentenceTransformer(model_target, device=device)
-                logger.info(
-                    f"[EmbeddingProvider] Embedding model successfully loaded on {device.upper()}"
+                    f"[EmbeddingProvider] Embedding model successfully loaded on {device.upper()} "
+                    f"(backend: {backend})"
                 )
+                ModelResidencyManager.shared().register(RESIDENCY_KEY, unload, baseline)
 
             except Exception as e:
                 logger.error(
@@ -59,9 +360,23 @@ def get_embedder(device: str = "cpu"):
                     exc_info=True,
                 )
                 _model = None
+                _service = None
                 _failed = True
 
-    return _model
+    return _service
+
+def current_backend() -> Optional[str]:
+    return _backend
+
+async def encode_many(texts: list[str], prefix: str = "") -> Optional[np.ndarray]:
+    """
+    Batched async encoding through the shared embedding service.
+    Returns None when the embedding model is unavailable.
+    """
+    embedder = await asyncio.to_thread(get_embedder)
+    if embedder is None:
+        return None
+    return await embedder.encode_many(texts, prefix)
 
 def is_loaded() -> bool:
     return _model is not None
@@ -72,19 +387,20 @@ def reset_failure_state() -> None:
         _failed = False
 
 def unload() -> None:
-    global _model, _failed
+    global _model, _service, _failed, _backend
+    from app.utils.model_residency import ModelResidencyManager
+    ModelResidencyManager.shared().unregister(RESIDENCY_KEY)
     with _lock:
         if _model is not None:
             del _model
             _model = None
+            _service = None
+            _backend = None
             _failed = False
             gc.collect()
 
-            try:
-                import torch
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-            except ImportError:
-                pass
+            torch = sys.modules.get("torch")
+            if torch is not None and torch.cuda.is_available():
+                torch.cuda.empty_cache()
 
             logger.info("[EmbeddingProvider] Embedding model unloaded from memory")
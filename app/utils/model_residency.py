@@ -0,0 +1,238 @@
+import gc
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger("Model Residency")
+
+MB = 1024 * 1024
+
+
+class _Resident:
+    __slots__ = ("key", "unload", "ram", "vram", "loaded_at", "last_used", "users", "pinned")
+
+    def __init__(self, key, unload, ram, vram, pinned):
+        self.key = key
+        self.unload = unload
+        self.ram = ram
+        self.vram = vram
+        self.loaded_at = time.monotonic()
+        self.last_used = self.loaded_at
+        self.users = 0
+        self.pinned = pinned
+
+
+class ModelResidencyManager:
+    """
+    Keeps track of the models that are loaded in the process (TTS engines, RVC, Whisper,
+    Silero VAD, the embedding and emotion models) and unloads idle ones under a memory budget.
+
+    Owners register a model right after loading it together with a callback that frees it,
+    and wrap every use in in_use(). The footprint is the RAM (process RSS) and VRAM
+    (torch.cuda.memory_allocated) growth measured across the load, so it is approximate when
+    several models load at the same time. Whenever a model is registered and the total goes
+    over the "model_ram_budget_mb" / "model_vram_budget_mb" settings (0 = no limit), the least
+    recently used models that are not in use and have been idle for MIN_IDLE_SECONDS are
+    unloaded; their owners load them again on the next use.
+    """
+    MIN_IDLE_SECONDS = 30.0
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._residents = {}
+        self._evictions = 0
+
+    @classmethod
+    def shared(cls) -> "ModelResidencyManager":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @staticmethod
+    def snapshot() -> tuple:
+        """
+        Current (RSS, allocated VRAM) of the process in bytes; pass it to register() as baseline.
+        """
+        ram = 0
+        try:
+            import psutil
+            ram = psutil.Process().memory_info().rss
+        except Exception:
+            pass
+
+        vram = 0
+        torch = sys.modules.get("torch")
+        try:
+            if torch is not None and torch.cuda.is_available():
+                vram = torch.cuda.memory_allocated()
+        except Exception:
+            pass
+        return ram, vram
+
+    @staticmethod
+    def _budgets() -> tuple:
+        try:
+            from app.configuration import configuration
+            settings = configuration.ConfigurationSettings()
+            ram_mb = settings.get_main_setting("model_ram_budget_mb") or 0
+            vram_mb = settings.get_main_setting("model_vram_budget_mb") or 0
+            return max(float(ram_mb), 0.0) * MB, max(float(vram_mb), 0.0) * MB
+        except Exception:
+            return 0.0, 0.0
+
+    def register(self, key: str, unload, baseline: tuple = None, pinned: bool = False) -> None:
+        """
+        Records a freshly loaded model. `unload` is called (from any thread) to evict it.
+        Pinned models are tracked but never evicted.
+        """
+        ram = vram = 0
+        if baseline is not None:
+            current = self.snapshot()
+            ram = max(current[0] - baseline[0], 0)
+            vram = max(current[1] - baseline[1], 0)
+
+        with self._lock:
+            self._residents[key] = _Resident(key, unload, ram, vram, pinned)
+        logger.info(f"'{key}' loaded (~{ram / MB:.0f} MB RAM, ~{vram / MB:.0f} MB VRAM).")
+        self.enforce_budget(exclude=key)
+
+    def unregister(self, key: str) -> None:
+        """
+        Forgets a model that its owner unloaded on its own.
+        """
+        with self._lock:
+            self._residents.pop(key, None)
+
+    def is_resident(self, key: str) -> bool:
+        with self._lock:
+            return key in self._residents
+
+    def touch(self, key: str) -> None:
+        with self._lock:
+            resident = self._residents.get(key)
+            if resident is not None:
+                resident.last_used = time.monotonic()
+
+    @contextmanager
+    def in_use(self, key: str):
+        """
+        Marks a model as busy so it can't be evicted while the block runs.
+        """
+        with self._lock:
+            resident = self._residents.get(key)
+            if resident is not None:
+                resident.users += 1
+                resident.last_used = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                if resident is not None:
+                    resident.users -= 1
+                    resident.last_used = time.monotonic()
+
+    def _totals_locked(self) -> tuple:
+        return (
+            sum(resident.ram for resident in self._residents.values()),
+            sum(resident.vram for resident in self._residents.values()),
+        )
+
+    def enforce_budget(self, exclude: str = None) -> list:
+        """
+        Unloads least recently used idle models until the totals fit the budget.
+
+        Returns:
+            list: Keys of the evicted models.
+        """
+        ram_budget, vram_budget = self._budgets()
+        if not ram_budget and not vram_budget:
+            return []
+
+        evicted = []
+        now = time.monotonic()
+        with self._lock:
+            ram_total, vram_total = self._totals_locked()
+            candidates = sorted(
+                (
+                    resident for resident in self._residents.values()
+                    if resident.key != exclude and not resident.pinned and not resident.users
+                    and now - resident.last_used >= self.MIN_IDLE_SECONDS
+                ),
+                key=lambda resident: resident.last_used
+            )
+            for resident in candidates:
+                over_ram = ram_budget and ram_total > ram_budget
+                over_vram = vram_budget and vram_total > vram_budget
+                if not over_ram and not over_vram:
+                    break
+                if not ((over_ram and resident.ram) or (over_vram and resident.vram)):
+                    continue
+                self._residents.pop(resident.key, None)
+                ram_total -= resident.ram
+                vram_total -= resident.vram
+                evicted.append(resident)
+
+        for resident in evicted:
+            self._unload(resident)
+
+        if evicted:
+            gc.collect()
+            torch = sys.modules.get("torch")
+            try:
+                if torch is not None and torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except Exception:
+                pass
+            logger.info(
+                f"Evicted {', '.join(resident.key for resident in evicted)} to stay within the model memory budget "
+                f"(now ~{ram_total / MB:.0f} MB RAM, ~{vram_total / MB:.0f} MB VRAM)."
+            )
+        elif (ram_budget and ram_total > ram_budget) or (vram_budget and vram_total > vram_budget):
+            logger.warning("Loaded models exceed the memory budget, but every other model is in use.")
+
+        return [resident.key for resident in evicted]
+
+    def _unload(self, resident) -> None:
+        try:
+            resident.unload()
+            self._evictions += 1
+        except Exception as e:
+            logger.error(f"Failed to unload '{resident.key}': {e}", exc_info=True)
+
+    def evict(self, key: str) -> bool:
+        with self._lock:
+            resident = self._residents.get(key)
+            if resident is None or resident.users:
+                return False
+            self._residents.pop(key)
+        self._unload(resident)
+        return True
+
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        ram_budget, vram_budget = self._budgets()
+        with self._lock:
+            ram_total, vram_total = self._totals_locked()
+            return {
+                "ram_mb": ram_total / MB,
+                "vram_mb": vram_total / MB,
+                "ram_budget_mb": ram_budget / MB,
+                "vram_budget_mb": vram_budget / MB,
+                "evictions": self._evictions,
+                "models": {
+                    resident.key: {
+                        "ram_mb": resident.ram / MB,
+                        "vram_mb": resident.vram / MB,
+                        "idle_seconds": now - resident.last_used,
+                        "in_use": resident.users > 0,
+                        "pinned": resident.pinned,
+                    }
+                    for resident in sorted(self._residents.values(), key=lambda r: r.last_used, reverse=True)
+                },
+            }
@@ -2473,7 +2473,8 @@ class SoulCompanion:
         parsed_json, raw_text = await self._llm_call_stream(
             system_prompt, user_msg, 
             on_chunk_cb=parser.feed,
-            temperature=0.3, max_tokens=1000
+            temperature=0.3, max_tokens=1000,
+            priority="foreground" if is_explicit_event else "background"
         )
 
         if parsed_json:
@@ -2652,7 +2653,8 @@ class SoulCompanion:
         user_msg: str | list,
         on_chunk_cb,
         temperature: float = 0.3,
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        priority: str = "foreground"
     ) -> tuple[Optional[dict], str]:
         method = getattr(self.sys, "conversation_method", "Mistral AI")
         try:
@@ -2671,20 +2673,25 @@ class SoulCompanion:
             gen_kwargs = self.sys._get_gen_kwargs(method) if hasattr(self.sys, "_get_gen_kwargs") else {}
             gen_kwargs["temperature"] = temperature
             gen_kwargs["max_tokens"] = max_tokens
+            gen_kwargs["priority"] = priority
 
-            async for data_chunk in provider.generate_stream(messages, **gen_kwargs):
-                if not data_chunk:
-                    continue
-                chunk = data_chunk
-                if method == "OpenRouter" and isinstance(chunk, str):
-                    try:
-                        chunk = chunk.encode('latin1').decode('utf-8')
-                    except Exception:
-                        pass
-                
-                full_text += chunk
-                if on_chunk_cb:
-                    on_chunk_cb(chunk)
+            stream = provider.generate_stream(messages, **gen_kwargs)
+            try:
+                async for data_chunk in stream:
+                    if not data_chunk:
+                        continue
+                    chunk = data_chunk
+                    if method == "OpenRouter" and isinstance(chunk, str):
+                        try:
+                            chunk = chunk.encode('latin1').decode('utf-8')
+                        except Exception:
+                            pass
+
+                    full_text += chunk
+                    if on_chunk_cb:
+                        on_chunk_cb(chunk)
+            finally:
+                await stream.aclose()
 
             if not full_text:
                 return None, ""
@@ -1,5 +1,5 @@
+import os
 import re
-import torch
 import numpy as np
 import json
 import logging
@@ -16,131 +16,372 @@ from app.utils.embedding_provider import get_embedder as _get_embedder
 logger = logging.getLogger("SoulMemory")
 
 
-class TopicRAG:
+class TopicVectorStore:
     """
-    RAG over per-character topic files with vector caching.
+    Persistent embedding store for the topic files of one memory directory.
+
+    Vectors are kept pre-normalized in a memory-mapped float32 matrix next to the topics,
+    and a JSON manifest maps every topic file to its matrix row together with the content
+    hash, mtime and size it was embedded from. Files whose mtime and size still match the
+    manifest are not even read, so a cold start needs no re-embedding at all.
+
+    Each view embeds its own text per topic, so the thresholds of its callers keep their
+    meaning: VIEW_CONTENT (TopicRAG and dedup) the raw head of the file, VIEW_PROMPT (the
+    prompt-time topic search) a labelled short head, or the tail of a diary.
     """
-    RAG_THRESHOLD = 4
-    EMBED_CHARS   = 600
-    PASS_CHARS    = 8000
+    MATRIX_NAME   = ".topic_vectors.npy"
+    MANIFEST_NAME = ".topic_vectors.json"
+    VERSION       = 2
+    MIN_CAPACITY  = 16
+
+    VIEW_CONTENT = "content"
+    VIEW_PROMPT  = "prompt"
+    VIEWS        = (VIEW_CONTENT, VIEW_PROMPT)
 
-    USE_E5_PREFIXES   = True
+    EMBED_CHARS       = 600
+    PROMPT_HEAD_CHARS = 200
     E5_QUERY_PREFIX   = "query: "
     E5_PASSAGE_PREFIX = "passage: "
 
-    _VECTOR_CACHE: dict[str, dict[str, tuple[str, np.ndarray]]] = {}
-    _CACHE_LOCK = threading.Lock()
+    _instances: dict[tuple[str, str], "TopicVectorStore"] = {}
+    _instances_lock = threading.Lock()
 
-    def __init__(self, topics_dir: Path):
-        self.topics_dir = topics_dir
+    @classmethod
+    def for_dir(cls, topics_dir: Path, view: str = VIEW_CONTENT) -> "TopicVectorStore":
+        key = (str(Path(topics_dir).resolve()), view)
+        with cls._instances_lock:
+            store = cls._instances.get(key)
+            if store is None:
+                store = cls(Path(topics_dir), view)
+                cls._instances[key] = store
+            return store
+
+    def __init__(self, topics_dir: Path, view: str = VIEW_CONTENT):
+        if view not in self.VIEWS:
+            raise ValueError(f"Unknown topic vector view: {view}")
+        suffix = "" if view == self.VIEW_CONTENT else f".{view}"
+        self.topics_dir    = topics_dir
+        self.view          = view
+        self.matrix_path   = topics_dir / self.MATRIX_NAME.replace(".npy", f"{suffix}.npy")
+        self.manifest_path = topics_dir / self.MANIFEST_NAME.replace(".json", f"{suffix}.json")
+        self.lock          = threading.RLock()
+        self._entries: dict[str, dict] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._dim      = 0
+        self._loaded   = False
+
+    def embedding_text(self, name: str, content: str) -> str:
+        """
+        Text a topic is embedded from in this store's view.
+        """
+        if self.view == self.VIEW_CONTENT:
+            return content[:self.EMBED_CHARS]
+        stem = Path(name).stem
+        if name.lower().startswith("diary_"):
+            return f"Diary: {stem}. Recent thoughts: {content[-self.EMBED_CHARS:]}"
+        return f"Topic: {stem}. Content: {content[:self.PROMPT_HEAD_CHARS]}"
 
-    def _cache_bucket(self) -> dict:
-        key = str(self.topics_dir.resolve())
-        with self._CACHE_LOCK:
-            return self._VECTOR_CACHE.setdefault(key, {})
-
-    def _encode_topics_cached(self, embedder, names: list[str], snippets: list[str]) -> np.ndarray:
-        bucket  = self._cache_bucket()
-        hashes  = [hashlib.md5(s.encode("utf-8", "ignore")).hexdigest() for s in snippets]
-        vectors: list = [None] * len(names)
-        missing_idx = []
-
-        with self._CACHE_LOCK:
-            for i, (name, h) in enumerate(zip(names, hashes)):
-                cached = bucket.get(name)
-                if cached is not None and cached[0] == h:
-                    vectors[i] = cached[1]
-                else:
-                    missing_idx.append(i)
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8", "ignore"), digest_size=16).hexdigest()
 
-        if missing_idx:
-            raw_missing_snippets = [snippets[i] for i in missing_idx]
-            prefixed_snippets = [
-                f"{self.E5_PASSAGE_PREFIX}{s}" if self.USE_E5_PREFIXES else s
-                for s in raw_missing_snippets
-            ]
-            
-            new_vecs = embedder.encode(prefixed_snippets, convert_to_numpy=True)
-            with self._CACHE_LOCK:
-                for pos, i in enumerate(missing_idx):
-                    vec = new_vecs[pos]
-                    vectors[i] = vec
-                    bucket[names[i]] = (hashes[i], vec)
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / (norms + 1e-9)
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            if not (self.manifest_path.exists() and self.matrix_path.exists()):
+                return
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            if manifest.get("version") != self.VERSION:
+                return
+            matrix = np.load(self.matrix_path, mmap_mode="r+")
+            if matrix.ndim != 2 or matrix.dtype != np.float32 or matrix.shape[1] != manifest.get("dim"):
+                return
+            entries = {
+                name: entry for name, entry in manifest.get("topics", {}).items()
+                if 0 <= entry.get("row", -1) < matrix.shape[0]
+            }
+            self._matrix  = matrix
+            self._dim     = matrix.shape[1]
+            self._entries = entries
+        except Exception as e:
+            logger.warning(f"[Soul Memory] Topic vector store at {self.topics_dir} is unreadable ({e}); rebuilding.")
+            self._matrix  = None
+            self._entries = {}
+
+    def _release_matrix(self):
+        # Dropping the last reference unmaps the file, which Windows requires before os.replace.
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+        self._matrix = None
+
+    def _ensure_capacity(self, rows_needed: int, dim: int):
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if rows_needed <= capacity:
+            return
+
+        new_capacity = max(self.MIN_CAPACITY, capacity * 2, rows_needed)
+        tmp_path = self.matrix_path.with_name(self.matrix_path.name + ".tmp")
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, dim))
+        if capacity:
+            grown[:capacity] = self._matrix[:capacity]
+        grown.flush()
+        del grown
+
+        self._release_matrix()
+        os.replace(tmp_path, self.matrix_path)
+        self._matrix = np.load(self.matrix_path, mmap_mode="r+")
+        self._dim    = dim
+
+    def _free_rows(self) -> list[int]:
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        used = {entry["row"] for entry in self._entries.values()}
+        return [row for row in range(capacity) if row not in used]
+
+    def _save_manifest(self):
+        manifest = {
+            "version": self.VERSION,
+            "dim": self._dim,
+            "topics": self._entries,
+        }
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        try:
+            tmp_path.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self.manifest_path)
+        except Exception as e:
+            logger.warning(f"[Soul Memory] Topic vector manifest write failed: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def _store(self, embedder, pending: dict[str, tuple[str, str, float, int]]):
+        """
+        Embeds pending topics in one batch and writes them into their rows.
+        pending maps name -> (embedding text, hash, mtime, size).
+        """
+        names = list(pending.keys())
+        texts = [f"{self.E5_PASSAGE_PREFIX}{pending[n][0]}" for n in names]
+        vectors = self._normalize(embedder.encode(texts, convert_to_numpy=True))
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+
+        dim = vectors.shape[1]
+        if self._matrix is not None and self._dim != dim:
+            logger.info(f"[Soul Memory] Embedding size changed ({self._dim} -> {dim}); resetting topic vectors.")
+            self._release_matrix()
+            self._entries = {}
+
+        fresh = sum(1 for n in names if n not in self._entries)
+        self._ensure_capacity(len(self._entries) + fresh, dim)
+
+        free_rows = iter(self._free_rows())
+        for pos, name in enumerate(names):
+            entry = self._entries.get(name)
+            row = entry["row"] if entry is not None else next(free_rows)
+            self._matrix[row] = vectors[pos]
+            _, digest, mtime, size = pending[name]
+            self._entries[name] = {"row": row, "hash": digest, "mtime": mtime, "size": size}
+        self._matrix.flush()
+
+    def refresh(self, embedder) -> bool:
+        """
+        Brings the store in line with the topic files on disk, embedding only changed files.
+        """
+        with self.lock:
+            self._load()
+            try:
+                paths = list(self.topics_dir.glob("*.md"))
+            except Exception:
+                paths = []
+
+            changed = False
+            on_disk = set()
+            pending = {}
+            for path in paths:
+                name = path.name
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                on_disk.add(name)
+                entry = self._entries.get(name)
+                if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                    continue
+                try:
+                    text = self.embedding_text(name, path.read_text(encoding="utf-8"))
+                except Exception:
+                    continue
+                digest = self._hash(text)
+                if entry and entry["hash"] == digest:
+                    entry["mtime"], entry["size"] = stat.st_mtime, stat.st_size
+                    changed = True
+                    continue
+                pending[name] = (text, digest, stat.st_mtime, stat.st_size)
 
-        with self._CACHE_LOCK:
-            stale = set(bucket.keys()) - set(names)
-            for s in stale:
-                bucket.pop(s, None)
+            for name in set(self._entries) - on_disk:
+                self._entries.pop(name, None)
+                changed = True
 
-        return np.vstack(vectors)
+            if pending:
+                self._store(embedder, pending)
+                logger.info(f"[Soul Memory] Embedded {len(pending)} changed topic file(s) in {self.topics_dir}.")
+                changed = True
 
-    def _load_all_topics(self) -> dict[str, str]:
-        result = {}
+            if changed:
+                self._save_manifest()
+            return changed
+
+    def update(self, topic_path: Path, content: str, embedder=None):
+        """
+        Re-embeds a single topic right after it was written.
+        """
+        embedder = embedder or _get_embedder()
+        if embedder is None:
+            return
+        try:
+            stat = topic_path.stat()
+        except OSError:
+            return
+        text = self.embedding_text(topic_path.name, content)
+        digest = self._hash(text)
+        with self.lock:
+            self._load()
+            entry = self._entries.get(topic_path.name)
+            if entry and entry["hash"] == digest:
+                entry["mtime"], entry["size"] = stat.st_mtime, stat.st_size
+            else:
+                self._store(embedder, {topic_path.name: (text, digest, stat.st_mtime, stat.st_size)})
+            self._save_manifest()
+
+    def encode_query(self, embedder, query_text: str) -> np.ndarray:
+        return self._normalize(
+            embedder.encode(f"{self.E5_QUERY_PREFIX}{str(query_text)[:1000]}", convert_to_numpy=True)
+        )
+
+    def search(self, embedder, query_text: str = None, query_vec: np.ndarray = None) -> list[tuple[str, float]]:
+        """
+        Returns every stored topic with its cosine similarity to the query, best first.
+        """
+        self.refresh(embedder)
+        if query_vec is None:
+            query_vec = self.encode_query(embedder, query_text)
+        with self.lock:
+            if not self._entries or self._matrix is None:
+                return []
+            names = list(self._entries.keys())
+            rows  = np.fromiter((self._entries[n]["row"] for n in names), dtype=np.int64, count=len(names))
+            scores = self._matrix[rows] @ np.asarray(query_vec, dtype=np.float32)
+        order = np.argsort(scores)[::-1]
+        return [(names[i], float(scores[i])) for i in order]
+
+
+class TopicRAG:
+    """
+    RAG over per-character topic files, backed by the persistent TopicVectorStore.
+    """
+    RAG_THRESHOLD = 4
+    PASS_CHARS    = 8000
+
+    def __init__(self, topics_dir: Path, view: str = TopicVectorStore.VIEW_CONTENT):
+        self.topics_dir = topics_dir
+        self.store      = TopicVectorStore.for_dir(topics_dir, view)
+
+    def _topic_paths(self) -> list[Path]:
         if not self.topics_dir.exists():
-            return result
-        
+            return []
         try:
-            paths = sorted(
+            return sorted(
                 self.topics_dir.glob("*.md"),
                 key=lambda p: p.stat().st_mtime,
                 reverse=True,
             )
         except Exception:
-            paths = list(self.topics_dir.glob("*.md"))
-        for p in paths:
+            return list(self.topics_dir.glob("*.md"))
+
+    def _read_topics(self, names) -> dict[str, str]:
+        result = {}
+        for name in names:
             try:
-                result[p.name] = p.read_text(encoding="utf-8")
+                result[name] = (self.topics_dir / name).read_text(encoding="utf-8")
             except Exception:
                 pass
         return result
 
-    def get_relevant_topics(self, query_text: str, max_topics: int = 3) -> dict[str, str]:
-        all_topics = self._load_all_topics()
-        if not all_topics:
-            return {}
+    def retrieve(
+        self,
+        query_text: str,
+        max_topics: int = 3,
+        min_score: float = None,
+        explicit=(),
+    ) -> dict[str, str]:
+        """
+        Single retrieval entry point for topic files.
 
-        if len(all_topics) <= self.RAG_THRESHOLD:
-            return {k: v[:self.PASS_CHARS] for k, v in all_topics.items()}
+        Topics named in `explicit` are always returned; the rest are ranked against the query
+        through the vector store and filled in up to max_topics. Only the returned files are read.
+
+        Args:
+            query_text: Text the topics are ranked against.
+            max_topics: Upper bound for ranked results (explicit topics count towards it).
+            min_score: Ranked topics must score above this cosine similarity.
+            explicit: Lower-cased topic file names that must be included.
+
+        Returns:
+            dict: file name -> full file content, explicit topics first, then by relevance.
+        """
+        explicit = {name.lower() for name in explicit}
+        selected = [p.name for p in self._topic_paths() if p.name.lower() in explicit]
 
         embedder = _get_embedder()
-        if not embedder:
-            items = list(all_topics.items())[:max_topics]
-            return {k: v[:self.PASS_CHARS] for k, v in items}
+        if embedder and len(selected) < max_topics:
+            try:
+                ranked = self.store.search(embedder, query_text)
+            except Exception as e:
+                logger.warning(f"[Soul Memory] Topic ranking failed: {e}")
+                ranked = []
 
-        try:
-            names    = list(all_topics.keys())
-            snippets = [v[:self.EMBED_CHARS] for v in all_topics.values()]
+            for name, score in ranked:
+                if len(selected) >= max_topics or (min_score is not None and score <= min_score):
+                    break
+                if name.lower() not in explicit:
+                    selected.append(name)
 
-            safe_query_text = str(query_text)[:1000]
-            formatted_query = f"{self.E5_QUERY_PREFIX}{safe_query_text}" if self.USE_E5_PREFIXES else safe_query_text
-            query_vec  = embedder.encode(formatted_query, convert_to_numpy=True)
-            topic_vecs = self._encode_topics_cached(embedder, names, snippets)
+        return self._read_topics(selected)
 
-            q_norm = query_vec / (np.linalg.norm(query_vec) + 1e-9)
-            t_norm = topic_vecs / (np.linalg.norm(topic_vecs, axis=1, keepdims=True) + 1e-9)
-            scores = t_norm @ q_norm
+    def get_relevant_topics(self, query_text: str, max_topics: int = 3) -> dict[str, str]:
+        paths = self._topic_paths()
+        if not paths:
+            return {}
 
-            top_idx  = np.argsort(scores)[::-1][:max_topics]
-            selected = {names[i]: all_topics[names[i]][:self.PASS_CHARS] for i in top_idx}
+        if len(paths) <= self.RAG_THRESHOLD:
+            all_topics = self._read_topics(p.name for p in paths)
+            return {k: v[:self.PASS_CHARS] for k, v in all_topics.items()}
 
-            logger.info(
-                f"[Soul Memory] RAG selected {len(selected)}/{len(all_topics)} topics: "
-                f"{list(selected.keys())}"
-            )
-            return selected
+        if not _get_embedder():
+            recent = self._read_topics(p.name for p in paths[:max_topics])
+            return {k: v[:self.PASS_CHARS] for k, v in recent.items()}
 
-        except Exception as e:
-            logger.warning(f"[Soul Memory] RAG embedding error ({e}). Using fallback.")
-            items = list(all_topics.items())[:max_topics]
-            return {k: v[:self.PASS_CHARS] for k, v in items}
+        selected = {
+            k: v[:self.PASS_CHARS]
+            for k, v in self.retrieve(query_text, max_topics=max_topics).items()
+        }
+        logger.info(
+            f"[Soul Memory] RAG selected {len(selected)}/{len(paths)} topics: "
+            f"{list(selected.keys())}"
+        )
+        return selected
 
     DEDUP_THRESHOLD = 0.82
 
     def find_similar_topic(self, query_text: str, threshold: float = None) -> Optional[str]:
         threshold = self.DEDUP_THRESHOLD if threshold is None else threshold
 
-        all_topics = self._load_all_topics()
-        if not all_topics:
+        if not self.topics_dir.exists():
             return None
 
         embedder = _get_embedder()
@@ -148,25 +389,15 @@ class TopicRAG:
             return None
 
         try:
-            names    = list(all_topics.keys())
-            snippets = [v[:self.EMBED_CHARS] for v in all_topics.values()]
-
-            safe_query_text = str(query_text)[:1000]
-            formatted_query = f"{self.E5_QUERY_PREFIX}{safe_query_text}" if self.USE_E5_PREFIXES else safe_query_text
-            query_vec  = embedder.encode(formatted_query, convert_to_numpy=True)
-            topic_vecs = self._encode_topics_cached(embedder, names, snippets)
-
-            q_norm = query_vec / (np.linalg.norm(query_vec) + 1e-9)
-            t_norm = topic_vecs / (np.linalg.norm(topic_vecs, axis=1, keepdims=True) + 1e-9)
-            scores = t_norm @ q_norm
-
-            best_idx = int(np.argmax(scores))
-            if scores[best_idx] >= threshold:
-                logger.info(
-                    f"[Soul Memory] Dedup match: '{names[best_idx]}' "
-                    f"(similarity={scores[best_idx]:.3f} >= {threshold})"
-                )
-                return names[best_idx]
+            ranked = self.store.search(embedder, query_text)
+            if ranked:
+                best_name, best_score = ranked[0]
+                if best_score >= threshold:
+                    logger.info(
+                        f"[Soul Memory] Dedup match: '{best_name}' "
+                        f"(similarity={best_score:.3f} >= {threshold})"
+                    )
+                    return best_name
 
         except Exception as e:
             logger.warning(f"[Soul Memory] Dedup similarity check failed: {e}")
@@ -488,12 +719,18 @@ class SoulMemoryAgent:
         try:
             tmp.write_text(stripped, encoding="utf-8")
             tmp.replace(topic_path)
-            return True
         except Exception as e:
             logger.error(f"[Soul Memory] Topic write error for {topic_path.name}: {e}")
             tmp.unlink(missing_ok=True)
             return False
 
+        try:
+            for view in TopicVectorStore.VIEWS:
+                TopicVectorStore.for_dir(topic_path.parent, view).update(topic_path, stripped)
+        except Exception as e:
+            logger.warning(f"[Soul Memory] Topic vector update failed for {topic_path.name}: {e}")
+        return True
+
     def _read_user_profile(self, character_name: str, chat_id: str = None) -> str:
         _, _, usr_path, *_ = self.get_memory_paths(character_name, chat_id)
         if not usr_path.exists():
@@ -882,7 +1119,7 @@ class SoulMemoryAgent:
                 else:
                     full_content = f"# Personal Diary: {date_str}\n\n**[{time_str}]**\n{diary_content}"
 
-                written = self._safe_write_topic(topic_path, full_content)
+                written = await asyncio.to_thread(self._safe_write_topic, topic_path, full_content)
                 if written:
                     self._append_log(
                         log_path,
@@ -1101,7 +1338,7 @@ class SoulMemoryAgent:
                         )
 
                         if new_content:
-                            written    = self._safe_write_topic(topic_path, new_content)
+                            written    = await asyncio.to_thread(self._safe_write_topic, topic_path, new_content)
                             op         = "updated" if existing_content else "created"
                             log_status = "OK" if written else "SKIPPED"
                             logger.info(f"[Soul Memory] Topic {op}: {safe_fname} | write={log_status}")
@@ -8,6 +8,7 @@ import numpy as np
 
 from PyQt6.QtCore import QThread, pyqtSignal
 from faster_whisper import WhisperModel
+from app.utils.model_residency import ModelResidencyManager
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -28,6 +29,7 @@ class AudioInputWorker(QThread):
         self.CHUNK_SIZE = 512
         
         logger.info("Loading Silero VAD model...")
+        baseline = ModelResidencyManager.snapshot()
         try:
             silero_local_path = os.path.join(os.getcwd(), "app", "utils", "speech-to-text", "silero-vad")
 
@@ -42,6 +44,8 @@ class AudioInputWorker(QThread):
                                                    force_reload=False,
                                                    trust_repo=True)
             self.get_speech_timestamps, _, _, _, _ = utils
+            # The VAD runs on every microphone block, so it is tracked but never evicted.
+            ModelResidencyManager.shared().register("vad:silero", lambda: None, baseline, pinned=True)
             logger.info("Silero VAD Loaded successfully!")
         except Exception as e:
             logger.error(f"Error loading Silero VAD: {e}")
@@ -147,11 +151,14 @@ class AudioInputWorker(QThread):
     def stop(self):
         self.is_running = False
         self.wait()
+        ModelResidencyManager.shared().unregister("vad:silero")
 
 class STTWorker(QThread):
     text_ready_signal = pyqtSignal(str)
     status_signal = pyqtSignal(str)
 
+    RESIDENCY_KEY = "stt:whisper"
+
     def __init__(self, model_size="small", device="cuda", compute_type="float16"):
         super().__init__()
         self.queue = []
@@ -166,6 +173,7 @@ class STTWorker(QThread):
     def load_model(self):
         if self.model is None:
             logger.info(f"Loading Faster-Whisper ({self.model_size}) on {self.device}...")
+            baseline = ModelResidencyManager.snapshot()
 
             try:
                 self.model = WhisperModel(self.model_size, device=self.device, compute_type=self.compute_type)
@@ -181,6 +189,11 @@ class STTWorker(QThread):
                     
                 logger.info("Faster-Whisper Loaded on CPU!")
 
+            ModelResidencyManager.shared().register(self.RESIDENCY_KEY, self.unload_model, baseline)
+
+    def unload_model(self):
+        self.model = None
+
     def add_audio(self, audio_bytes):
         self.queue.append(audio_bytes)
 
@@ -194,12 +207,15 @@ class STTWorker(QThread):
                 audio_bytes = self.queue.pop(0)
                 
                 try:
+                    self.load_model()
                     audio_np = np.frombuffer(audio_bytes, np.int16).flatten().astype(np.float32) / 32768.0
-                    segments, info = self.model.transcribe(audio_np, beam_size=5)
-                    
-                    full_text = ""
-                    for segment in segments:
-                        full_text += segment.text
+                    model = self.model
+                    with ModelResidencyManager.shared().in_use(self.RESIDENCY_KEY):
+                        segments, info = model.transcribe(audio_np, beam_size=5)
+
+                        full_text = ""
+                        for segment in segments:
+                            full_text += segment.text
                     
                     full_text = full_text.strip()
                     hallucinations = [
@@ -265,3 +281,5 @@ class STTWorker(QThread):
         self.queue.append(b'')
         self.quit()
         self.wait()
+        ModelResidencyManager.shared().unregister(self.RESIDENCY_KEY)
+        self.model = None
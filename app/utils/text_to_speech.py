@@ -1,13 +1,17 @@
 import os
 import io
 import re
+import json
 import uuid
 import queue
 import time
-import shutil
 import torch
+import hashlib
+import inspect
+import tempfile
 import asyncio
 import logging
+import functools
 import edge_tts
 import threading
 import contextlib
@@ -15,6 +19,8 @@ import numpy as np
 import soundfile as sf
 import sounddevice as sd
 from typing import Optional
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from TTS.api import TTS
 from kokoro import KPipeline
@@ -25,6 +31,7 @@ from qwen_tts import Qwen3TTSModel
 from PyQt6.QtCore import QThread, pyqtSignal
 
 from app.configuration import configuration
+from app.utils.model_residency import ModelResidencyManager
 from rvc_python.infer import RVCInference
 
 import torch.serialization
@@ -44,26 +51,481 @@ os.environ["HUGGINGFACE_HUB_CACHE"] = CACHE_DIR
 
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-def fix_rvc_sample_rate(file_path, base_file_path=None, target_sr=48000):
-    if not file_path or not os.path.exists(file_path):
-        return file_path
+class AudioFrame:
+    """
+    A piece of synthesized speech kept in memory: float32 samples (mono, or frames x channels)
+    and their sample rate.
+
+    Engines return frames, RVC converts them and the playback workers play them as they are;
+    audio only reaches the disk when a segment is persisted for replay.
+    """
+    __slots__ = ("samples", "sample_rate")
+
+    def __init__(self, samples, sample_rate):
+        if isinstance(samples, torch.Tensor):
+            samples = samples.detach().cpu().to(torch.float32).numpy()
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim > 1 and 1 in samples.shape:
+            samples = samples.reshape(-1)
+        self.samples = samples
+        self.sample_rate = int(sample_rate)
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def duration(self):
+        return len(self.samples) / self.sample_rate if self.sample_rate else 0.0
+
+    def mono(self):
+        return self.samples.mean(axis=1) if self.samples.ndim > 1 else self.samples
+
+    def resample(self, sample_rate):
+        """
+        Linear resampling; good enough to splice speech pieces with slightly different rates.
+        """
+        sample_rate = int(sample_rate)
+        if sample_rate == self.sample_rate or not len(self.samples):
+            return self
+        target_length = max(1, int(round(len(self.samples) * sample_rate / self.sample_rate)))
+        positions = np.linspace(0, len(self.samples) - 1, target_length)
+        indices = np.arange(len(self.samples))
+        if self.samples.ndim > 1:
+            samples = np.stack(
+                [np.interp(positions, indices, self.samples[:, c]) for c in range(self.samples.shape[1])], axis=1
+            )
+        else:
+            samples = np.interp(positions, indices, self.samples)
+        return AudioFrame(samples, sample_rate)
+
+    @classmethod
+    def concatenate(cls, frames):
+        frames = [frame for frame in frames if frame is not None and len(frame)]
+        if not frames:
+            return None
+        sample_rate = frames[0].sample_rate
+        return cls(np.concatenate([frame.resample(sample_rate).samples for frame in frames]), sample_rate)
+
+    @classmethod
+    def from_segment(cls, segment):
+        samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
+        samples /= float(1 << (8 * segment.sample_width - 1))
+        if segment.channels > 1:
+            samples = samples.reshape(-1, segment.channels)
+        return cls(samples, segment.frame_rate)
+
+    @classmethod
+    def from_encoded(cls, data, format):
+        return cls.from_segment(AudioSegment.from_file(io.BytesIO(data), format=format))
+
+    @classmethod
+    def read(cls, file_path):
+        data, sample_rate = sf.read(file_path, dtype='float32')
+        return cls(data, sample_rate)
+
+    def write(self, file_path):
+        sf.write(file_path, self.samples, self.sample_rate)
+
+    def to_wav_bytes(self):
+        buffer = io.BytesIO()
+        sf.write(buffer, self.samples, self.sample_rate, format="WAV")
+        return buffer.getvalue()
+
+
+def _rvc_convert_in_memory(rvc, frame):
+    """
+    Mirrors RVCInference.infer_file without its input/output files. Returns None when the
+    installed rvc_python does not expose the pieces this relies on (or HuBERT is not loaded
+    yet), in which case the caller goes through infer_file.
+    """
+    vc = getattr(rvc, "vc", None)
+    if vc is None or getattr(vc, "hubert_model", None) is None or not getattr(rvc, "current_model", None):
+        return None
+    try:
+        import librosa
+        from rvc_python.modules.vc import pipeline as rvc_pipeline
+    except ImportError:
+        return None
+
+    audio = frame.mono()
+    if frame.sample_rate != 16000:
+        audio = librosa.resample(audio, orig_sr=frame.sample_rate, target_sr=16000)
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    audio_max = np.abs(audio).max() / 0.95 if len(audio) else 0
+    if audio_max > 1:
+        audio /= audio_max
+
+    file_index = rvc.models[rvc.current_model].get("index", "") or ""
+    file_index = file_index.strip(" ").strip('"').strip("\n").strip('"').strip(" ").replace("trained", "added")
+
+    # The harvest f0 cache is keyed by the input path, so every frame needs its own key.
+    cache_key = f"memory://{uuid.uuid4().hex}.wav"
     try:
-        data, sr = sf.read(file_path, dtype='float32')
+        converted = vc.pipeline.pipeline(
+            vc.hubert_model, vc.net_g, 0, audio, cache_key, [0, 0, 0],
+            int(rvc.f0up_key), rvc.f0method, file_index, rvc.index_rate, vc.if_f0,
+            rvc.filter_radius, vc.tgt_sr, rvc.resample_sr, rvc.rms_mix_rate, vc.version,
+            rvc.protect, "",
+        )
+    finally:
+        getattr(rvc_pipeline, "input_audio_path2wav", {}).pop(cache_key, None)
 
-        if sr != target_sr:
-            if base_file_path and os.path.exists(base_file_path):
-                data_base, sr_base = sf.read(base_file_path, dtype='float32')
-                dur_base = len(data_base) / sr_base
-                if dur_base > 0:
-                    target_sr = int(round(len(data) / dur_base))
+    converted = np.asarray(converted)
+    if converted.dtype == np.int16:
+        converted = converted.astype(np.float32) / 32768.0
+    return AudioFrame(converted, vc.tgt_sr)
 
-            sf.write(file_path, data, target_sr)
-            logger.info(f"[RVC Fix] Corrected header from {sr} Hz to {target_sr} Hz")
+
+def convert_with_rvc(rvc, frame, target_sr=48000):
+    """
+    Runs the loaded RVC model over a frame and returns the converted frame.
+    """
+    converted = None
+    try:
+        converted = _rvc_convert_in_memory(rvc, frame)
     except Exception as e:
-        logger.warning(f"Failed to fix RVC sample rate: {e}")
-    return file_path
+        logger.warning(f"In-memory RVC conversion failed, falling back to files: {e}")
+
+    if converted is None:
+        # rvc_python can only read its input from a file (this also loads HuBERT on first use).
+        fd, input_path = tempfile.mkstemp(prefix="sow_rvc_", suffix=".wav")
+        os.close(fd)
+        output_path = f"{os.path.splitext(input_path)[0]}_out.wav"
+        try:
+            frame.write(input_path)
+            rvc.infer_file(input_path, output_path)
+            converted = AudioFrame.read(output_path)
+        finally:
+            for path in (input_path, output_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    if converted.sample_rate != target_sr:
+        corrected_sr = target_sr
+        if frame.duration > 0:
+            corrected_sr = int(round(len(converted) / frame.duration))
+        logger.info(f"[RVC Fix] Corrected sample rate from {converted.sample_rate} Hz to {corrected_sr} Hz")
+        converted.sample_rate = corrected_sr
+    return converted
+
+
+class SharedRVC:
+    """
+    The single RVC inference instance shared by every TTS engine and worker.
+
+    The voice model is only reloaded when a request needs a different model or different
+    conversion settings. Conversions hold the lock, so a worker in another thread can't swap
+    the model in the middle of one; the instance is registered with the residency manager
+    and rebuilt on the next conversion after an eviction.
+    """
+    RESIDENCY_KEY = "rvc"
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.rvc = None
+        self.params = None
+
+    @classmethod
+    def shared(cls) -> "SharedRVC":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _prepare(self, char_config):
+        f0up_key   = char_config.get("rvc_f0up_key",   0)
+        index_rate = char_config.get("rvc_index_rate", 0.75)
+        protect    = char_config.get("rvc_protect",    0.5)
+        model_name = os.path.splitext(os.path.basename(char_config["rvc_file"]))[0]
+
+        residency = ModelResidencyManager.shared()
+        if self.rvc is None:
+            logger.info("Loading RVC model...")
+            baseline = residency.snapshot()
+            try:
+                self.rvc = RVCInference(
+                    models_dir="assets/rvc_models",
+                    device="cuda:0" if torch.cuda.is_available() else "cpu:0",
+                    f0up_key=f0up_key, index_rate=index_rate, protect=protect
+                )
+            except Exception as e:
+                logger.error(f"Error loading RVC model: {e}")
+                raise RuntimeError("Failed to load RVC model.")
+            self.params = None
+            residency.register(self.RESIDENCY_KEY, self.unload, baseline)
+            logger.info("RVC model loaded successfully.")
+
+        params = (model_name, f0up_key, index_rate, protect)
+        if self.params != params:
+            self.rvc.load_model(model_name)
+            self.rvc.set_params(f0up_key=f0up_key, index_rate=index_rate, protect=protect)
+            self.params = params
+        return self.rvc
+
+    def convert(self, frame, char_config):
+        with self.lock:
+            rvc = self._prepare(char_config)
+            with ModelResidencyManager.shared().in_use(self.RESIDENCY_KEY):
+                return convert_with_rvc(rvc, frame)
+
+    async def aconvert(self, frame, char_config):
+        return await asyncio.to_thread(self.convert, frame, char_config)
+
+    def unload(self):
+        with self.lock:
+            self.rvc = None
+            self.params = None
+
+
+def split_sentences(text):
+    return [sentence for sentence in (s.strip() for s in re.split(r'(?<=[.!?…])\s+', text)) if sentence]
+
+_CACHE_VOICE_SETTINGS = (
+    "voice_type", "qwen_mode", "qwen_model_size", "qwen_prompt", "qwen_style_instruct",
+    "qwen_cloning_ref_path", "qwen_cloning_ref_text", "qwen_language",
+)
+_CACHE_RVC_SETTINGS = ("rvc_file", "rvc_f0up_key", "rvc_index_rate", "rvc_protect")
+
+
+class TTSPhraseCache:
+    """
+    Content-addressed on-disk cache of synthesized phrases.
+
+    Entries are keyed by a hash of the engine, the character's voice settings (voice type or
+    ElevenLabs voice id, language, Qwen voice options, RVC model and params) and the
+    whitespace-normalized text, and stored as FLAC under app/data/tts_cache. Only phrases up
+    to MAX_TEXT_CHARS are cached, which covers greetings, acknowledgements and tool
+    confirmations, and a phrase is written only the second time it's synthesized in a
+    session, so one-off sentences never reach the disk. The total size is capped by the "tts_phrase_cache_mb" setting and the
+    least recently used entries are deleted first; "tts_phrase_cache" turns the cache off.
+    """
+    MAX_TEXT_CHARS = 200
+    MAX_SEEN_KEYS = 4096
+    DEFAULT_MAX_MB = 256
+    FORMAT_VERSION = 1
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(BASE_DIR, "app", "data", "tts_cache")
+        self.configuration_settings = configuration.ConfigurationSettings()
+        self.configuration_characters = configuration.ConfigurationCharacters()
+
+        self._lock = threading.Lock()
+        self._entries = None
+        self._size = 0
+        self._seen = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls) -> "TTSPhraseCache":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @property
+    def enabled(self):
+        return self.configuration_settings.get_main_setting("tts_phrase_cache") is not False
+
+    @property
+    def max_bytes(self):
+        max_mb = self.configuration_settings.get_main_setting("tts_phrase_cache_mb")
+        try:
+            max_mb = float(max_mb) if max_mb is not None else self.DEFAULT_MAX_MB
+        except (TypeError, ValueError):
+            max_mb = self.DEFAULT_MAX_MB
+        return max(max_mb, 0.0) * 1024 * 1024
+
+    @staticmethod
+    def normalize(text):
+        return re.sub(r"\s+", " ", text or "").strip()
+
+    def key(self, tts_method, text, character_name=None, voice_id=None, language=None):
+        """
+        Returns the cache key for a phrase, or None when it shouldn't be cached.
+        """
+        text = self.normalize(text)
+        if not text or len(text) > self.MAX_TEXT_CHARS or not self.enabled:
+            return None
+
+        voice = {}
+        if character_name:
+            configuration_data = self.configuration_characters.load_configuration()
+            char_config = configuration_data["character_list"].get(character_name, {})
+            voice = {name: char_config.get(name) for name in _CACHE_VOICE_SETTINGS if name in char_config}
+            if char_config.get("rvc_enabled") and char_config.get("rvc_file"):
+                voice["rvc"] = [char_config.get(name) for name in _CACHE_RVC_SETTINGS]
+
+        payload = json.dumps(
+            [self.FORMAT_VERSION, tts_method, voice_id, language, voice, text],
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.flac")
+
+    def _load_index_locked(self):
+        if self._entries is not None:
+            return
+        found = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith(".flac"):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime, name[:-len(".flac")], stat.st_size))
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._size = sum(size for _, _, size in found)
+
+    def get(self, key):
+        if key is None:
+            return None
+        path = self._path(key)
+        with self._lock:
+            self._load_index_locked()
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        try:
+            frame = AudioFrame.read(path)
+            # The file's mtime carries the LRU order over to the next session.
+            os.utime(path)
+        except Exception as e:
+            logger.warning(f"Dropping unreadable TTS cache entry {key[:12]}: {e}")
+            self._discard(key)
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return frame
+
+    def put(self, key, frame):
+        if key is None or frame is None or not len(frame):
+            return
+        with self._lock:
+            self._load_index_locked()
+            if key in self._entries:
+                return
+            # The same frame stored twice (a stream that fell back to a cached generate_*
+            # call) is still the first occurrence.
+            seen = self._seen.pop(key, None)
+            if seen is None or seen == id(frame):
+                self._seen[key] = id(frame)
+                if len(self._seen) > self.MAX_SEEN_KEYS:
+                    self._seen.popitem(last=False)
+                return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            sf.write(temp_path, np.clip(frame.samples, -1.0, 1.0), frame.sample_rate, format="FLAC")
+            os.replace(temp_path, path)
+            size = os.path.getsize(path)
+        except Exception as e:
+            logger.warning(f"Failed to store TTS cache entry: {e}")
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            return
+
+        evicted = []
+        max_bytes = self.max_bytes
+        with self._lock:
+            self._entries[key] = size
+            self._size += size
+            while self._size > max_bytes and self._entries:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._size -= old_size
+                evicted.append(old_key)
+
+        for old_key in evicted:
+            with contextlib.suppress(OSError):
+                os.remove(self._path(old_key))
+
+    def _discard(self, key):
+        with self._lock:
+            size = self._entries.pop(key, None) if self._entries is not None else None
+            if size is not None:
+                self._size -= size
+        with contextlib.suppress(OSError):
+            os.remove(self._path(key))
+
+    async def aget(self, key):
+        if key is None:
+            return None
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key, frame):
+        if key is None:
+            return
+        await asyncio.to_thread(self.put, key, frame)
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._entries) if self._entries is not None else []
+        for key in keys:
+            self._discard(key)
+
+    def metrics(self):
+        with self._lock:
+            self._load_index_locked()
+            return {
+                "entries": len(self._entries),
+                "size_mb": self._size / (1024 * 1024),
+                "max_mb": self.max_bytes / (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def phrase_cached(tts_method):
+    """
+    Puts the phrase cache in front of an engine's generate_speech_* coroutine. The
+    character_name, voice_id and language arguments of the wrapped method go into the key.
+    """
+    def decorate(generate):
+        signature = inspect.signature(generate)
+
+        @functools.wraps(generate)
+        async def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs).arguments
+            cache = TTSPhraseCache.shared()
+            key = await asyncio.to_thread(
+                cache.key, tts_method, bound.get("text"),
+                bound.get("character_name"), bound.get("voice_id"), bound.get("language")
+            )
+            frame = await cache.aget(key)
+            if frame is not None:
+                return frame
+
+            frame = await generate(self, *args, **kwargs)
+            if frame:
+                await cache.aput(key, frame)
+            return frame
+        return wrapper
+    return decorate
+
 
 class ElevenLabs:
+    # Network-bound: several chunks can be requested at once.
+    PARALLEL_SYNTHESIS = True
+
     def __init__(self):
         self.configuration_settings = configuration.ConfigurationSettings()
         self.configuration_api = configuration.ConfigurationAPI()
@@ -71,8 +533,6 @@ class ElevenLabs:
 
         self.audio_cache = AudioSegment.empty()
         self.device_index = self.configuration_settings.get_main_setting("output_device_real_index")
-        self.output_dir = "app/voices/elevenlabs_audio"
-        os.makedirs(self.output_dir, exist_ok=True)
 
     async def generate_speech_with_elevenlabs(self, text, voice_id):
         try:
@@ -96,6 +556,7 @@ class ElevenLabs:
         except Exception as e:
             logger.error(f"Error: {e}")
 
+    @phrase_cached("ElevenLabs")
     async def generate_speech_with_elevenlabs_sow_system(self, text, voice_id):
         try:
             self.eleven_labs_api = self.configuration_api.get_token("ELEVENLABS_API_TOKEN")
@@ -111,13 +572,7 @@ class ElevenLabs:
             async for chunk in audio_stream:
                 audio_data += chunk
 
-            audio_stream_io = io.BytesIO(audio_data)
-            new_audio = await asyncio.to_thread(AudioSegment.from_file, audio_stream_io, format="mp3")
-
-            unique_id = uuid.uuid4().hex
-            output_file = os.path.join(self.output_dir, f"output_{unique_id}.wav")
-            await asyncio.to_thread(new_audio.export, output_file, format="wav")
-            return output_file
+            return await asyncio.to_thread(AudioFrame.from_encoded, audio_data, "mp3")
         except Exception as e:
             logger.error(f"ElevenLabs Error: {e}")
             return None
@@ -137,6 +592,8 @@ class ElevenLabs:
 
 
 class XTTSv2_SOW_System:
+    RESIDENCY_KEY = "tts:xttsv2"
+
     def __init__(self):
         self.configuration_settings = configuration.ConfigurationSettings()
         self.configuration_api = configuration.ConfigurationAPI()
@@ -145,34 +602,28 @@ class XTTSv2_SOW_System:
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.tts = None
         self.tts_loaded = False
-        self.rvc = None
-        self.rvc_loaded = False
+        self._speaker_latents = {}
+        # The engine is shared by every TTS worker; only one of them may load the model.
+        self._load_lock = threading.Lock()
 
     def _load_tts_sync(self):
-        if not self.tts_loaded:
+        with self._load_lock:
+            if self.tts_loaded:
+                return
             try:
+                baseline = ModelResidencyManager.snapshot()
                 self.tts = TTS(model_name='tts_models/multilingual/multi-dataset/xtts_v2', progress_bar=True).to(self.device)
                 self.tts_loaded = True
+                ModelResidencyManager.shared().register(self.RESIDENCY_KEY, self.unload_tts, baseline)
             except Exception as e:
                 raise RuntimeError(f"Failed to load TTS model: {e}")
 
-    async def _load_rvc(self, f0up_key, index_rate, protect):
-        if not self.rvc_loaded:
-            logger.info("Loading RVC model...")
-            try:
-                def _init():
-                    return RVCInference(
-                        models_dir="assets/rvc_models",
-                        device="cuda:0" if torch.cuda.is_available() else "cpu:0",
-                        f0up_key=f0up_key, index_rate=index_rate, protect=protect
-                    )
-                self.rvc = await asyncio.to_thread(_init)
-                self.rvc_loaded = True
-                logger.info("RVC model loaded successfully.")
-            except Exception as e:
-                logger.error(f"Error loading RVC model: {e}")
-                raise RuntimeError("Failed to load RVC model.")
+    def unload_tts(self):
+        self.tts = None
+        self.tts_loaded = False
+        self._speaker_latents.clear()
 
+    @phrase_cached("XTTSv2")
     async def generate_speech_with_xttsv2_sow_system(self, text=None, language=None, character_name=None):
         await asyncio.to_thread(self._load_tts_sync)
 
@@ -192,82 +643,72 @@ class XTTSv2_SOW_System:
         if not speaker_wav:
             raise ValueError(f"Unknown voice type: {xttsv2_voice_type}")
 
-        os.makedirs("app/voices/xttsv2_audio", exist_ok=True)
-        unique_id = uuid.uuid4().hex
-        base_output_file = f"app/voices/xttsv2_audio/output_{unique_id}.wav"
-
-        await asyncio.to_thread(
-            self.tts.tts_to_file,
-            text=text,
-            speaker_wav=speaker_wav,
-            language=language,
-            file_path=base_output_file
-        )
+        tts = self.tts
+        with ModelResidencyManager.shared().in_use(self.RESIDENCY_KEY):
+            wav = await asyncio.to_thread(
+                tts.tts,
+                text=text,
+                speaker_wav=speaker_wav,
+                language=language
+            )
+        frame = AudioFrame(wav, tts.synthesizer.output_sample_rate)
 
         if xttsv2_rvc_enabled and xttsv2_rvc_file:
-            f0up_key   = char_config.get("rvc_f0up_key",   0)
-            index_rate = char_config.get("rvc_index_rate", 0.75)
-            protect    = char_config.get("rvc_protect",    0.5)
-
-            await self._load_rvc(f0up_key, index_rate, protect)
+            return await SharedRVC.shared().aconvert(frame, char_config)
 
-            model_name = os.path.splitext(os.path.basename(xttsv2_rvc_file))[0]
-            rvc_output_file = f"app/voices/xttsv2_audio/output_rvc_{unique_id}.wav"
+        return frame
 
-            rvc_params = (model_name, f0up_key, index_rate, protect)
-            if getattr(self, "_current_rvc_params", None) != rvc_params:
-                await asyncio.to_thread(self.rvc.load_model, model_name)
-                self._current_rvc_params = rvc_params
+    async def stream_speech_with_xttsv2(self, text=None, language=None, character_name=None):
+        """
+        Yields the audio of a chunk piece by piece through XTTS streaming inference.
 
-            await asyncio.to_thread(self.rvc.infer_file, base_output_file, rvc_output_file)
+        RVC needs more context than a streaming piece carries, so with RVC enabled (or a TTS
+        build without inference_stream) the chunk is synthesized in one go instead.
+        """
+        await asyncio.to_thread(self._load_tts_sync)
 
-            fix_rvc_sample_rate(rvc_output_file, base_output_file)
+        configuration_data = self.configuration_characters.load_configuration()
+        char_config = configuration_data["character_list"][character_name]
+        model = getattr(getattr(self.tts, "synthesizer", None), "tts_model", None)
 
-            try:
-                await asyncio.to_thread(os.remove, base_output_file)
-            except OSError as e:
-                logger.warning(f"Could not remove temp file {base_output_file}: {e}")
+        speaker_wav = {
+            "Female Calm": "app/voices/calm_female.wav",
+            "Female": "app/voices/female.wav",
+            "Male": "app/voices/male.wav"
+        }.get(char_config["voice_type"])
 
-            return rvc_output_file
+        if (char_config["rvc_enabled"] and char_config["rvc_file"]) or not speaker_wav or not hasattr(model, "inference_stream"):
+            frame = await self.generate_speech_with_xttsv2_sow_system(text, language, character_name)
+            if frame:
+                yield frame
+            return
 
-        return base_output_file
+        sample_rate = self.tts.synthesizer.output_sample_rate
+        with ModelResidencyManager.shared().in_use(self.RESIDENCY_KEY):
+            latents = self._speaker_latents.get(speaker_wav)
+            if latents is None:
+                latents = await asyncio.to_thread(model.get_conditioning_latents, audio_path=[speaker_wav])
+                self._speaker_latents[speaker_wav] = latents
+            gpt_cond_latent, speaker_embedding = latents
+
+            pieces = model.inference_stream(text, language, gpt_cond_latent, speaker_embedding, enable_text_splitting=True)
+            while True:
+                piece = await asyncio.to_thread(next, pieces, None)
+                if piece is None:
+                    break
+                yield AudioFrame(piece, sample_rate)
 
 
 class EdgeTTS:
+    PARALLEL_SYNTHESIS = True
+
     def __init__(self):
         self.configuration_settings = configuration.ConfigurationSettings()
         self.configuration_api = configuration.ConfigurationAPI()
         self.configuration_characters = configuration.ConfigurationCharacters()
 
-        self.rvc = None
-        self.rvc_loaded = False
-        self.output_dir = "app/voices/edge_tts_audio"
-        os.makedirs(self.output_dir, exist_ok=True)
         self.device_index = self.configuration_settings.get_main_setting("output_device_real_index")
 
-    async def _load_rvc(self, f0up_key, index_rate, protect):
-        if not self.rvc_loaded:
-            logger.info("Loading RVC model...")
-            try:
-                def _init():
-                    return RVCInference(
-                        models_dir="assets/rvc_models",
-                        device="cuda:0" if torch.cuda.is_available() else "cpu:0",
-                        f0up_key=f0up_key, index_rate=index_rate, protect=protect
-                    )
-                self.rvc = await asyncio.to_thread(_init)
-                self.rvc_loaded = True
-                logger.info("RVC model loaded successfully.")
-            except Exception as e:
-                logger.error(f"Error loading RVC model: {e}")
-                raise RuntimeError("Failed to load RVC model.")
-
-    async def _convert_mp3_to_wav(self, mp3_file, wav_file):
-        def _convert():
-            audio = AudioSegment.from_mp3(mp3_file)
-            audio.export(wav_file, format="wav")
-        await asyncio.to_thread(_convert)
-
     async def _generate_base(self, text, character_name):
         configuration_data = self.configuration_characters.load_configuration()
         char_config = configuration_data["character_list"][character_name]
@@ -276,65 +717,45 @@ class EdgeTTS:
         rvc_enabled = char_config["rvc_enabled"]
         rvc_file = char_config["rvc_file"]
 
-        unique_id = uuid.uuid4().hex
-        audio_file = os.path.join(self.output_dir, f"output_{unique_id}.mp3")
-        wav_file = os.path.join(self.output_dir, f"output_{unique_id}.wav")
-
         try:
             communicate = edge_tts.Communicate(text, voice_type)
-            await communicate.save(audio_file)
+            mp3_data = bytearray()
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    mp3_data.extend(chunk["data"])
         except Exception as e:
             logger.error(f"Error when generating EdgeTTS audio: {e}")
             return None
 
+        if not mp3_data:
+            logger.warning("EdgeTTS returned no audio for this chunk. Skipping.")
+            return None
+
         try:
-            await self._convert_mp3_to_wav(audio_file, wav_file)
-            await asyncio.to_thread(os.remove, audio_file)
+            frame = await asyncio.to_thread(AudioFrame.from_encoded, bytes(mp3_data), "mp3")
         except Exception as e:
-            logger.error(f"Error when converting MP3 to WAV: {e}")
+            logger.error(f"Error when decoding EdgeTTS audio: {e}")
             return None
 
         if rvc_enabled and rvc_file:
-            f0up_key   = char_config.get("rvc_f0up_key",   0)
-            index_rate = char_config.get("rvc_index_rate", 0.75)
-            protect    = char_config.get("rvc_protect",    0.5)
+            return await SharedRVC.shared().aconvert(frame, char_config)
 
-            await self._load_rvc(f0up_key, index_rate, protect)
-            model_name = os.path.splitext(os.path.basename(rvc_file))[0]
-            rvc_output_file = os.path.join(self.output_dir, f"output_rvc_{unique_id}.wav")
-
-            rvc_params = (model_name, f0up_key, index_rate, protect)
-            if getattr(self, "_current_rvc_params", None) != rvc_params:
-                await asyncio.to_thread(self.rvc.load_model, model_name)
-                self._current_rvc_params = rvc_params
-
-            await asyncio.to_thread(self.rvc.infer_file, wav_file, rvc_output_file)
-
-            fix_rvc_sample_rate(rvc_output_file, wav_file)
-
-            try:
-                await asyncio.to_thread(os.remove, wav_file)
-            except OSError as e:
-                logger.warning(f"Could not remove temp file {wav_file}: {e}")
-
-            return rvc_output_file
-
-        return wav_file
+        return frame
 
     async def generate_speech_with_edge_tts(self, text, character_name):
-        output_file = await self._generate_base(text, character_name)
-        if output_file:
-            await self.play_audio(file_path=output_file)
+        frame = await self._generate_base(text, character_name)
+        if frame:
+            await self.play_audio(frame)
 
+    @phrase_cached("Edge TTS")
     async def generate_speech_with_edge_tts_sow_system(self, text, character_name):
         return await self._generate_base(text, character_name)
 
-    async def play_audio(self, file_path):
+    async def play_audio(self, frame):
         def _play():
             try:
-                data, samplerate = sf.read(file_path, dtype='float32')
                 sd.default.device = self.device_index
-                sd.play(data, samplerate)
+                sd.play(frame.samples, frame.sample_rate)
                 sd.wait()
             except Exception as e:
                 logger.error(f"Error: {e}")
@@ -345,6 +766,8 @@ class EdgeTTS:
 
 
 class KokoroTTS_SOW_System:
+    RESIDENCY_KEY = "tts:kokoro"
+
     def __init__(self):
         self.configuration_settings = configuration.ConfigurationSettings()
         self.configuration_api = configuration.ConfigurationAPI()
@@ -353,36 +776,29 @@ class KokoroTTS_SOW_System:
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.pipeline = None
         self.tts_loaded = False
-        self.rvc = None
-        self.rvc_loaded = False
+        self._load_lock = threading.Lock()
 
     async def _load_tts(self):
         if not self.tts_loaded:
+            await asyncio.to_thread(self._load_tts_sync)
+
+    def _load_tts_sync(self):
+        with self._load_lock:
+            if self.tts_loaded:
+                return
             try:
-                def _init():
-                    return KPipeline(lang_code='a')
-                self.pipeline = await asyncio.to_thread(_init)
+                baseline = ModelResidencyManager.snapshot()
+                self.pipeline = KPipeline(lang_code='a')
                 self.tts_loaded = True
+                ModelResidencyManager.shared().register(self.RESIDENCY_KEY, self.unload_tts, baseline)
             except Exception as e:
                 raise RuntimeError(f"Failed to load TTS model: {e}")
 
-    async def _load_rvc(self, f0up_key, index_rate, protect):
-        if not self.rvc_loaded:
-            logger.info("Loading RVC model...")
-            try:
-                def _init():
-                    return RVCInference(
-                        models_dir="assets/rvc_models",
-                        device="cuda:0" if torch.cuda.is_available() else "cpu:0",
-                        f0up_key=f0up_key, index_rate=index_rate, protect=protect
-                    )
-                self.rvc = await asyncio.to_thread(_init)
-                self.rvc_loaded = True
-                logger.info("RVC model loaded successfully.")
-            except Exception as e:
-                logger.error(f"Error loading RVC model: {e}")
-                raise RuntimeError("Failed to load RVC model.")
+    def unload_tts(self):
+        self.pipeline = None
+        self.tts_loaded = False
 
+    @phrase_cached("Kokoro")
     async def generate_speech_with_kokoro(self, text, character_name):
         await self._load_tts()
 
@@ -392,54 +808,60 @@ class KokoroTTS_SOW_System:
         kokoro_rvc_enabled = char_config["rvc_enabled"]
         kokoro_rvc_file = char_config["rvc_file"]
 
+        pipeline = self.pipeline
+
         def _generate():
-            generator = self.pipeline(text, voice=kokoro_voice_name)
+            generator = pipeline(text, voice=kokoro_voice_name)
             chunks = []
             for _, _, audio in generator:
                 chunks.append(audio)
             return chunks
 
-        all_audio = await asyncio.to_thread(_generate)
+        with ModelResidencyManager.shared().in_use(self.RESIDENCY_KEY):
+            all_audio = await asyncio.to_thread(_generate)
 
         if not all_audio:
             logger.warning("Kokoro generated empty audio for this chunk. Skipping.")
             return None
 
-        full_audio = np.concatenate(all_audio)
-        os.makedirs("app/voices/kokoro_audio", exist_ok=True)
-        unique_id = uuid.uuid4().hex
-        base_output_file = f"app/voices/kokoro_audio/kokoro_output_{unique_id}.wav"
-        await asyncio.to_thread(sf.write, base_output_file, full_audio, 24000)
+        frame = AudioFrame(np.concatenate(all_audio), 24000)
 
         if kokoro_rvc_enabled and kokoro_rvc_file:
-            f0up_key   = char_config.get("rvc_f0up_key",   0)
-            index_rate = char_config.get("rvc_index_rate", 0.75)
-            protect    = char_config.get("rvc_protect",    0.5)
-
-            await self._load_rvc(f0up_key, index_rate, protect)
-            model_name = os.path.splitext(os.path.basename(kokoro_rvc_file))[0]
-            rvc_output_file = f"app/voices/kokoro_audio/output_rvc_{unique_id}.wav"
+            return await SharedRVC.shared().aconvert(frame, char_config)
 
-            rvc_params = (model_name, f0up_key, index_rate, protect)
-            if getattr(self, "_current_rvc_params", None) != rvc_params:
-                await asyncio.to_thread(self.rvc.load_model, model_name)
-                self._current_rvc_params = rvc_params
+        return frame
 
-            await asyncio.to_thread(self.rvc.infer_file, base_output_file, rvc_output_file)
-
-            fix_rvc_sample_rate(rvc_output_file, base_output_file)
+    async def stream_speech_with_kokoro(self, text, character_name):
+        """
+        Yields a frame for every segment as soon as Kokoro's pipeline produces it.
+        """
+        await self._load_tts()
 
-            try:
-                await asyncio.to_thread(os.remove, base_output_file)
-            except OSError as e:
-                logger.warning(f"Could not remove temp file {base_output_file}: {e}")
+        configuration_data = self.configuration_characters.load_configuration()
+        char_config = configuration_data["character_list"][character_name]
+        use_rvc = char_config["rvc_enabled"] and char_config["rvc_file"]
 
-            return rvc_output_file
+        segments = iter(self.pipeline(text, voice=char_config["voice_type"]))
+        while True:
+            with ModelResidencyManager.shared().in_use(self.RESIDENCY_KEY):
+                segment = await asyncio.to_thread(next, segments, None)
+            if segment is None:
+                break
+            _, _, audio = segment
+            if audio is None or not len(audio):
+                continue
 
-        return base_output_file
+            frame = AudioFrame(audio, 24000)
+            if use_rvc:
+                frame = await SharedRVC.shared().aconvert(frame, char_config)
+            yield frame
 
 
 class SileroTTS_SOW_System:
+    RESIDENCY_KEY = "tts:silero"
+    # The TorchScript model is stateless and releases the GIL while it runs.
+    PARALLEL_SYNTHESIS = True
+
     def __init__(self):
         self.configuration_settings = configuration.ConfigurationSettings()
         self.configuration_api = configuration.ConfigurationAPI()
@@ -448,14 +870,19 @@ class SileroTTS_SOW_System:
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.model = None
         self.tts_loaded = False
-        self.rvc = None
-        self.rvc_loaded = False
+        self._load_lock = threading.Lock()
 
     async def _load_tts(self):
         if not self.tts_loaded:
+            await asyncio.to_thread(self._load_tts_sync)
+
+    def _load_tts_sync(self):
+        with self._load_lock:
+            if self.tts_loaded:
+                return
             try:
-                self.model, _ = await asyncio.to_thread(
-                    torch.hub.load,
+                baseline = ModelResidencyManager.snapshot()
+                self.model, _ = torch.hub.load(
                     repo_or_dir='snakers4/silero-models',
                     model='silero_tts',
                     language='ru',
@@ -466,27 +893,16 @@ class SileroTTS_SOW_System:
                 )
                 self.model.to(self.device)
                 self.tts_loaded = True
+                ModelResidencyManager.shared().register(self.RESIDENCY_KEY, self.unload_tts, baseline)
                 logger.info("Silero TTS loaded successfully")
             except Exception as e:
                 raise RuntimeError(f"Failed to load Silero TTS: {e}")
 
-    async def _load_rvc(self, f0up_key, index_rate, protect):
-        if not self.rvc_loaded:
-            logger.info("Loading RVC model...")
-            try:
-                def _init():
-                    return RVCInference(
-                        models_dir="assets/rvc_models",
-                        device="cuda:0" if torch.cuda.is_available() else "cpu:0",
-                        f0up_key=f0up_key, index_rate=index_rate, protect=protect
-                    )
-                self.rvc = await asyncio.to_thread(_init)
-                self.rvc_loaded = True
-                logger.info("RVC model loaded successfully.")
-            except Exception as e:
-                logger.error(f"Error loading RVC model: {e}")
-                raise RuntimeError("Failed to load RVC model.")
+    def unload_tts(self):
+        self.model = None
+        self.tts_loaded = False
 
+    @phrase_cached("Silero")
     async def generate_speech_with_silero(self, text, character_name):
         await self._load_tts()
 
@@ -497,46 +913,23 @@ class SileroTTS_SOW_System:
         silero_rvc_enabled = char_config.get("rvc_enabled", False)
         silero_rvc_file = char_config.get("rvc_file")
 
-        os.makedirs("app/voices/silero_audio", exist_ok=True)
-        unique_id = uuid.uuid4().hex
-        base_output_file = f"app/voices/silero_audio/silero_output_{unique_id}.wav"
-
-        audio = await asyncio.to_thread(
-            self.model.apply_tts,
-            text=text,
-            speaker=silero_voice,
-            sample_rate=48000
-        )
-        await asyncio.to_thread(sf.write, base_output_file, audio.cpu().numpy(), 48000)
+        with ModelResidencyManager.shared().in_use(self.RESIDENCY_KEY):
+            audio = await asyncio.to_thread(
+                self.model.apply_tts,
+                text=text,
+                speaker=silero_voice,
+                sample_rate=48000
+            )
+        frame = AudioFrame(audio, 48000)
 
         if silero_rvc_enabled and silero_rvc_file:
-            f0up_key   = char_config.get("rvc_f0up_key",   0)
-            index_rate = char_config.get("rvc_index_rate", 0.75)
-            protect    = char_config.get("rvc_protect",    0.5)
-
-            await self._load_rvc(f0up_key, index_rate, protect)
-            model_name = os.path.splitext(os.path.basename(silero_rvc_file))[0]
-            rvc_output_file = f"app/voices/silero_audio/output_rvc_{unique_id}.wav"
-
-            rvc_params = (model_name, f0up_key, index_rate, protect)
-            if getattr(self, "_current_rvc_params", None) != rvc_params:
-                await asyncio.to_thread(self.rvc.load_model, model_name)
-                self._current_rvc_params = rvc_params
-            
-            await asyncio.to_thread(self.rvc.infer_file, base_output_file, rvc_output_file)
-
-            fix_rvc_sample_rate(rvc_output_file, base_output_file)
-
-            try:
-                await asyncio.to_thread(os.remove, base_output_file)
-            except OSError as e:
-                logger.warning(f"Could not remove temp file {base_output_file}: {e}")
-
-            return rvc_output_file
+            return await SharedRVC.shared().aconvert(frame, char_config)
 
-        return base_output_file
+        return frame
 
 class Qwen3TTS_SOW_System:
+    RESIDENCY_KEY = "tts:qwen3"
+
     def __init__(self):
         self.configuration_settings = configuration.ConfigurationSettings()
         self.configuration_api = configuration.ConfigurationAPI()
@@ -545,12 +938,20 @@ class Qwen3TTS_SOW_System:
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.pipeline = None
         self.tts_loaded = False
-        self.rvc = None
-        self.rvc_loaded = False
+        self.residency_key = self.RESIDENCY_KEY
+        self._load_lock = threading.Lock()
 
     async def _load_tts(self, character_name: str):
         if not self.tts_loaded:
+            await asyncio.to_thread(self._load_tts_sync, character_name)
+
+    def _load_tts_sync(self, character_name: str):
+        with self._load_lock:
+            if self.tts_loaded:
+                return
             try:
+                self.residency_key = f"{self.RESIDENCY_KEY}:{character_name}"
+                baseline = ModelResidencyManager.snapshot()
                 configuration_data = self.configuration_characters.load_configuration()
                 char_config = configuration_data["character_list"].get(character_name, {})
 
@@ -632,8 +1033,9 @@ class Qwen3TTS_SOW_System:
                             
                     return model
 
-                self.model = await asyncio.to_thread(_init)
+                self.model = _init()
                 self.tts_loaded = True
+                ModelResidencyManager.shared().register(self.residency_key, self.unload_tts, baseline)
                 
                 logger.info(f"Qwen3-TTS {model_size}-{variant} loaded on {self.device.upper()} for '{character_name}'")
 
@@ -641,23 +1043,11 @@ class Qwen3TTS_SOW_System:
                 logger.error(f"Failed to load Qwen3-TTS for {character_name}: {e}")
                 raise RuntimeError(f"Failed to load Qwen3-TTS: {e}")
 
-    async def _load_rvc(self, f0up_key, index_rate, protect):
-        if not self.rvc_loaded:
-            logger.info("Loading RVC model for Qwen 3...")
-            try:
-                def _init():
-                    return RVCInference(
-                        models_dir="assets/rvc_models",
-                        device="cuda:0" if torch.cuda.is_available() else "cpu:0",
-                        f0up_key=f0up_key, index_rate=index_rate, protect=protect
-                    )
-                self.rvc = await asyncio.to_thread(_init)
-                self.rvc_loaded = True
-                logger.info("RVC model loaded successfully.")
-            except Exception as e:
-                logger.error(f"Error loading RVC model: {e}")
-                raise RuntimeError("Failed to load RVC model.")
+    def unload_tts(self):
+        self.model = None
+        self.tts_loaded = False
 
+    @phrase_cached("Qwen-3 TTS")
     async def generate_speech_with_qwen3(self, text: str, character_name: str):
         await self._load_tts(character_name)
 
@@ -675,10 +1065,6 @@ class Qwen3TTS_SOW_System:
         qwen_rvc_enabled = char_config.get("rvc_enabled", False)
         qwen_rvc_file = char_config.get("rvc_file")
 
-        os.makedirs("app/voices/qwen_audio", exist_ok=True)
-        unique_id = uuid.uuid4().hex
-        base_output_file = f"app/voices/qwen_audio/qwen_output_{unique_id}.wav"
-
         def _generate():
             try:
                 generation_params = {
@@ -730,53 +1116,145 @@ class Qwen3TTS_SOW_System:
                                 **generation_params
                             )
 
-                audio_data = wavs[0]
-                if isinstance(audio_data, torch.Tensor):
-                    audio_data = audio_data.detach().cpu().to(torch.float32).numpy()
-                elif isinstance(audio_data, np.ndarray):
-                    audio_data = audio_data.astype(np.float32)
-
-                sf.write(base_output_file, audio_data, sr)
-                return base_output_file
+                return AudioFrame(wavs[0], sr)
 
             except Exception as e:
                 logger.error(f"Qwen3 TTS generation error: {e}")
                 raise
 
-        await asyncio.to_thread(_generate)
+        with ModelResidencyManager.shared().in_use(self.residency_key):
+            frame = await asyncio.to_thread(_generate)
 
         if qwen_rvc_enabled and qwen_rvc_file:
-            f0up_key = char_config.get("rvc_f0up_key", 0)
-            index_rate = char_config.get("rvc_index_rate", 0.75)
-            protect = char_config.get("rvc_protect", 0.5)
-
-            await self._load_rvc(f0up_key, index_rate, protect)
-
-            model_name = os.path.splitext(os.path.basename(qwen_rvc_file))[0]
-            rvc_output_file = f"app/voices/qwen_audio/output_rvc_{unique_id}.wav"
-
-            rvc_params = (model_name, f0up_key, index_rate, protect)
-            if getattr(self, "_current_rvc_params", None) != rvc_params:
-                await asyncio.to_thread(self.rvc.load_model, model_name)
-                self._current_rvc_params = rvc_params
-
-            await asyncio.to_thread(self.rvc.infer_file, base_output_file, rvc_output_file)
-
-            fix_rvc_sample_rate(rvc_output_file, base_output_file)
-
-            try:
-                os.remove(base_output_file)
-            except OSError:
-                pass
-
-            return rvc_output_file
-
-        return base_output_file
+            return await SharedRVC.shared().aconvert(frame, char_config)
+
+        return frame
+
+    async def stream_speech_with_qwen3(self, text: str, character_name: str):
+        """
+        qwen_tts has no incremental decoding API, so a chunk is synthesized sentence by
+        sentence and every sentence is yielded as soon as it is ready.
+        """
+        for sentence in split_sentences(text):
+            frame = await self.generate_speech_with_qwen3(sentence, character_name)
+            if frame:
+                yield frame
+
+_TTS_ENGINES = {
+    "XTTSv2": ("xtts", XTTSv2_SOW_System),
+    "Edge TTS": ("edge", EdgeTTS),
+    "Kokoro": ("kokoro", KokoroTTS_SOW_System),
+    "Silero": ("silero", SileroTTS_SOW_System),
+    "Qwen-3 TTS": ("qwen", Qwen3TTS_SOW_System),
+    "ElevenLabs": ("eleven", ElevenLabs),
+}
+
+
+def supports_parallel_synthesis(tts_method):
+    _, engine_class = _TTS_ENGINES.get(tts_method, (None, None))
+    return bool(getattr(engine_class, "PARALLEL_SYNTHESIS", False))
+
+
+_shared_engines = {}
+_shared_engines_lock = threading.Lock()
+
+
+def create_tts_engine(worker, tts_method):
+    """
+    Builds the engine wrapper for tts_method on the worker the first time it's needed; the
+    wrappers of the other methods stay None. The models themselves still load on first use.
+
+    Engines backed by a local model are shared by every worker of the process, so the model
+    is loaded and registered with the residency manager once. Qwen3 picks its model from the
+    character's settings and gets one engine per character.
+    """
+    attr, engine_class = _TTS_ENGINES.get(tts_method, (None, None))
+    if attr is None:
+        return None
+    engine = getattr(worker, attr, None)
+    if engine is None:
+        if hasattr(engine_class, "RESIDENCY_KEY"):
+            key = (tts_method, worker.character_name) if engine_class is Qwen3TTS_SOW_System else tts_method
+            with _shared_engines_lock:
+                engine = _shared_engines.get(key)
+                if engine is None:
+                    engine = _shared_engines[key] = engine_class()
+        else:
+            engine = engine_class()
+        setattr(worker, attr, engine)
+    return engine
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size float32 ring buffer between the playback thread (writer) and the sounddevice
+    callback (reader). The callback never blocks: on underrun it plays silence.
+    """
+    def __init__(self, capacity, channels=1):
+        self.capacity = int(capacity)
+        self.channels = channels
+        self._data = np.zeros((self.capacity, channels), dtype=np.float32)
+        self._start = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self.level = 0.0
+
+    @property
+    def available(self):
+        return self._size
+
+    def write(self, samples, timeout=None):
+        """
+        Copies as many samples as fit, waiting up to `timeout` for free space. Returns the count.
+        """
+        with self._space:
+            if self._size == self.capacity:
+                self._space.wait(timeout)
+            count = min(len(samples), self.capacity - self._size)
+            if count:
+                end = (self._start + self._size) % self.capacity
+                first = min(count, self.capacity - end)
+                self._data[end:end + first] = samples[:first]
+                self._data[:count - first] = samples[first:count]
+                self._size += count
+            return count
+
+    def read_into(self, out):
+        with self._space:
+            count = min(len(out), self._size)
+            first = min(count, self.capacity - self._start)
+            out[:first] = self._data[self._start:self._start + first]
+            out[first:count] = self._data[:count - first]
+            out[count:] = 0.0
+            self._start = (self._start + count) % self.capacity
+            self._size -= count
+            self._space.notify_all()
+        self.level = float(np.sqrt(np.mean(out[:count] ** 2))) if count else 0.0
+        return count
+
+    def clear(self):
+        with self._space:
+            self._start = 0
+            self._size = 0
+            self.level = 0.0
+            self._space.notify_all()
 
 class AudioPlaybackWorker(QThread):
+    """
+    Plays queued frames (and saved replay files) through one continuous sounddevice
+    OutputStream. Frames are copied into a ring buffer that the stream callback drains, so
+    consecutive pieces of speech play back to back without reopening the device and a piece
+    can start while the next one is still being synthesized.
+    """
     queue_empty_signal = pyqtSignal()
     lipsync_signal = pyqtSignal(float)
 
+    BUFFER_SECONDS = 2.0
+    BLOCK_SIZE = 1024
+    LIPSYNC_INTERVAL = 0.05
+    IDLE_CLOSE_SECONDS = 5.0
+
     def __init__(self, device_index):
         super().__init__()
         self.queue = queue.Queue()
@@ -784,115 +1262,184 @@ class AudioPlaybackWorker(QThread):
         self.device_index = device_index
         self.interrupt_flag = False
 
+        self._stream = None
+        self._ring = None
+        self._stream_format = None
+        self._playing = False
+        self._idle_since = None
+
     def add_audio_file(self, file_path, persist=False):
         self.interrupt_flag = False
         self.queue.put((file_path, persist))
 
+    def add_audio_frame(self, frame):
+        self.interrupt_flag = False
+        self.queue.put((frame, False))
+
+    @staticmethod
+    def _discard(source, persist):
+        if persist or not isinstance(source, str):
+            return
+        try:
+            if os.path.exists(source):
+                os.remove(source)
+        except Exception:
+            pass
+
     def clear_queue(self):
         self.interrupt_flag = True
         with self.queue.mutex:
             for item in list(self.queue.queue):
-                file_path, persist = item if isinstance(item, tuple) else (item, False)
-                if persist:
-                    continue
-                try:
-                    if file_path and os.path.exists(file_path):
-                        os.remove(file_path)
-                except Exception:
-                    pass
+                source, persist = item if isinstance(item, tuple) else (item, False)
+                self._discard(source, persist)
             self.queue.queue.clear()
+        if self._ring is not None:
+            self._ring.clear()
+
+    def _callback(self, outdata, frames, time_info, status):
+        self._ring.read_into(outdata)
+
+    def _ensure_stream(self, frame):
+        """
+        Opens the output stream for the first frame; later frames are resampled to its rate.
+        """
+        channels = frame.samples.shape[1] if frame.samples.ndim > 1 else 1
+        if self._stream is not None and self._stream_format[1] == channels:
+            return frame.resample(self._stream_format[0])
+
+        self._wait_until_drained()
+        self._close_stream()
+        self._ring = AudioRingBuffer(int(frame.sample_rate * self.BUFFER_SECONDS), channels)
+        self._stream = sd.OutputStream(
+            samplerate=frame.sample_rate, channels=channels, dtype='float32',
+            device=self.device_index, blocksize=self.BLOCK_SIZE, callback=self._callback
+        )
+        self._stream.start()
+        self._stream_format = (frame.sample_rate, channels)
+        return frame
 
-    def run(self):
-        logger.info("Audio Playback Worker Started")
-        while self.is_running:
+    def _close_stream(self):
+        if self._stream is not None:
             try:
-                item = self.queue.get(timeout=0.1)
-
-                if item is None:
-                    self.queue.task_done()
-                    continue
-
-                file_path, persist = item if isinstance(item, tuple) else (item, False)
-
-                if self.interrupt_flag:
-                    if not persist:
-                        try:
-                            if os.path.exists(file_path):
-                                os.remove(file_path)
-                        except Exception:
-                            pass
-                    self.queue.task_done()
-                    continue
-
-                try:
-                    data, samplerate = sf.read(file_path, dtype='float32')
-                    sd.default.device = self.device_index
-                    sd.play(data, samplerate)
-
-                    duration = len(data) / samplerate
-                    chunk_size = int(samplerate * 0.05)
-                    slept = 0
-
-                    while slept < duration:
-                        if self.interrupt_flag:
-                            sd.stop()
-                            self.lipsync_signal.emit(0.0)
-                            break
-
-                        start_idx = int(slept * samplerate)
-                        end_idx = min(start_idx + chunk_size, len(data))
-                        current_chunk = data[start_idx:end_idx]
+                self._stream.stop()
+                self._stream.close()
+            except Exception as e:
+                logger.warning(f"Failed to close audio output stream: {e}")
+        self._stream = None
+        self._stream_format = None
+
+    def _emit_level(self):
+        level = self._ring.level if self._ring is not None else 0.0
+        self.lipsync_signal.emit(float(min(level * 5.0, 1.0)))
+
+    def _wait_until_drained(self):
+        while self._ring is not None and self._ring.available and not self.interrupt_flag and self.is_running:
+            self._emit_level()
+            time.sleep(self.LIPSYNC_INTERVAL)
+
+    def _play(self, frame):
+        frame = self._ensure_stream(frame)
+        samples = frame.samples.reshape(len(frame.samples), -1)
+        position = 0
+        self._playing = True
+        while position < len(samples):
+            if self.interrupt_flag or not self.is_running:
+                self._ring.clear()
+                self.lipsync_signal.emit(0.0)
+                return
+            position += self._ring.write(samples[position:], timeout=self.LIPSYNC_INTERVAL)
+            self._emit_level()
 
-                        if len(current_chunk) > 0:
-                            rms = np.sqrt(np.mean(current_chunk ** 2))
-                            mouth_open = min(rms * 5.0, 1.0)
-                            self.lipsync_signal.emit(float(mouth_open))
+    def _on_idle(self):
+        if self._ring is not None and self._ring.available:
+            self._emit_level()
+            return
 
-                        time.sleep(0.05)
-                        slept += 0.05
+        if self._playing:
+            self._playing = False
+            self._idle_since = time.monotonic()
+            self.lipsync_signal.emit(0.0)
+            if not self.interrupt_flag:
+                self.queue_empty_signal.emit()
+        elif self._stream is not None and self._idle_since is not None:
+            if time.monotonic() - self._idle_since >= self.IDLE_CLOSE_SECONDS:
+                self._close_stream()
+                self._idle_since = None
 
-                    self.lipsync_signal.emit(0.0)
+    def run(self):
+        logger.info("Audio Playback Worker Started")
+        while self.is_running:
+            try:
+                item = self.queue.get(timeout=self.LIPSYNC_INTERVAL)
+            except queue.Empty:
+                self._on_idle()
+                continue
 
-                except Exception as e:
-                    logger.error(f"Playback error: {e}")
+            if item is None:
+                self.queue.task_done()
+                continue
 
-                finally:
-                    if not persist:
-                        try:
-                            if os.path.exists(file_path):
-                                os.remove(file_path)
-                        except Exception:
-                            pass
+            source, persist = item if isinstance(item, tuple) else (item, False)
 
+            if self.interrupt_flag:
+                self._discard(source, persist)
                 self.queue.task_done()
+                continue
 
-                if self.queue.empty() and not self.interrupt_flag:
-                    self.queue_empty_signal.emit()
+            try:
+                frame = source if isinstance(source, AudioFrame) else AudioFrame.read(source)
+                if len(frame):
+                    self._play(frame)
+            except Exception as e:
+                logger.error(f"Playback error: {e}")
+            finally:
+                self._discard(source, persist)
 
-            except queue.Empty:
-                continue
+            self.queue.task_done()
+
+        self._close_stream()
 
     def stop(self):
         self.is_running = False
         self.interrupt_flag = True
-        try:
-            sd.stop()
-        except Exception:
-            pass
+        if self._ring is not None:
+            self._ring.clear()
         self.queue.put(None)
         self.quit()
         self.wait()
 
 
+class _SynthesisJob:
+    __slots__ = ("text", "message_id", "generation", "frames", "task")
+
+    def __init__(self, text, message_id, generation):
+        self.text = text
+        self.message_id = message_id
+        self.generation = generation
+        self.frames = asyncio.Queue()
+        self.task = None
+
+
 class TTSWorker(QThread):
+    """
+    Speaks queued text chunks in order.
+
+    Synthesis runs ahead of playback: while one chunk is playing, up to `lookahead` of the
+    following chunks (the "tts_lookahead" setting) are already being synthesized, so long
+    replies don't pause between sentences. Engines marked PARALLEL_SYNTHESIS (network and
+    GIL-releasing ones) synthesize those chunks at the same time on the worker's thread
+    pool; the others take them one after another. clear_queue() cancels everything that is
+    queued or in progress.
+    """
     audio_ready_signal = pyqtSignal(str)
     segment_saved_signal = pyqtSignal(str, str)
 
+    DEFAULT_LOOKAHEAD = 2
+
     def __init__(self, tts_method, character_name, voice_id=None, language="en"):
         super().__init__()
         self.queue = queue.Queue()
         self.is_running = True
-        self.discard_current = False
 
         self.tts_method = tts_method
         self.character_name = character_name
@@ -907,16 +1454,29 @@ class TTSWorker(QThread):
 
         self.tts_mode = self.configuration_settings.get_main_setting("tts_voicing_mode") or 0
         self.tts_custom_regex = self.configuration_settings.get_main_setting("tts_custom_regex") or ""
+        self.streaming = self.configuration_settings.get_main_setting("tts_streaming") is not False
+
+        lookahead = self.configuration_settings.get_main_setting("tts_lookahead")
+        try:
+            self.lookahead = max(int(lookahead), 0) if lookahead is not None else self.DEFAULT_LOOKAHEAD
+        except (TypeError, ValueError):
+            self.lookahead = self.DEFAULT_LOOKAHEAD
 
         self._in_tts_quote = False
         self._in_asterisk = False
 
-        self.xtts = XTTSv2_SOW_System()
-        self.edge = EdgeTTS()
-        self.kokoro = KokoroTTS_SOW_System()
-        self.silero = SileroTTS_SOW_System()
-        self.qwen = Qwen3TTS_SOW_System()
-        self.eleven = ElevenLabs()
+        self._loop = None
+        self._jobs = deque()
+        self._synthesis = set()
+        self._jobs_changed = None
+        self._generation = 0
+
+        self.xtts = None
+        self.edge = None
+        self.kokoro = None
+        self.silero = None
+        self.qwen = None
+        self.eleven = None
 
         self.playback_worker = AudioPlaybackWorker(self.device_index)
         self.playback_worker.start()
@@ -935,7 +1495,7 @@ class TTSWorker(QThread):
         
         def _enqueue(chunk_text):
             if chunk_text:
-                self.queue.put((chunk_text, message_id))
+                self.queue.put((chunk_text, message_id, self._generation))
 
         for sentence in raw_sentences:
             sentence = sentence.strip()
@@ -968,8 +1528,8 @@ class TTSWorker(QThread):
         if current_chunk:
             _enqueue(current_chunk)
 
-    def _persist_segment_for_replay(self, source_file, message_id):
-        if not source_file or not os.path.exists(source_file):
+    def _persist_segment_for_replay(self, frame, message_id):
+        if frame is None or not len(frame):
             return None
 
         segment_dir = os.path.join(
@@ -979,11 +1539,10 @@ class TTSWorker(QThread):
 
         existing = [f for f in os.listdir(segment_dir) if f.lower().endswith((".wav", ".mp3"))]
         next_index = len(existing) + 1
-        ext = os.path.splitext(source_file)[1] or ".wav"
-        segment_filename = f"seg_{next_index:04d}{ext}"
+        segment_filename = f"seg_{next_index:04d}.wav"
         destination = os.path.join(segment_dir, segment_filename)
 
-        shutil.copyfile(source_file, destination)
+        frame.write(destination)
 
         return f"tts_audio/{message_id}/{segment_filename}"
 
@@ -1075,113 +1634,258 @@ class TTSWorker(QThread):
     def clear_queue(self):
         with self.queue.mutex:
             self.queue.queue.clear()
-        self.discard_current = True
+        self._generation += 1
         self._in_tts_quote = False
         self._in_asterisk = False
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._cancel_jobs)
+            except RuntimeError:
+                pass
         if hasattr(self, 'playback_worker'):
             self.playback_worker.clear_queue()
 
     def run(self):
-        logger.info(f"TTS Worker Started ({self.tts_method})")
+        logger.info(f"TTS Worker Started ({self.tts_method}, lookahead {self.lookahead})")
 
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
+        # Engines run their blocking inference through asyncio.to_thread, i.e. on this pool:
+        # room for every chunk in flight plus the thread waiting on the text queue.
+        loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=self.lookahead + 2, thread_name_prefix="tts-synthesis")
+        )
+        self._jobs_changed = asyncio.Event()
+        self._loop = loop
 
-        while self.is_running:
-            try:
-                item = self.queue.get(timeout=0.5)
+        try:
+            loop.run_until_complete(self._schedule())
+        except Exception as e:
+            logger.error(f"TTS Error: {e}")
+        finally:
+            self._loop = None
+            self._cancel_jobs()
+            # Cancelled jobs leave their synthesis running until the model call returns.
+            if self._synthesis:
+                loop.run_until_complete(asyncio.gather(*self._synthesis, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+    async def _schedule(self):
+        feeder = asyncio.create_task(self._feed_jobs())
+        try:
+            await self._play_jobs()
+        finally:
+            feeder.cancel()
+            await asyncio.gather(feeder, return_exceptions=True)
 
-                if item is None:
-                    self.queue.task_done()
-                    continue
+    def _next_item(self):
+        try:
+            item = self.queue.get(timeout=0.5)
+        except queue.Empty:
+            return None
+        self.queue.task_done()
+        if item is None:
+            return None
+        if not isinstance(item, tuple):
+            item = (item, None)
+        if len(item) == 2:
+            item = (*item, self._generation)
+        return item if item[0] else None
+
+    async def _feed_jobs(self):
+        """
+        Moves chunks from the text queue into synthesis jobs while fewer than
+        lookahead + 1 jobs (the playing one included) are pending.
+        """
+        slots = asyncio.Semaphore(self.lookahead + 1 if supports_parallel_synthesis(self.tts_method) else 1)
+        while self.is_running:
+            if len(self._jobs) > self.lookahead:
+                self._jobs_changed.clear()
+                await self._jobs_changed.wait()
+                continue
 
-                text, message_id = item if isinstance(item, tuple) else (item, None)
-
-                if text:
-                    self.discard_current = False
-                    logger.info(f"Generating Audio for: {text[:30]}...")
-                    output_file = None
-
-                    if self.tts_method == "XTTSv2":
-                        output_file = loop.run_until_complete(
-                            self.xtts.generate_speech_with_xttsv2_sow_system(text, self.language, self.character_name)
-                        )
-                    elif self.tts_method == "Edge TTS":
-                        output_file = loop.run_until_complete(
-                            self.edge.generate_speech_with_edge_tts_sow_system(text, self.character_name)
-                        )
-                    elif self.tts_method == "Kokoro":
-                        output_file = loop.run_until_complete(
-                            self.kokoro.generate_speech_with_kokoro(text, self.character_name)
-                        )
-                    elif self.tts_method == "Silero":
-                        output_file = loop.run_until_complete(
-                            self.silero.generate_speech_with_silero(text, self.character_name)
-                        )
-                    elif self.tts_method == "Qwen-3 TTS":
-                        output_file = loop.run_until_complete(
-                            self.qwen.generate_speech_with_qwen3(text, self.character_name)
-                        )
-                    elif self.tts_method == "ElevenLabs":
-                        output_file = loop.run_until_complete(
-                            self.eleven.generate_speech_with_elevenlabs_sow_system(text, self.voice_id)
-                        )
-
-                    if self.discard_current:
-                        logger.info("TTS finished, but was interrupted. Discarding audio.")
-                        if output_file and os.path.exists(output_file):
-                            try:
-                                os.remove(output_file)
-                            except Exception:
-                                pass
-                        self.queue.task_done()
-                        continue
+            item = await asyncio.to_thread(self._next_item)
+            if item is None:
+                continue
+            text, message_id, generation = item
+            if generation != self._generation:
+                continue
 
-                    if output_file:
-                        try:
-                            import base64
-                            with open(output_file, "rb") as f:
-                                b64_audio = base64.b64encode(f.read()).decode("utf-8")
-                            self.audio_ready_signal.emit(b64_audio)
-                        except Exception as e:
-                            logger.error(f"Error encoding audio for web client: {e}")
-                        
-                        if message_id:
-                            try:
-                                relative_path = self._persist_segment_for_replay(output_file, message_id)
-                                if relative_path:
-                                    self.segment_saved_signal.emit(message_id, relative_path)
-                            except Exception as e:
-                                logger.error(f"Failed to persist TTS segment for replay: {e}")
-
-                        self.playback_worker.add_audio_file(output_file)
-
-                    self.queue.task_done()
+            job = _SynthesisJob(text, message_id, generation)
+            job.task = asyncio.create_task(self._run_job(job, slots))
+            self._jobs.append(job)
+            self._jobs_changed.set()
+
+    async def _run_job(self, job, slots):
+        # Cancelling the job must not free its slot: the engine keeps running its
+        # inference thread until the model call returns, so the synthesis task is
+        # shielded and holds the slot until then.
+        synthesis = asyncio.ensure_future(self._synthesize_job(job, slots))
+        self._synthesis.add(synthesis)
+        synthesis.add_done_callback(self._synthesis.discard)
+        try:
+            await asyncio.shield(synthesis)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"TTS Error: {e}")
+        finally:
+            job.frames.put_nowait(None)
+
+    async def _synthesize_job(self, job, slots):
+        async with slots:
+            if job.generation != self._generation:
+                return
+            logger.info(f"Generating Audio for: {job.text[:30]}...")
+            if self.streaming:
+                stream = self._stream_frames(job.text)
+                async with contextlib.aclosing(stream):
+                    async for frame in stream:
+                        if job.generation != self._generation:
+                            break
+                        if frame:
+                            job.frames.put_nowait(frame)
+            else:
+                frame = await self._synthesize(job.text)
+                if frame and job.generation == self._generation:
+                    job.frames.put_nowait(frame)
 
-            except queue.Empty:
+    async def _play_jobs(self):
+        while self.is_running:
+            if not self._jobs:
+                self._jobs_changed.clear()
+                await self._jobs_changed.wait()
                 continue
+
+            job = self._jobs[0]
+            try:
+                await self._deliver(job)
             except Exception as e:
                 logger.error(f"TTS Error: {e}")
+            if self._jobs and self._jobs[0] is job:
+                self._jobs.popleft()
+                self._jobs_changed.set()
+
+    async def _deliver(self, job):
+        """
+        Plays the frames of the oldest job as they arrive (all at once without streaming),
+        then hands the whole chunk to the web client and the replay segment.
+        """
+        played = []
+        while True:
+            frame = await job.frames.get()
+            if frame is None:
+                break
+            if job.generation != self._generation:
+                continue
+            played.append(frame)
+            if self.streaming:
+                self.playback_worker.add_audio_frame(frame)
+
+        if job.generation != self._generation:
+            logger.info("TTS finished, but was interrupted. Discarding audio.")
+            return
+
+        frame = AudioFrame.concatenate(played)
+        if not frame:
+            return
+
+        try:
+            import base64
+            b64_audio = base64.b64encode(frame.to_wav_bytes()).decode("utf-8")
+            self.audio_ready_signal.emit(b64_audio)
+        except Exception as e:
+            logger.error(f"Error encoding audio for web client: {e}")
+
+        if job.message_id:
+            try:
+                relative_path = await asyncio.to_thread(self._persist_segment_for_replay, frame, job.message_id)
+                if relative_path:
+                    self.segment_saved_signal.emit(job.message_id, relative_path)
+            except Exception as e:
+                logger.error(f"Failed to persist TTS segment for replay: {e}")
+
+        if not self.streaming:
+            self.playback_worker.add_audio_frame(frame)
+
+    def _cancel_jobs(self):
+        for job in self._jobs:
+            if job.task is not None:
+                job.task.cancel()
+        self._jobs.clear()
+        if self._jobs_changed is not None:
+            self._jobs_changed.set()
+
+    async def _synthesize(self, text):
+        create_tts_engine(self, self.tts_method)
+        if self.tts_method == "XTTSv2":
+            return await self.xtts.generate_speech_with_xttsv2_sow_system(text, self.language, self.character_name)
+        elif self.tts_method == "Edge TTS":
+            return await self.edge.generate_speech_with_edge_tts_sow_system(text, self.character_name)
+        elif self.tts_method == "Kokoro":
+            return await self.kokoro.generate_speech_with_kokoro(text, self.character_name)
+        elif self.tts_method == "Silero":
+            return await self.silero.generate_speech_with_silero(text, self.character_name)
+        elif self.tts_method == "Qwen-3 TTS":
+            return await self.qwen.generate_speech_with_qwen3(text, self.character_name)
+        elif self.tts_method == "ElevenLabs":
+            return await self.eleven.generate_speech_with_elevenlabs_sow_system(text, self.voice_id)
+        return None
+
+    async def _stream_frames(self, text):
+        create_tts_engine(self, self.tts_method)
+        if self.tts_method == "XTTSv2":
+            pieces = self.xtts.stream_speech_with_xttsv2(text, self.language, self.character_name)
+        elif self.tts_method == "Kokoro":
+            pieces = self.kokoro.stream_speech_with_kokoro(text, self.character_name)
+        elif self.tts_method == "Qwen-3 TTS":
+            pieces = self.qwen.stream_speech_with_qwen3(text, self.character_name)
+        else:
+            frame = await self._synthesize(text)
+            if frame:
+                yield frame
+            return
+
+        cache = TTSPhraseCache.shared()
+        language = self.language if self.tts_method == "XTTSv2" else None
+        key = await asyncio.to_thread(cache.key, self.tts_method, text, self.character_name, None, language)
+        cached = await cache.aget(key)
+        if cached is not None:
+            await pieces.aclose()
+            yield cached
+            return
+
+        played = []
+        async with contextlib.aclosing(pieces):
+            async for frame in pieces:
+                played.append(frame)
+                yield frame
+        # Only reached when the chunk was streamed to the end.
+        await cache.aput(key, played[0] if len(played) == 1 else AudioFrame.concatenate(played))
 
     def stop(self):
         self.is_running = False
-        self.discard_current = True
+        self._generation += 1
         self.queue.put(None)
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._cancel_jobs)
+            except RuntimeError:
+                pass
         if hasattr(self, 'playback_worker'):
             self.playback_worker.stop()
         self.quit()
         self.wait()
 
 class _AudioChunk:
-    __slots__ = ("file_path", "text", "message_id", "persist", "is_poison")
+    __slots__ = ("frame", "text", "message_id", "is_poison")
 
-    def __init__(self, file_path: Optional[str] = None, text: str = "",
-                 message_id: Optional[str] = None, persist: bool = False,
-                 is_poison: bool = False):
-        self.file_path = file_path
+    def __init__(self, frame: Optional[AudioFrame] = None, text: str = "",
+                 message_id: Optional[str] = None, is_poison: bool = False):
+        self.frame = frame
         self.text = text
         self.message_id = message_id
-        self.persist = persist
         self.is_poison = is_poison
 
 class PipelinedTTSWorker(QThread):
@@ -1236,18 +1940,9 @@ class PipelinedTTSWorker(QThread):
     def _ensure_tts_engines(self):
         if self._tts_engines_initialized:
             return
-        from app.utils.text_to_speech import (
-            XTTSv2_SOW_System, EdgeTTS, KokoroTTS_SOW_System,
-            SileroTTS_SOW_System, Qwen3TTS_SOW_System, ElevenLabs
-        )
-        self.xtts = XTTSv2_SOW_System()
-        self.edge = EdgeTTS()
-        self.kokoro = KokoroTTS_SOW_System()
-        self.silero = SileroTTS_SOW_System()
-        self.qwen = Qwen3TTS_SOW_System()
-        self.eleven = ElevenLabs()
+        create_tts_engine(self, self.tts_method)
         self._tts_engines_initialized = True
-        logger.info(f"[PipelinedTTS] engines initialized for method='{self.tts_method}'")
+        logger.info(f"[PipelinedTTS] engine initialized for method='{self.tts_method}'")
 
     def add_text(self, text, message_id=None):
         if not text:
@@ -1496,10 +2191,10 @@ class PipelinedTTSWorker(QThread):
                 logger.error(f"[PipelinedTTS] engine init failed: {e}")
                 continue
 
-            output_file = None
+            frame = None
             try:
-                output_file = await asyncio.wait_for(
-                    self._generate_wav(text),
+                frame = await asyncio.wait_for(
+                    self._generate_audio(text),
                     timeout=self.TTS_TIMEOUT_SEC
                 )
             except asyncio.TimeoutError:
@@ -1514,22 +2209,17 @@ class PipelinedTTSWorker(QThread):
 
             if self.discard_current:
                 logger.info(f"[PipelinedTTS] producer: discarding '{text[:40]}...' (interrupted)")
-                if output_file and os.path.exists(output_file):
-                    try:
-                        os.remove(output_file)
-                    except Exception:
-                        pass
                 continue
 
-            if not output_file or not os.path.exists(output_file):
-                logger.warning(f"[PipelinedTTS] producer: no output file for '{text[:40]}...'")
+            if not frame:
+                logger.warning(f"[PipelinedTTS] producer: no audio for '{text[:40]}...'")
                 continue
 
             try:
                 import base64
                 b64_audio = await asyncio.get_event_loop().run_in_executor(
                     None,
-                    lambda: base64.b64encode(open(output_file, "rb").read()).decode("utf-8")
+                    lambda: base64.b64encode(frame.to_wav_bytes()).decode("utf-8")
                 )
                 self.audio_ready_signal.emit(b64_audio)
             except Exception as e:
@@ -1538,7 +2228,7 @@ class PipelinedTTSWorker(QThread):
             if message_id:
                 try:
                     relative_path = await asyncio.get_event_loop().run_in_executor(
-                        None, self._persist_segment_for_replay, output_file, message_id
+                        None, self._persist_segment_for_replay, frame, message_id
                     )
                     if relative_path:
                         self.segment_saved_signal.emit(message_id, relative_path)
@@ -1546,21 +2236,15 @@ class PipelinedTTSWorker(QThread):
                     logger.error(f"[PipelinedTTS] persist error: {e}")
 
             chunk = _AudioChunk(
-                file_path=output_file,
+                frame=frame,
                 text=text,
                 message_id=message_id,
-                persist=False,
             )
             try:
                 await self._audio_buffer.put(chunk)
                 logger.info(f"[PipelinedTTS] producer: enqueued '{text[:40]}...' "
                             f"(buffer now has {self._audio_buffer.qsize() + 1} items)")
             except asyncio.CancelledError:
-                try:
-                    if output_file and os.path.exists(output_file):
-                        os.remove(output_file)
-                except Exception:
-                    pass
                 break
 
         logger.info("[PipelinedTTS] producer loop ended")
@@ -1582,21 +2266,16 @@ class PipelinedTTSWorker(QThread):
                 logger.info("[PipelinedTTS] player received poison pill")
                 break
 
-            if not chunk.file_path or not os.path.exists(chunk.file_path):
-                logger.warning(f"[PipelinedTTS] player: missing file '{chunk.file_path}'")
+            if not chunk.frame:
+                logger.warning(f"[PipelinedTTS] player: no audio for '{chunk.text[:40]}...'")
                 continue
 
             if self._interrupt_flag.is_set():
                 logger.info(f"[PipelinedTTS] player: skipping '{chunk.text[:40]}...' (interrupted)")
-                try:
-                    if not chunk.persist and os.path.exists(chunk.file_path):
-                        os.remove(chunk.file_path)
-                except Exception:
-                    pass
                 continue
 
             logger.info(f"[PipelinedTTS] player: playing '{chunk.text[:40]}...'")
-            await self._play_audio_with_lipsync(chunk.file_path, chunk.persist)
+            await self._play_audio_with_lipsync(chunk.frame)
 
             if self._audio_buffer.empty() and self.text_queue.empty() and not self._interrupt_flag.is_set():
                 try:
@@ -1611,38 +2290,17 @@ class PipelinedTTSWorker(QThread):
 
         logger.info("[PipelinedTTS] player loop ended")
 
-    async def _play_audio_with_lipsync(self, file_path: str, persist: bool):
-        try:
-            data, samplerate = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: sf.read(file_path, dtype='float32')
-            )
-        except Exception as e:
-            logger.error(f"[PipelinedTTS] read error: {e}")
-            try:
-                if not persist and os.path.exists(file_path):
-                    os.remove(file_path)
-            except Exception:
-                pass
-            return
+    async def _play_audio_with_lipsync(self, frame: AudioFrame):
+        data, samplerate = frame.samples, frame.sample_rate
 
         if data is None or len(data) == 0:
-            logger.warning(f"[PipelinedTTS] empty audio data for '{file_path}'")
-            try:
-                if not persist and os.path.exists(file_path):
-                    os.remove(file_path)
-            except Exception:
-                pass
+            logger.warning("[PipelinedTTS] empty audio data")
             return
 
         try:
             sd.play(data, samplerate, device=self.device_index)
         except Exception as e:
             logger.error(f"[PipelinedTTS] sd.play error: {e}")
-            try:
-                if not persist and os.path.exists(file_path):
-                    os.remove(file_path)
-            except Exception:
-                pass
             return
 
         duration = len(data) / samplerate
@@ -1701,13 +2359,7 @@ class PipelinedTTSWorker(QThread):
                 except Exception:
                     pass
 
-            try:
-                if not persist and os.path.exists(file_path):
-                    os.remove(file_path)
-            except Exception:
-                pass
-
-    async def _generate_wav(self, text: str) -> Optional[str]:
+    async def _generate_audio(self, text: str) -> Optional[AudioFrame]:
         method = self.tts_method
         if method == "XTTSv2":
             return await self.xtts.generate_speech_with_xttsv2_sow_system(
@@ -1731,8 +2383,8 @@ class PipelinedTTSWorker(QThread):
             logger.error(f"[PipelinedTTS] unknown TTS method: {method}")
             return None
 
-    def _persist_segment_for_replay(self, source_file, message_id):
-        if not source_file or not os.path.exists(source_file):
+    def _persist_segment_for_replay(self, frame, message_id):
+        if frame is None or not len(frame):
             return None
 
         segment_dir = os.path.join(
@@ -1744,9 +2396,8 @@ class PipelinedTTSWorker(QThread):
         existing = [f for f in os.listdir(segment_dir)
                     if f.lower().endswith((".wav", ".mp3"))]
         next_index = len(existing) + 1
-        ext = os.path.splitext(source_file)[1] or ".wav"
-        segment_filename = f"seg_{next_index:04d}{ext}"
+        segment_filename = f"seg_{next_index:04d}.wav"
         destination = os.path.join(segment_dir, segment_filename)
 
-        shutil.copyfile(source_file, destination)
+        frame.write(destination)
         return f"tts_audio/{message_id}/{segment_filename}"
@@ -1,10 +1,13 @@
 import os
+import json
+import hashlib
 import secrets
 import asyncio
 import logging
 import ipaddress
+from collections import deque
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException, Security, Depends
-from fastapi.responses import HTMLResponse, FileResponse, PlainTextResponse
+from fastapi.responses import HTMLResponse, FileResponse, PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import APIKeyHeader, APIKeyQuery
 from faster_whisper import WhisperModel
@@ -12,33 +15,144 @@ import uvicorn
 
 logger = logging.getLogger("WebBridge")
 
+class _ClientChannel:
+    """
+    Outbound side of one WebSocket connection: a bounded queue of already serialized
+    frames drained by its own writer task.
+    """
+    __slots__ = ("websocket", "queue", "wakeup", "writer", "downgraded")
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        # Entries are [message type, serialized frame, chunk pieces or None].
+        self.queue = deque()
+        self.wakeup = asyncio.Event()
+        self.writer = None
+        self.downgraded = False
+
+
 class ConnectionManager:
+    """
+    Fans messages out to every connected client without awaiting any of them.
+
+    broadcast() serializes the message once and appends the frame to each client's queue;
+    a writer task per socket sends the frames in order. Consecutive "chunk" messages that
+    are still queued are merged into a single frame, so a phone that falls behind receives
+    larger chunks instead of more of them; queued telemetry keeps only its latest value.
+    A client whose queue passes DOWNGRADE_QUEUE stops receiving telemetry until it catches up, and one that overflows
+    MAX_QUEUE or stalls a send for SEND_TIMEOUT seconds is disconnected.
+    """
+    MAX_QUEUE = 256
+    DOWNGRADE_QUEUE = 64
+    SEND_TIMEOUT = 10.0
+    DROPPABLE_TYPES = ("avatar_telemetry",)
+
     def __init__(self):
         self.active_connections: list[WebSocket] = []
+        self._channels: dict[WebSocket, _ClientChannel] = {}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        channel = _ClientChannel(websocket)
+        channel.writer = asyncio.create_task(self._writer(channel))
+        self._channels[websocket] = channel
 
     def disconnect(self, websocket: WebSocket):
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+        channel = self._channels.pop(websocket, None)
+        if channel is not None:
+            channel.queue.clear()
+            if channel.writer is not None and channel.writer is not asyncio.current_task():
+                channel.writer.cancel()
+
+    def publish(self, message: dict, exclude: WebSocket = None):
+        """
+        Queues a message for every client (except `exclude`) and returns immediately.
+        """
+        if not self._channels:
+            return
+
+        message_type = message.get("type")
+        frame = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+        is_chunk = message_type == "chunk"
+
+        for websocket, channel in list(self._channels.items()):
+            if websocket == exclude:
+                continue
+            queue = channel.queue
+
+            if is_chunk and queue:
+                # Telemetry queued after the last chunk may overtake the merged text.
+                last = queue[-1] if queue[-1][0] not in self.DROPPABLE_TYPES or len(queue) < 2 else queue[-2]
+                if last[0] == "chunk":
+                    last[2].append(message.get("text", ""))
+                    last[1] = None
+                    continue
+
+            if message_type in self.DROPPABLE_TYPES:
+                if len(queue) >= self.DOWNGRADE_QUEUE:
+                    if not channel.downgraded:
+                        channel.downgraded = True
+                        logger.info(f"WebSocket client is falling behind ({len(queue)} queued), skipping telemetry.")
+                    continue
+                if queue and queue[-1][0] == message_type:
+                    # Only the latest value matters.
+                    queue[-1][1] = frame
+                    continue
+
+            if len(queue) >= self.MAX_QUEUE:
+                logger.warning(f"Dropping slow WebSocket client: {len(queue)} messages queued.")
+                self.disconnect(websocket)
+                asyncio.create_task(self._close(websocket))
+                continue
+
+            queue.append([message_type, frame, [message.get("text", "")] if is_chunk else None])
+            channel.wakeup.set()
 
     async def broadcast(self, message: dict, exclude: WebSocket = None):
-        disconnected = []
-        for connection in self.active_connections:
-            if connection == exclude:
-                continue
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"WebSocket Broadcast Error: {e}")
-                disconnected.append(connection)
-                
-        for connection in disconnected:
-            self.disconnect(connection)
+        self.publish(message, exclude=exclude)
+
+    async def _writer(self, channel: _ClientChannel):
+        queue = channel.queue
+        try:
+            while True:
+                if not queue:
+                    channel.wakeup.clear()
+                    await channel.wakeup.wait()
+                    continue
+
+                message_type, frame, pieces = queue.popleft()
+                if frame is None:
+                    frame = json.dumps({"type": message_type, "text": "".join(pieces)}, separators=(",", ":"), ensure_ascii=False)
+                if channel.downgraded and len(queue) < self.DOWNGRADE_QUEUE // 2:
+                    channel.downgraded = False
+
+                try:
+                    await asyncio.wait_for(channel.websocket.send_text(frame), timeout=self.SEND_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Dropping WebSocket client: send stalled for {self.SEND_TIMEOUT:.0f}s.")
+                    self.disconnect(channel.websocket)
+                    await self._close(channel.websocket)
+                    return
+                except Exception as e:
+                    logger.error(f"WebSocket Broadcast Error: {e}")
+                    self.disconnect(channel.websocket)
+                    return
+        except asyncio.CancelledError:
+            pass
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            await websocket.close(code=1013)
+        except Exception:
+            pass
 
 class WebBridge:
+    HISTORY_MAX_LIMIT = 200
+
     def __init__(self, interface_signals, auth_token: str = None):
         self.app = FastAPI(docs_url=None, redoc_url=None)
         self.signals = interface_signals
@@ -164,16 +278,17 @@ class WebBridge:
             return HTMLResponse("No background", status_code=404)
 
         @self.app.get("/api/history/{char_name}")
-        async def get_history(char_name: str, offset: int = 0, limit: int = 50):
-            config = await asyncio.to_thread(self.signals.configuration_characters.load_configuration)
-            char_info = config["character_list"].get(char_name, {})
-            current_chat = char_info.get("current_chat", "default")
-            chat_content = char_info.get("chats", {}).get(current_chat, {}).get("chat_content", {})
+        async def get_history(char_name: str, request: Request, offset: int = 0, limit: int = 50, before: str = None):
+            limit = max(1, min(limit, self.HISTORY_MAX_LIMIT))
+            page, next_cursor = await asyncio.to_thread(
+                self.signals.configuration_characters.get_chat_page, char_name, limit, before, offset
+            )
             
             user_name = self.signals.configuration_settings.get_user_data("user_name") or "User"
             
             messages = []
-            for msg_id, msg_data in sorted(chat_content.items(), key=lambda x: x[1].get("sequence_number", 0)):
+            for msg_data in page:
+                msg_id = msg_data.get("message_id")
                 current_variant_id = msg_data.get("current_variant_id", "default")
                 text = next(
                     (v["text"] for v in msg_data.get("variants", []) if v["variant_id"] == current_variant_id),
@@ -193,15 +308,16 @@ class WebBridge:
                     "text": processed_text
                 })
             
-            if messages:
-                total = len(messages)
-                start_idx = max(0, total - offset - limit)
-                end_idx = total - offset
-                history_slice = messages[start_idx:end_idx]
-            else:
-                history_slice = []
-                
-            return {"history": history_slice}
+            payload = {"history": messages, "next_cursor": next_cursor, "has_more": next_cursor is not None}
+            body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+            etag = f'W/"{hashlib.sha1(body.encode("utf-8")).hexdigest()[:32]}"'
+            headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+            if_none_match = request.headers.get("if-none-match", "")
+            if if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]:
+                return Response(status_code=304, headers=headers)
+
+            return Response(content=body, media_type="application/json", headers=headers)
 
         @self.app.delete("/api/messages/{message_id}")
         async def delete_message_api(message_id: str, request: Request):
@@ -223,26 +339,11 @@ class WebBridge:
             char_name = data.get("character")
             new_text = data.get("text")
             
-            config = await asyncio.to_thread(self.signals.configuration_characters.load_configuration)
-            char_info = config.get("character_list", {}).get(char_name, {})
-            current_chat = char_info.get("current_chat", "default")
-            chats = char_info.get("chats", {})
-            
-            updated_on_disk = False
-            if current_chat in chats:
-                chat_content = chats[current_chat].get("chat_content", {})
-                if message_id in chat_content:
-                    msg_data = chat_content[message_id]
-                    current_variant_id = msg_data.get("current_variant_id", "default")
-                    
-                    for variant in msg_data.get("variants", []):
-                        if variant["variant_id"] == current_variant_id:
-                            variant["text"] = new_text
-                            updated_on_disk = True
-                            break
+            updated_on_disk = await asyncio.to_thread(
+                self.signals.configuration_characters.edit_chat_message, message_id, char_name, new_text
+            )
             
             if updated_on_disk:
-                await asyncio.to_thread(self.signals.configuration_characters.save_configuration, config)
                 
                 if message_id in self.signals.messages:
                     processed_text = self.signals.markdown_to_html(new_text)
@@ -272,6 +373,11 @@ class WebBridge:
             asyncio.create_task(self.signals.regenerate_message(conv_method, char_name, message_id))
             return {"status": "ok"}
 
+        @self.app.get("/api/local_llm/metrics")
+        async def get_local_llm_metrics():
+            from app.utils.ai_clients.local_slot_scheduler import LocalSlotScheduler
+            return LocalSlotScheduler.shared().metrics()
+
         @self.app.post("/api/generation/stop")
         async def stop_generation_api():
             self.signals.stop_generation()
@@ -376,14 +482,23 @@ class WebBridge:
                 logger.error(f"WebSocket Error: {e}")
                 self.manager.disconnect(websocket)
 
+    def publish_chunk(self, chunk: str):
+        self.manager.publish({"type": "chunk", "text": chunk})
+
+    def publish_message_start(self):
+        self.manager.publish({"type": "message_start"})
+
+    def publish_message_end(self):
+        self.manager.publish({"type": "message_end"})
+
     async def broadcast_chunk(self, chunk: str):
-        await self.manager.broadcast({"type": "chunk", "text": chunk})
+        self.publish_chunk(chunk)
         
     async def broadcast_message_start(self):
-        await self.manager.broadcast({"type": "message_start"})
+        self.publish_message_start()
         
     async def broadcast_message_end(self):
-        await self.manager.broadcast({"type": "message_end"})
+        self.publish_message_end()
 
     async def broadcast_character_change(self, new_char: str):
         await self.manager.broadcast({"type": "character_changed", "character": new_char})
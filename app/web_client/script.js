@@ -3,7 +3,7 @@ let currentCharacter = "";
 let ws = null;
 let currentMessageId = null;
 let currentMessageDiv = null;
-let historyOffset = 0;
+let historyCursor = null;
 const HISTORY_LIMIT = 50;
 let isLoadingHistory = false;
 let hasMoreHistory = true;
@@ -626,7 +626,8 @@ async function loadHistory(isFirstLoad = false) {
     isLoadingHistory = true;
     try {
         const resp = await authFetch(
-            `/api/history/${currentCharacter}?offset=${historyOffset}&limit=${HISTORY_LIMIT}`
+            `/api/history/${currentCharacter}?limit=${HISTORY_LIMIT}` +
+            (historyCursor ? `&before=${encodeURIComponent(historyCursor)}` : "")
         );
         const data = await resp.json();
         if (data.history && data.history.length > 0) {
@@ -642,8 +643,8 @@ async function loadHistory(isFirstLoad = false) {
             } else {
                 chatContainer.insertBefore(frag, chatContainer.firstChild);
             }
-            historyOffset += data.history.length;
-            if (data.history.length < HISTORY_LIMIT) hasMoreHistory = false;
+            historyCursor = data.next_cursor;
+            if (!data.has_more) hasMoreHistory = false;
         } else {
             hasMoreHistory = false;
         }
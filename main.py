@@ -19,6 +19,7 @@ from app.configuration import configuration
 from app.gui.icons import resources
 from app.gui import interface_signals
 from app.utils.ai_clients.local_server_manager import LocalServerManager
+from app.utils.ai_clients.ai_factory import AIFactory
 from app.gui.sowInterface import Ui_MainWindow
 
 from app.gui.custom_widgets import SowConfirmDialog
@@ -865,6 +866,8 @@ if __name__ == "__main__":
 
     loop = QEventLoop(app)
     asyncio.set_event_loop(loop)
+
+    app.aboutToQuit.connect(configuration.ConfigurationStore.flush_all)
     
     main_window = MainWindow()
     main_window.setWindowIcon(QtGui.QIcon("app/gui/icons/logotype.ico"))
@@ -885,3 +888,8 @@ if __name__ == "__main__":
     asyncio.ensure_future(main_window.startup_sequence())
 
     loop.run_forever()
+
+    try:
+        loop.run_until_complete(AIFactory.aclose_all())
+    except Exception as e:
+        logger.warning(f"Failed to close AI providers on shutdown: {e}")
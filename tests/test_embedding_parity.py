@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from app.utils import embedding_provider as ep
+
+TEXTS = [
+    "query: What did she say about the lighthouse?",
+    "passage: The old keeper lit the lamp every night until the storm took the tower.",
+    "passage: Она пообещала вернуться к весне и принести письма.",
+    "query: 好きな食べ物は何ですか？",
+]
+
+
+def _normalized(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+
+@pytest.fixture(scope="module")
+def torch_embeddings():
+    pytest.importorskip("sentence_transformers")
+    if not ep._model_dir().exists():
+        pytest.skip(f"embedding model not found in {ep._model_dir()}")
+    return _normalized(ep._load_torch("cpu").encode(TEXTS, convert_to_numpy=True))
+
+
+@pytest.mark.parametrize("backend, threshold", [
+    (ep.BACKEND_ONNX, 0.999),
+    (ep.BACKEND_ONNX_INT8, 0.98),
+])
+def test_onnx_matches_torch(torch_embeddings, backend, threshold):
+    if not ep.OnnxEmbedder.is_supported():
+        pytest.skip("onnxruntime or tokenizers is not installed")
+    if ep.OnnxEmbedder.find_graph(ep._model_dir(), quantized=backend == ep.BACKEND_ONNX_INT8) is None:
+        pytest.skip(f"no exported ONNX graph for backend '{backend}'")
+
+    onnx_embeddings = _normalized(ep._load_onnx(backend, "cpu").encode(TEXTS, convert_to_numpy=True))
+
+    similarity = (torch_embeddings * onnx_embeddings).sum(axis=1)
+    assert similarity.min() >= threshold, f"{backend}: cosine similarity per text {similarity.round(5).tolist()}"